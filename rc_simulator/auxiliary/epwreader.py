@@ -7,6 +7,7 @@ J. A. Fonseca  adaptation for CEA tool     18.05.16
 
 """
 import pandas as pd
+from auxiliary import weather
 
 __author__ = "Clayton Miller"
 __copyright__ = "Copyright 2014, Architecture and Building Systems - ETH Zurich"
@@ -20,17 +21,9 @@ __status__ = "Production"
 
 def epwreader(weather_path):
 
-    epw_labels = ['year', 'month', 'day', 'hour', 'minute', 'datasource', 'drybulb_C', 'dewpoint_C', 'relhum_percent',
-                  'atmos_Pa', 'exthorrad_Whm2', 'extdirrad_Whm2', 'horirsky_Whm2', 'glohorrad_Whm2',
-                  'dirnorrad_Whm2', 'difhorrad_Whm2', 'glohorillum_lux', 'dirnorillum_lux', 'difhorillum_lux',
-                  'zenlum_lux', 'winddir_deg', 'windspd_ms', 'totskycvr_tenths', 'opaqskycvr_tenths', 'visibility_km',
-                  'ceiling_hgt_m', 'presweathobs', 'presweathcodes', 'precip_wtr_mm', 'aerosol_opt_thousandths',
-                  'snowdepth_cm', 'days_last_snow', 'Albedo', 'liq_precip_depth_mm', 'liq_precip_rate_Hour']
-
-    result = pd.read_csv(weather_path, skiprows=8, header=None,
-                         names=epw_labels).drop('datasource', axis=1)
-    result['dayofyear'] = pd.date_range(
-        '1/1/2010', periods=8760, freq='H').dayofyear
+    weather_data = weather.open_epw(weather_path)
+    result = weather_data.to_dataframe()
+    result['dayofyear'] = pd.DatetimeIndex(weather_data.time_index).dayofyear
     result['ratio_diffhout'] = result[
         'difhorrad_Whm2'] / result['glohorrad_Whm2']
 
@@ -3,6 +3,21 @@
 SunPosition CSV file reader
 ===========================
 
+SunPosition.csv is stored transposed: line 2 holds the sunlit hours of the year, numbered from 1 at the end of the
+first hour, and lines 3 and 4 the altitude and azimuth (degrees east of north) of each of these hours.
+read_sun_position converts it once into dense arrays with one value per hour of the year and nan at night, which
+save_sun_position and load_sun_position store as a binary .npy file.
+
+HOW TO USE
+
+::
+
+    from auxiliary import sunPositionReader
+    altitude, azimuth = sunPositionReader.read_sun_position('auxiliary/SunPosition.csv')
+    sunPositionReader.save_sun_position('SunPosition.npy', altitude, azimuth)
+    altitude, azimuth = sunPositionReader.load_sun_position('SunPosition.npy')
+    altitude[hoy], azimuth[hoy]
+
 """
 import pandas as pd
 import numpy as np
@@ -30,6 +45,54 @@ def sunPositionReader(SunPosition_path):
 
     return result
 
+
+def read_sun_position(SunPosition_path, hours_of_year=8760):
+    """
+    Reads SunPosition.csv into dense arrays indexed by the hour of the year, as in Location.calc_sun_position
+
+    :param SunPosition_path: Path of the CSV file
+    :type SunPosition_path: str
+    :param hours_of_year: Length of the arrays
+    :type hours_of_year: int
+    :return: altitude, azimuth: arrays of the sun position [degrees], nan while the sun is below the horizon. The
+        azimuth is converted from degrees east of north to the convention of Location.calc_sun_position,
+        180 - azimuth
+    :rtype: tuple
+    """
+    with open(SunPosition_path) as sun_position_file:
+        lines = sun_position_file.readlines()[1:4]
+    hoy, altitude_csv, azimuth_csv = [np.array(line.split(','), dtype=float) for line in lines]
+
+    altitude = np.full(hours_of_year, np.nan)
+    azimuth = np.full(hours_of_year, np.nan)
+    index = hoy.astype(int) - 1
+    altitude[index] = altitude_csv
+    azimuth[index] = 180 - azimuth_csv
+    return altitude, azimuth
+
+
+def save_sun_position(binary_path, altitude, azimuth):
+    """
+    Saves the arrays of read_sun_position as one .npy file of shape (2, hours of the year)
+
+    :param binary_path: Path of the .npy file
+    :type binary_path: str
+    """
+    np.save(binary_path, np.vstack([altitude, azimuth]))
+
+
+def load_sun_position(binary_path):
+    """
+    Loads the arrays saved by save_sun_position
+
+    :param binary_path: Path of the .npy file
+    :type binary_path: str
+    :return: altitude, azimuth
+    :rtype: tuple
+    """
+    altitude, azimuth = np.load(binary_path)
+    return altitude, azimuth
+
 # def test_reader():
 #
 #    locator = cea.inputlocator.InputLocator(r'C:\reference-case\baseline')
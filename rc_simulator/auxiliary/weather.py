@@ -0,0 +1,381 @@
+"""
+EnergyPlus weather file loader with a binary cache
+
+The 35 EPW columns are parsed once with pandas, and the numeric columns are written next to the EPW file (or into
+a cache directory) as a .npy array with one contiguous row per column, plus a small .json file with the column
+names, dtypes, the EPW header and the size and modification time of the EPW file. Later loads memory-map the .npy
+file instead of parsing the text again. The cache is rebuilt whenever the EPW file changes.
+
+HOW TO USE
+
+::
+
+    from auxiliary import weather
+    weather_data = weather.open_epw('Zurich-Kloten_2013.epw')  # WeatherData, as radiation.Location.weather_data
+    weather_data = weather.read_epw('Zurich-Kloten_2013.epw', cache_directory='weather_cache')  # DataFrame
+
+"""
+
+import os
+import json
+from calendar import isleap
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Clayton Miller", "Jimeno A. Fonseca"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+EPW_LABELS = ['year', 'month', 'day', 'hour', 'minute', 'datasource', 'drybulb_C', 'dewpoint_C', 'relhum_percent',
+              'atmos_Pa', 'exthorrad_Whm2', 'extdirrad_Whm2', 'horirsky_Whm2', 'glohorrad_Whm2',
+              'dirnorrad_Whm2', 'difhorrad_Whm2', 'glohorillum_lux', 'dirnorillum_lux', 'difhorillum_lux',
+              'zenlum_lux', 'winddir_deg', 'windspd_ms', 'totskycvr_tenths', 'opaqskycvr_tenths', 'visibility_km',
+              'ceiling_hgt_m', 'presweathobs', 'presweathcodes', 'precip_wtr_mm', 'aerosol_opt_thousandths',
+              'snowdepth_cm', 'days_last_snow', 'Albedo', 'liq_precip_depth_mm', 'liq_precip_rate_Hour']
+
+# Number of header lines before the hourly records
+EPW_HEADER_LINES = 8
+
+# Text column that is not kept
+TEXT_LABELS = ['datasource']
+
+# Date columns, returned as integers
+DATE_LABELS = ['year', 'month', 'day', 'hour', 'minute']
+
+# Columns needed by a thermal simulation
+THERMAL_LABELS = ['drybulb_C', 'dirnorrad_Whm2', 'difhorrad_Whm2']
+
+# Increase when the layout of the cache files changes, so that old caches are rebuilt
+CACHE_VERSION = 1
+
+
+def cache_paths(weather_path, cache_directory=None):
+    """
+    Paths of the .npy and .json cache files of an EPW file, next to it or in the cache directory
+
+    :rtype: tuple
+    """
+    if cache_directory is None:
+        base_path = weather_path
+    else:
+        # Files of the same name in different folders must not share a cache
+        path_hash = hashlib.sha1(os.path.abspath(weather_path).encode('utf-8')).hexdigest()[:12]
+        base_path = os.path.join(cache_directory, '%s.%s' % (os.path.basename(weather_path), path_hash))
+    return base_path + '.npy', base_path + '.json'
+
+
+def file_signature(weather_path):
+    """Size and modification time of the EPW file, stored in the cache to detect changes"""
+    status = os.stat(weather_path)
+    return {'size': status.st_size, 'mtime_ns': getattr(status, 'st_mtime_ns', int(status.st_mtime * 1e9))}
+
+
+def parse_epw(weather_path):
+    """
+    Parses the EPW text with pandas
+
+    :return: meta, with the labels, integer_labels and header lines of the file, and array, the numeric columns
+        with shape (number of columns, number of records)
+    :rtype: tuple
+    """
+    with open(weather_path) as weather_file:
+        header = [weather_file.readline().rstrip('\r\n') for _ in range(EPW_HEADER_LINES)]
+
+    data = pd.read_csv(weather_path, skiprows=EPW_HEADER_LINES, header=None, names=EPW_LABELS)
+    labels = [label for label in EPW_LABELS if label not in TEXT_LABELS]
+    columns = [pd.to_numeric(data[label], errors='coerce').values for label in labels]
+
+    meta = {'labels': labels,
+            'integer_labels': [label for label, column in zip(labels, columns) if column.dtype.kind in 'iu'],
+            'header': header}
+    return meta, np.array(columns, dtype=np.float64)
+
+
+def write_cache(weather_path, meta, array, cache_directory=None):
+    """
+    Writes the parsed columns to the .npy and .json cache files. Files are written under a temporary name and then
+    renamed, so that processes reading the same EPW file never see a partial cache. Failing to write the cache
+    (e.g. a read only folder) only means that the file is parsed again next time
+    """
+    array_path, meta_path = cache_paths(weather_path, cache_directory)
+    meta = dict(meta, version=CACHE_VERSION, source=file_signature(weather_path))
+
+    temporary_suffix = '.%d.tmp' % os.getpid()
+    try:
+        if cache_directory is not None and not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+        with open(array_path + temporary_suffix, 'wb') as array_file:
+            np.save(array_file, array)
+        with open(meta_path + temporary_suffix, 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(array_path + temporary_suffix, array_path)
+        os.replace(meta_path + temporary_suffix, meta_path)
+    except (IOError, OSError):
+        for path in [array_path + temporary_suffix, meta_path + temporary_suffix]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def read_cache(weather_path, cache_directory=None):
+    """
+    Opens the cache of an EPW file if it exists and matches the current EPW file
+
+    :return: meta, the content of the .json file, and array, the memory-mapped columns. None if not cached
+    :rtype: tuple
+    """
+    array_path, meta_path = cache_paths(weather_path, cache_directory)
+    try:
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if meta.get('version') != CACHE_VERSION or meta.get('source') != file_signature(weather_path):
+            return None
+        return meta, np.load(array_path, mmap_mode='r')
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def load_epw(weather_path, cache_directory=None):
+    """
+    Loads the columns of an EPW file, from the cache if possible, otherwise by parsing and then caching it
+
+    :param weather_path: Path of the EPW file
+    :type weather_path: str
+    :param cache_directory: Folder of the cache files. Defaults to the folder of the EPW file
+    :type cache_directory: str
+    :return: meta, with the labels, integer_labels and header lines of the file, and array, the columns with
+        shape (number of columns, number of records). Memory-mapped and read only if loaded from the cache
+    :rtype: tuple
+    """
+    cached = read_cache(weather_path, cache_directory)
+    if cached is not None:
+        return cached
+
+    meta, array = parse_epw(weather_path)
+    write_cache(weather_path, meta, array, cache_directory)
+    return meta, array
+
+
+def calc_time_index(year, month, day, hour, minute, records_per_hour=1):
+    """
+    Start time of every record from the date columns of an EPW file. EPW hours are 1 - 24 and the minute is the end
+    of the record, so the first record of an hourly file starts at 00:00. Leap years, several years and sub-hourly
+    records follow from the dates. Typical years (TMY) combine months of different years, their records are
+    rebased to consecutive years, starting from the year of the first record or the next year that is a leap year
+    exactly if the records contain 29 February
+
+    :param year: year column
+    :param month: month column
+    :param day: day column
+    :param hour: hour column
+    :param minute: minute column
+    :param records_per_hour: Number of records per hour, see WeatherData.records_per_hour
+    :type records_per_hour: int
+    :return: time_index, datetime64[m] array with the start of every record
+    :rtype: numpy.ndarray
+    """
+    year, month, day, hour, minute = [np.asarray(column).astype(np.int64) for column in (year, month, day, hour,
+                                                                                          minute)]
+    timestep = np.timedelta64(60 // records_per_hour, 'm')
+    # Some files write 0 instead of 60 for hourly records
+    end_minute = np.where(minute == 0, 60, minute)
+    minute_of_day = ((hour - 1) * 60 + end_minute).astype('timedelta64[m]') - timestep
+
+    def dates(years):
+        months = (years - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)
+        return (months.astype('datetime64[D]') + (day - 1)).astype('datetime64[m]') + minute_of_day
+
+    def is_continuous(time_index):
+        return bool(np.all(np.diff(time_index) == timestep))
+
+    time_index = dates(year)
+    if len(time_index) and not is_continuous(time_index):
+        # Typical year: a new year starts whenever the date goes back. 2000 is a leap year, it has all dates
+        calendar = dates(np.full(len(year), 2000))
+        new_year = np.r_[False, np.diff(calendar) <= np.timedelta64(0, 'm')]
+        # The first year moves forward to the next year that is a leap year exactly if its records contain
+        # 29 February, e.g. an IWEC file with January 1984 and a February of 28 days starts in 1985
+        has_leap_day = bool(np.any((month == 2) & (day == 29) & ~np.cumsum(new_year).astype(bool)))
+        first_year = year[0]
+        while isleap(first_year) != has_leap_day:
+            first_year += 1
+        time_index = dates(first_year + np.cumsum(new_year))
+
+        if not is_continuous(time_index):
+            raise ValueError('weather records are not a continuous series of %s minute steps (e.g. 29 February in '
+                             'a typical year that is rebased to a non leap year)' % timestep.astype(int))
+
+    return time_index
+
+
+class WeatherData(object):
+    """
+    Columns of an EPW file that are only converted when they are first accessed. Numeric columns are plain NumPy
+    arrays, read only views into the memory-mapped cache, so weather_data['drybulb_C'][hour] is array indexing and
+    only the columns that are used are read from disk. Like a DataFrame, iterating gives the column labels and len()
+    the number of records
+
+    HOW TO USE
+
+    ::
+
+        weather_data = weather.open_epw('Zurich-Kloten_2013.epw')
+        t_out = weather_data['drybulb_C']  # numpy array, one value per record
+        weather_data.time_index  # Start time of every record
+        weather_data.to_dataframe()  # All columns as DataFrame
+
+    """
+
+    def __init__(self, meta, array):
+        """
+        :param meta: labels, integer_labels and header lines, see load_epw
+        :type meta: dict
+        :param array: Columns of the file, shape (number of columns, number of records)
+        :type array: numpy.ndarray
+        """
+        self.labels = list(meta['labels'])
+        self.integer_labels = set(meta['integer_labels'])
+        self.header = meta['header']
+        self.array = array
+        self.columns = {}
+        self._time_index = None
+
+    def __getitem__(self, label):
+        if label not in self.columns:
+            try:
+                position = self.labels.index(label)
+            except ValueError:
+                # As a DataFrame, for callers that catch KeyError
+                raise KeyError(label)
+            column = self.array[position]
+            if label in self.integer_labels:
+                column = column.astype(np.int64)
+            self.columns[label] = column
+        return self.columns[label]
+
+    def __contains__(self, label):
+        return label in self.labels
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return self.array.shape[1]
+
+    def keys(self):
+        return list(self.labels)
+
+    @property
+    def latitude_deg(self):
+        """Latitude from the LOCATION line of the EPW header [degrees]"""
+        return float(self.header[0].split(',')[6])
+
+    @property
+    def longitude_deg(self):
+        """Longitude from the LOCATION line of the EPW header [degrees]"""
+        return float(self.header[0].split(',')[7])
+
+    @property
+    def records_per_hour(self):
+        """Number of records per hour from the DATA PERIODS line of the EPW header, 1 for hourly files"""
+        try:
+            return int(self.header[7].split(',')[2])
+        except (IndexError, ValueError):
+            return 1
+
+    @property
+    def timestep(self):
+        """Length of a record [hours]"""
+        return 1.0 / self.records_per_hour
+
+    @property
+    def time_index(self):
+        """Start time of every record as datetime64[m] array, see calc_time_index"""
+        if self._time_index is None:
+            self._time_index = calc_time_index(self['year'], self['month'], self['day'], self['hour'],
+                                               self['minute'], self.records_per_hour)
+        return self._time_index
+
+    def to_dataframe(self):
+        """
+        :return: weather_data, All columns with one row per record, as returned by read_epw
+        :rtype: pandas.DataFrame
+        """
+        return pd.DataFrame(dict((label, self[label]) for label in self.labels), columns=self.labels)
+
+
+def open_epw(weather_path, cache_directory=None):
+    """
+    Opens an EPW file as WeatherData, through the cache
+
+    :param weather_path: Path of the EPW file
+    :type weather_path: str
+    :param cache_directory: Folder of the cache files. Defaults to the folder of the EPW file
+    :type cache_directory: str
+    :rtype: WeatherData
+    """
+    return WeatherData(*load_epw(weather_path, cache_directory))
+
+
+def iter_epw(weather_path, labels=THERMAL_LABELS, chunk_size=8760, cache_directory=None):
+    """
+    Reads the records of an EPW file in chunks, so that the memory use does not depend on the length of the file.
+    If the file is cached, the chunks are copied from the memory-mapped cache, otherwise the file is parsed chunk
+    by chunk and only the requested columns are kept
+
+    HOW TO USE
+
+    ::
+
+        for chunk in weather.iter_epw('climate_2020_2050.epw', chunk_size=24 * 31):
+            chunk['drybulb_C']  # array of up to 744 records
+
+    :param weather_path: Path of the EPW file
+    :type weather_path: str
+    :param labels: Columns to read, see EPW_LABELS
+    :type labels: list of str
+    :param chunk_size: Number of records per chunk, the last chunk can be shorter
+    :type chunk_size: int
+    :param cache_directory: Folder of the cache files. Defaults to the folder of the EPW file
+    :type cache_directory: str
+    :return: Generator of chunks, dictionaries of column label and array
+    :rtype: generator
+    """
+    labels = list(labels)
+    cached = read_cache(weather_path, cache_directory)
+
+    if cached is not None:
+        meta, array = cached
+        rows = [meta['labels'].index(label) for label in labels]
+        for start in range(0, array.shape[1], chunk_size):
+            yield dict((label, np.array(array[row, start:start + chunk_size],
+                                        dtype=np.int64 if label in DATE_LABELS else np.float64))
+                       for label, row in zip(labels, rows))
+        return
+
+    # No usecols, some files have fewer than 35 fields per record
+    for data in pd.read_csv(weather_path, skiprows=EPW_HEADER_LINES, header=None, names=EPW_LABELS,
+                            chunksize=chunk_size):
+        yield dict((label, pd.to_numeric(data[label], errors='coerce').values.astype(
+            np.int64 if label in DATE_LABELS else np.float64)) for label in labels)
+
+
+def read_epw(weather_path, cache_directory=None):
+    """
+    Reads an EPW file into a DataFrame with the EPW_LABELS columns, without the datasource text column
+
+    :param weather_path: Path of the EPW file
+    :type weather_path: str
+    :param cache_directory: Folder of the cache files. Defaults to the folder of the EPW file
+    :type cache_directory: str
+    :return: weather_data, one row per record
+    :rtype: pandas.DataFrame
+    """
+    return open_epw(weather_path, cache_directory).to_dataframe()
@@ -0,0 +1,144 @@
+"""
+Many EPW files packed into one memory-mapped array, so that thousands of sites open without parsing and all worker
+processes share the same page-cached copy of the weather
+
+The store is a .npy file of shape (number of sites, number of columns, number of records) with the columns of
+auxiliary.weather, and a .json index with the labels and, for every site ID, its position in the array, number of
+records, latitude, longitude and EPW header. Sites with fewer records are padded with nan.
+
+HOW TO USE
+
+::
+
+    from auxiliary import weather_store
+    weather_store.build_weather_store(epw_paths, 'switzerland')  # Writes switzerland.npy and switzerland.json
+    store = weather_store.WeatherStore('switzerland')
+    weather_data = store.open_site('Zurich-Kloten_2013')  # WeatherData, a view into the store without copies
+    Zurich = Location.from_weather_store(store, 'Zurich-Kloten_2013')
+
+"""
+
+import os
+import json
+import numpy as np
+from auxiliary import weather
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Increase when the layout of the store changes
+STORE_VERSION = 1
+
+
+def build_weather_store(weather_paths, store_path, site_ids=None, cache_directory=None):
+    """
+    Packs EPW files into a weather store
+
+    :param weather_paths: Paths of the EPW files
+    :type weather_paths: list of str
+    :param store_path: Path of the store without extension, store_path.npy and store_path.json are written
+    :type store_path: str
+    :param site_ids: ID of every site. Defaults to the EPW file names without extension
+    :type site_ids: list of str
+    :param cache_directory: Folder of the cache files of the single EPW files, see auxiliary.weather
+    :type cache_directory: str
+    :return: store, the opened store
+    :rtype: WeatherStore
+    """
+    if site_ids is None:
+        site_ids = [os.path.splitext(os.path.basename(weather_path))[0] for weather_path in weather_paths]
+    if len(set(site_ids)) != len(site_ids):
+        raise ValueError('site IDs of a weather store must be unique')
+
+    # First pass: parse (or open the cache of) every file to find the size of the store. Parsed columns are swapped
+    # for the memory map of the cache that load_epw just wrote, and kept in memory only if it could not be written
+    metas = []
+    arrays = []
+    for weather_path in weather_paths:
+        meta, array = weather.load_epw(weather_path, cache_directory)
+        if not isinstance(array, np.memmap):
+            cached = weather.read_cache(weather_path, cache_directory)
+            if cached is not None:
+                array = cached[1]
+        metas.append(meta)
+        arrays.append(array)
+    n_records = [array.shape[1] for array in arrays]
+    labels = metas[0]['labels'] if metas else [label for label in weather.EPW_LABELS
+                                              if label not in weather.TEXT_LABELS]
+
+    # Second pass: copy the columns into the store, one site at a time
+    temporary_suffix = '.%d.tmp' % os.getpid()
+    store = np.lib.format.open_memmap(store_path + '.npy' + temporary_suffix, mode='w+', dtype=np.float64,
+                                      shape=(len(weather_paths), len(labels), max(n_records or [0])))
+    sites = {}
+    for index, (site_id, meta, array) in enumerate(zip(site_ids, metas, arrays)):
+        store[index, :, :array.shape[1]] = array
+        store[index, :, array.shape[1]:] = np.nan
+
+        weather_data = weather.WeatherData(meta, array)
+        sites[site_id] = {'index': index,
+                          'n_records': n_records[index],
+                          'latitude_deg': weather_data.latitude_deg,
+                          'longitude_deg': weather_data.longitude_deg,
+                          'integer_labels': meta['integer_labels'],
+                          'header': meta['header']}
+    store.flush()
+    del store
+
+    with open(store_path + '.json' + temporary_suffix, 'w') as index_file:
+        json.dump({'version': STORE_VERSION, 'labels': labels, 'sites': sites}, index_file)
+    os.replace(store_path + '.npy' + temporary_suffix, store_path + '.npy')
+    os.replace(store_path + '.json' + temporary_suffix, store_path + '.json')
+
+    return WeatherStore(store_path)
+
+
+class WeatherStore(object):
+    """
+    Weather store opened read only as memory map, see build_weather_store
+    """
+
+    def __init__(self, store_path):
+        """
+        :param store_path: Path of the store without extension
+        :type store_path: str
+        """
+        with open(store_path + '.json') as index_file:
+            index = json.load(index_file)
+        if index.get('version') != STORE_VERSION:
+            raise ValueError('weather store %s has an unsupported version, rebuild it' % store_path)
+
+        self.store_path = store_path
+        self.labels = index['labels']
+        self.sites = index['sites']
+        self.array = np.load(store_path + '.npy', mmap_mode='r')
+
+    def __contains__(self, site_id):
+        return site_id in self.sites
+
+    def __len__(self):
+        return len(self.sites)
+
+    def site_ids(self):
+        """:return: IDs of all sites, in the order of the store"""
+        return sorted(self.sites, key=lambda site_id: self.sites[site_id]['index'])
+
+    def open_site(self, site_id):
+        """
+        Weather of one site, with columns that are views into the memory-mapped store
+
+        :param site_id: ID of the site
+        :type site_id: str
+        :rtype: auxiliary.weather.WeatherData
+        """
+        site = self.sites[site_id]
+        meta = {'labels': self.labels, 'integer_labels': site['integer_labels'], 'header': site['header']}
+        return weather.WeatherData(meta, self.array[site['index'], :, :site['n_records']])
@@ -0,0 +1,42 @@
+"""
+Builds the optional compiled kernel of the hourly simulation loop (rc_kernel.pyx). Requires Cython and a C compiler
+
+HOW TO USE
+
+::
+
+    python rc_simulator/build_kernel.py
+
+The kernel is then picked up by simulation.simulate(). Without it, simulate() uses the pure Python Building.
+
+"""
+
+import os
+import sys
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# The extension is built next to the other modules, whatever the working directory
+mainPath = os.path.abspath(os.path.dirname(__file__))
+os.chdir(mainPath)
+
+# Fused multiply-adds would round differently from the pure Python model
+compile_args = [] if sys.platform == 'win32' else ['-O2', '-ffp-contract=off']
+
+setup(
+    name='rc_kernel',
+    ext_modules=cythonize([Extension('rc_kernel', ['rc_kernel.pyx'],
+                                     extra_compile_args=compile_args)]),
+    script_args=sys.argv[1:] or ['build_ext', '--inplace'],
+)
@@ -0,0 +1,390 @@
+"""
+Vectorised version of the 5R1C model that advances many buildings at once
+
+The equations are identical to those in building_physics.py (ISO 13790 Annex C), but every parameter and
+every result is a NumPy array with one entry per building. This replaces N Python level calls of
+Building.solve_building_energy() with a handful of array operations per timestep.
+
+HOW TO USE
+
+::
+
+    from building_physics import Building
+    from building_batch import BuildingBatch
+    batch = BuildingBatch([Building(u_walls=0.2), Building(u_walls=0.5)])  # Any list of Building instances
+    batch.solve_building_energy(internal_gains, solar_gains, t_out, t_m_prev)  # Arrays of length N or scalars
+    batch.solve_building_lighting(illuminance, occupancy)
+
+The results are stored as arrays under the same attribute names as the Building class (t_air, t_m_next,
+heating_demand, cooling_energy, cop, ...), so batch.t_air[i] is equal to the t_air of the i-th building.
+
+Supply and emission systems are dispatched per system class. All buildings that share a class are
+calculated in one call of that class with array inputs, so custom systems must be written with array
+compatible operations.
+
+"""
+
+import numpy as np
+import supply_system
+import emission_system
+from building_physics import ConductanceParameter, TimestepParameter, DerivedCoefficients
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Gabriel Happle, Justin Zarb, Michael Fehr"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+class BuildingBatch(object):
+    '''Holds the parameters of several buildings as arrays and solves them simultaneously'''
+
+    # Parameters of the 5R1C model. Assigning a new array invalidates the derived coefficients, changing
+    # single elements in place does not
+    mass_area = ConductanceParameter('mass_area')
+    A_t = ConductanceParameter('A_t')
+    c_m = ConductanceParameter('c_m')
+    h_tr_em = ConductanceParameter('h_tr_em')
+    h_tr_w = ConductanceParameter('h_tr_w')
+    h_ve_adj = ConductanceParameter('h_ve_adj')
+    h_tr_ms = ConductanceParameter('h_tr_ms')
+    h_tr_is = ConductanceParameter('h_tr_is')
+    timestep = TimestepParameter()
+
+    # Parameters copied from each building. The derived coefficients (h_tr_1, h_tr_2, h_tr_3, ...) are calculated
+    # from these arrays in the same way as in the Building class
+    parameters = ['window_area', 'floor_area', 'mass_area', 'A_t', 'c_m', 'h_tr_em', 'h_tr_w', 'h_ve_adj',
+                  'h_tr_ms', 'h_tr_is', 't_set_heating', 't_set_cooling', 'max_cooling_energy',
+                  'max_heating_energy', 'lighting_load', 'lighting_control', 'lighting_utilisation_factor',
+                  'lighting_maintenance_factor']
+
+    def __init__(self, buildings):
+        """
+        :param buildings: Buildings to be simulated together. Parameter changes made to the buildings after this
+            point are not seen by the batch, set the array attributes of the batch directly instead
+        :type buildings: list of building_physics.Building
+        """
+
+        self.buildings = list(buildings)
+        self.n = len(self.buildings)
+
+        for parameter in self.parameters:
+            setattr(self, parameter, np.array([getattr(building, parameter) for building in self.buildings],
+                                              dtype=float))
+
+        # All buildings of a batch step together
+        timesteps = set(building.timestep for building in self.buildings)
+        if len(timesteps) > 1:
+            raise ValueError('the buildings of a batch must have the same timestep')
+        self.timestep = timesteps.pop() if timesteps else 1.0
+
+        # Building systems, grouped by class so that each class is called once per timestep
+        self.heating_supply_system = [building.heating_supply_system for building in self.buildings]
+        self.cooling_supply_system = [building.cooling_supply_system for building in self.buildings]
+        self.heating_emission_system = [building.heating_emission_system for building in self.buildings]
+        self.cooling_emission_system = [building.cooling_emission_system for building in self.buildings]
+
+        self.heating_supply_groups = self.group_systems(self.heating_supply_system)
+        self.cooling_supply_groups = self.group_systems(self.cooling_supply_system)
+        self.heating_emission_groups = self.group_systems(self.heating_emission_system)
+
+    @staticmethod
+    def group_systems(systems):
+        """
+        Groups the buildings by system class
+
+        :return: list of (system class, index array of the buildings using that class)
+        """
+        classes = []
+        for system in systems:
+            if system not in classes:
+                classes.append(system)
+
+        return [(system, np.array([ii for ii, other in enumerate(systems) if other is system], dtype=int))
+                for system in classes]
+
+    def as_array(self, value):
+        """Broadcasts a scalar or array input to one value per building"""
+        return np.broadcast_to(np.asarray(value, dtype=float), (self.n,))
+
+    @property
+    def coefficients(self):
+        """Coefficients derived from the building parameters, see building_physics.DerivedCoefficients"""
+        if self._coefficients is None:
+            self._coefficients = self._coefficients_by_timestep[self.timestep] = DerivedCoefficients(self)
+        return self._coefficients
+
+    @property
+    def h_tr_1(self):
+        """
+        Definition to simplify calc_phi_m_tot
+        # (C.6) in [C.3 ISO 13790]
+        """
+        return self.coefficients.h_tr_1
+
+    @property
+    def h_tr_2(self):
+        """
+        Definition to simplify calc_phi_m_tot
+        # (C.7) in [C.3 ISO 13790]
+        """
+        return self.coefficients.h_tr_2
+
+    @property
+    def h_tr_3(self):
+        """
+        Definition to simplify calc_phi_m_tot
+        # (C.8) in [C.3 ISO 13790]
+        """
+        return self.coefficients.h_tr_3
+
+    @property
+    def t_opperative(self):
+        """
+        The opperative temperature is a weighted average of the air and mean radiant temperatures.
+        # (C.12) in [C.3 ISO 13790]
+        """
+        return 0.3 * self.t_air + 0.7 * self.t_s
+
+    def solve_building_lighting(self, illuminance, occupancy):
+        """
+        Calculates the lighting demand of all buildings for a set timestep
+
+        :param illuminance: Illuminance transmitted through the window [Lumens]
+        :type illuminance: float or array
+        :param occupancy: Probability of full occupancy
+        :type occupancy: float or array
+
+        :return: self.lighting_demand, Lighting Energy Required for the timestep
+        :rtype: array
+        """
+        illuminance = self.as_array(illuminance)
+        occupancy = self.as_array(occupancy)
+
+        lux = (illuminance * self.lighting_utilisation_factor *
+               self.lighting_maintenance_factor) / self.floor_area  # [Lux]
+
+        self.lighting_demand = np.where((lux < self.lighting_control) & (occupancy > 0),
+                                        self.lighting_load * self.floor_area, 0.0)
+
+    def solve_building_energy(self, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Calculates the heating and cooling consumption of all buildings for a set timestep
+
+        :param internal_gains: internal heat gains from people and appliances [W]
+        :type internal_gains: float or array
+        :param solar_gains: solar heat gains [W]
+        :type solar_gains: float or array
+        :param t_out: Outdoor air temperature [C]
+        :type t_out: float or array
+        :param t_m_prev: Previous thermal mass temperature [C]
+        :type t_m_prev: float or array
+
+        :return: the same results as Building.solve_building_energy(), as arrays with one value per building
+        :rtype: array
+        """
+        internal_gains = self.as_array(internal_gains)
+        solar_gains = self.as_array(solar_gains)
+        t_out = self.as_array(t_out)
+        t_m_prev = self.as_array(t_m_prev)
+
+        # check demand, and change state of self.has_heating_demand, and self.has_cooling_demand
+        self.has_demand(internal_gains, solar_gains, t_out, t_m_prev)
+
+        self.energy_demand = np.zeros(self.n)
+        self.energy_demand_unrestricted = np.zeros(self.n)
+        if np.any(self.has_heating_demand | self.has_cooling_demand):
+            self.calc_energy_demand(internal_gains, solar_gains, t_out, t_m_prev)
+
+        # Final node temperatures. Buildings without a demand are solved with energy_demand = 0, which is the
+        # free floating solution also used by the Building class
+        self.calc_temperatures_crank_nicolson(
+            self.energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
+
+        self.calc_supply_system(t_out)
+
+        self.sys_total_energy = self.heating_sys_electricity + self.heating_sys_fossils + \
+            self.cooling_sys_electricity + self.cooling_sys_fossils
+        self.heating_energy = self.heating_sys_electricity + self.heating_sys_fossils
+        self.cooling_energy = self.cooling_sys_electricity + self.cooling_sys_fossils
+
+    def has_demand(self, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Determines which buildings require heating or cooling
+        # step 1 in section C.4.2 in [C.3 ISO 13790]
+        """
+        self.calc_temperatures_crank_nicolson(0.0, internal_gains, solar_gains, t_out, t_m_prev)
+
+        self.has_heating_demand = self.t_air < self.t_set_heating
+        self.has_cooling_demand = ~self.has_heating_demand & (self.t_air > self.t_set_cooling)
+
+    def calc_temperatures_crank_nicolson(self, energy_demand, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Determines node temperatures of all buildings
+        # section C.3 in [C.3 ISO 13790]
+        """
+        self.calc_heat_flow(t_out, internal_gains, solar_gains, self.as_array(energy_demand))
+        self.calc_phi_m_tot(t_out)
+        self.calc_t_m_next(t_m_prev)
+        self.calc_t_m(t_m_prev)
+        self.calc_t_s(t_out)
+        self.calc_t_air(t_out)
+
+        return self.t_m, self.t_air, self.t_opperative
+
+    def calc_energy_demand(self, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Calculates the energy demand of the buildings with heating/cooling active. The other buildings get an
+        energy demand of 0
+        # Step 1 - Step 4 in Section C.4.2 in [C.3 ISO 13790]
+        """
+        has_demand = self.has_heating_demand | self.has_cooling_demand
+
+        # Step 1: Air temperature with no heating/cooling, as calculated in has_demand()
+        t_air_0 = self.t_air
+
+        # Step 2: Calculate the unrestricted heating/cooling required
+        t_air_set = np.where(self.has_heating_demand, self.t_set_heating, self.t_set_cooling)
+
+        # Set a heating case where the heating load is 10x the floor area (10 W/m2)
+        energy_floorAx10 = 10 * self.floor_area
+
+        t_air_10 = self.calc_temperatures_crank_nicolson(
+            energy_floorAx10, internal_gains, solar_gains, t_out, t_m_prev)[1]
+
+        # (C.13) in [C.3 ISO 13790]
+        energy_demand_unrestricted = energy_floorAx10 * \
+            (t_air_set - t_air_0) / (t_air_10 - t_air_0)
+
+        # Step 3 and 4: Cap the demand to the available heating or cooling power
+        energy_demand = np.select(
+            [(self.max_cooling_energy <= energy_demand_unrestricted) &
+             (energy_demand_unrestricted <= self.max_heating_energy),
+             energy_demand_unrestricted > self.max_heating_energy,
+             energy_demand_unrestricted < self.max_cooling_energy],
+            [energy_demand_unrestricted, self.max_heating_energy, self.max_cooling_energy], np.nan)
+
+        if np.any(np.isnan(energy_demand[has_demand])):
+            raise ValueError('unknown radiative heating/cooling system status')
+
+        self.energy_demand_unrestricted = np.where(has_demand, energy_demand_unrestricted, 0.0)
+        self.energy_demand = np.where(has_demand, energy_demand, 0.0)
+
+    def calc_heat_flow(self, t_out, internal_gains, solar_gains, energy_demand):
+        """
+        Calculates the heat flow from the solar gains, heating/cooling system, and internal gains into the buildings
+        #C.1 - C.3 in [C.3 ISO 13790]
+        """
+        self.phi_ia = 0.5 * internal_gains
+        self.phi_st = self.coefficients.phi_st_factor * (0.5 * internal_gains + solar_gains)
+        self.phi_m = self.coefficients.phi_m_factor * \
+            (0.5 * internal_gains + solar_gains)
+
+        self.heating_supply_temperature = np.empty(self.n)
+        self.cooling_supply_temperature = np.empty(self.n)
+
+        # As in the Building class, the heating emission system distributes both heating and cooling energy
+        for system, index in self.heating_emission_groups:
+            emDirector = emission_system.EmissionDirector()
+            emDirector.set_builder(system(energy_demand=energy_demand[index]))
+            flows = emDirector.calc_flows()
+
+            self.phi_ia[index] += flows.phi_ia_plus
+            self.phi_st[index] += flows.phi_st_plus
+            self.phi_m[index] += flows.phi_m_plus
+
+            self.heating_supply_temperature[index] = flows.heating_supply_temperature
+            self.cooling_supply_temperature[index] = flows.cooling_supply_temperature
+
+    def calc_supply_system(self, t_out):
+        """
+        Calculates the heating/cooling input energy required by the supply systems of all buildings
+        """
+        self.heating_demand = np.where(self.has_heating_demand, self.energy_demand, 0.0)
+        self.cooling_demand = np.where(self.has_cooling_demand, self.energy_demand, 0.0)
+
+        self.heating_sys_electricity = np.zeros(self.n)
+        self.heating_sys_fossils = np.zeros(self.n)
+        self.cooling_sys_electricity = np.zeros(self.n)
+        self.cooling_sys_fossils = np.zeros(self.n)
+        self.electricity_out = np.zeros(self.n)
+        # Set COP to nan if no heating or cooling is required
+        self.cop = np.full(self.n, np.nan)
+
+        for groups, demand, sign, electricity, fossils, has_heating_demand in [
+                (self.heating_supply_groups, self.has_heating_demand, 1,
+                 self.heating_sys_electricity, self.heating_sys_fossils, True),
+                (self.cooling_supply_groups, self.has_cooling_demand, -1,
+                 self.cooling_sys_electricity, self.cooling_sys_fossils, False)]:
+
+            for system, index in groups:
+                index = index[demand[index]]
+                if len(index) == 0:
+                    continue
+
+                supply_director = supply_system.SupplyDirector()
+                supply_director.set_builder(system(load=self.energy_demand[index] * sign,
+                                                   t_out=t_out[index],
+                                                   heating_supply_temperature=self.heating_supply_temperature[index],
+                                                   cooling_supply_temperature=self.cooling_supply_temperature[index],
+                                                   has_heating_demand=has_heating_demand,
+                                                   has_cooling_demand=not has_heating_demand))
+                supplyOut = supply_director.calc_system()
+
+                electricity[index] = supplyOut.electricity_in
+                fossils[index] = supplyOut.fossils_in
+                self.electricity_out[index] = supplyOut.electricity_out
+                self.cop[index] = supplyOut.cop
+
+    def calc_t_m_next(self, t_m_prev):
+        """
+        Primary Equation, calculates the temperature of the next time step
+        # (C.4) in [C.3 ISO 13790]
+        """
+        c = self.coefficients
+        self.t_m_next = ((t_m_prev * c.t_m_prev_factor) + self.phi_m_tot) / c.t_m_next_denominator
+
+    def calc_phi_m_tot(self, t_out):
+        """
+        Calculates a global heat transfer
+        # (C.5) in [C.3 ISO 13790]
+        """
+        t_supply = t_out  # ASSUMPTION: Supply air comes straight from the outside air
+
+        c = self.coefficients
+        self.phi_m_tot = self.phi_m + c.h_tr_em * t_out + \
+            c.h_tr_3 * (self.phi_st + c.h_tr_w * t_out + c.h_tr_1 *
+                        ((self.phi_ia / c.h_ve_adj) + t_supply)) / c.h_tr_2
+
+    def calc_t_m(self, t_m_prev):
+        """
+        Temperature used for the calculations, average between newly calculated and previous bulk temperature
+        # (C.9) in [C.3 ISO 13790]
+        """
+        self.t_m = (self.t_m_next + t_m_prev) / 2.0
+
+    def calc_t_s(self, t_out):
+        """
+        Calculate the temperature of the inside room surfaces
+        # (C.10) in [C.3 ISO 13790]
+        """
+        t_supply = t_out  # ASSUMPTION: Supply air comes straight from the outside air
+
+        c = self.coefficients
+        self.t_s = (c.h_tr_ms * self.t_m + self.phi_st + c.h_tr_w * t_out + c.h_tr_1 *
+                    (t_supply + self.phi_ia / c.h_ve_adj)) / c.t_s_denominator
+
+    def calc_t_air(self, t_out):
+        """
+        Calculate the temperature of the air node
+        # (C.11) in [C.3 ISO 13790]
+        """
+        t_supply = t_out
+
+        c = self.coefficients
+        self.t_air = (c.h_tr_is * self.t_s + c.h_ve_adj *
+                      t_supply + self.phi_ia) / c.t_air_denominator
@@ -76,6 +76,10 @@ INPUT PARAMETER DEFINITION
         HeatPumpCooler calculates a COP based on the outdoor and system supply temperature 
     heating_emission_system: How the heat is distributed to the building
     cooling_emission_system: How the cooling energy is distributed to the building
+    solver: How the heating/cooling demand is found. 'standard' follows the steps of ISO 13790 C.4.2, solving the 
+        node temperatures with 0 W and 10 W/m2 and interpolating. 'linear' solves the free floating temperatures once
+        and uses the linearity of the model in energy_demand to derive the demand and node temperatures directly
+    timestep: Length of the timestep [h], e.g. 0.25 for 15 minutes. The demands stay average powers [W]
 
 """
 
@@ -93,10 +97,122 @@ __email__ = "p.jayathissa@gmail.com"
 __status__ = "production"
 
 
+class ConductanceParameter(object):
+    """
+    Building parameter that the derived coefficients depend on (c_m, the conductances and the areas).
+    Assigning a new value, e.g. Greenhouse.h_ve_adj = h_ve_adj_default * 10, clears the cached coefficients
+    so that they are recalculated the next time they are used
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, building, owner):
+        if building is None:
+            return self
+        return building.__dict__[self.name]
+
+    def __set__(self, building, value):
+        building.__dict__[self.name] = value
+        building.__dict__['_coefficients'] = None
+        building.__dict__['_coefficients_by_timestep'] = {}
+
+
+class TimestepParameter(object):
+    """
+    Length of the timestep of the building in hours. The derived coefficients of every timestep that has been used
+    are kept, so that switching between timesteps, e.g. in a run with variable timesteps, does not recalculate them
+    """
+
+    def __get__(self, building, owner):
+        if building is None:
+            return self
+        return building.__dict__['timestep']
+
+    def __set__(self, building, value):
+        building.__dict__['timestep'] = value
+        building.__dict__['_coefficients'] = building.__dict__.setdefault('_coefficients_by_timestep', {}).get(value)
+
+
+class SystemParameter(object):
+    """
+    Supply or emission system class of the Building. The static data of the class is resolved once when it is
+    assigned (see supply_system.precompile and emission_system.precompile), so that solving a timestep does not
+    have to create any director or system instances
+    """
+
+    def __init__(self, name, precompile):
+        self.name = name
+        self.precompile = precompile
+
+    def __get__(self, building, owner):
+        if building is None:
+            return self
+        return building.__dict__[self.name]
+
+    def __set__(self, building, value):
+        building.__dict__[self.name] = value
+        building.__dict__[self.name + '_precompiled'] = self.precompile(value)
+
+
+class DerivedCoefficients(object):
+    """
+    All coefficients of the Crank-Nicolson equations that only depend on the building parameters.
+    They are calculated once and reused for every node temperature calculation until a parameter changes
+    """
+
+    def __init__(self, building):
+
+        # Length of the timestep [h]
+        self.timestep = building.timestep
+
+        # Copies of the conductances, so that the node temperature calculations don't have to go through the
+        # ConductanceParameter descriptors
+        self.h_tr_em = building.h_tr_em
+        self.h_tr_w = building.h_tr_w
+        self.h_ve_adj = building.h_ve_adj
+        self.h_tr_ms = building.h_tr_ms
+        self.h_tr_is = building.h_tr_is
+
+        # (C.6), (C.7) and (C.8) in [C.3 ISO 13790]
+        self.h_tr_1 = 1.0 / (1.0 / building.h_ve_adj + 1.0 / building.h_tr_is)
+        self.h_tr_2 = self.h_tr_1 + building.h_tr_w
+        self.h_tr_3 = 1.0 / (1.0 / self.h_tr_2 + 1.0 / building.h_tr_ms)
+
+        # Share of the internal and solar gains to the surface and mass node (C.2), (C.3)
+        self.phi_st_factor = 1 - (building.mass_area / building.A_t) - (building.h_tr_w / (9.1 * building.A_t))
+        self.phi_m_factor = building.mass_area / building.A_t
+
+        # Factor of t_m_prev and denominator of (C.4), with the heat capacity per second of the timestep
+        c_m_per_timestep = building.c_m / (3600.0 * building.timestep)
+        self.t_m_prev_factor = c_m_per_timestep - 0.5 * (self.h_tr_3 + building.h_tr_em)
+        self.t_m_next_denominator = c_m_per_timestep + 0.5 * (self.h_tr_3 + building.h_tr_em)
+
+        # Denominators of (C.10) and (C.11)
+        self.t_s_denominator = building.h_tr_ms + building.h_tr_w + self.h_tr_1
+        self.t_air_denominator = building.h_tr_is + building.h_ve_adj
+
 
 class Building(object):
     '''Sets the parameters of the building. '''
 
+    # Parameters of the 5R1C model. Changing one of them invalidates the derived coefficients
+    mass_area = ConductanceParameter('mass_area')
+    A_t = ConductanceParameter('A_t')
+    c_m = ConductanceParameter('c_m')
+    h_tr_em = ConductanceParameter('h_tr_em')
+    h_tr_w = ConductanceParameter('h_tr_w')
+    h_ve_adj = ConductanceParameter('h_ve_adj')
+    h_tr_ms = ConductanceParameter('h_tr_ms')
+    h_tr_is = ConductanceParameter('h_tr_is')
+    timestep = TimestepParameter()
+
+    # Building systems, with their static data resolved on assignment
+    heating_supply_system = SystemParameter('heating_supply_system', supply_system.precompile)
+    cooling_supply_system = SystemParameter('cooling_supply_system', supply_system.precompile)
+    heating_emission_system = SystemParameter('heating_emission_system', emission_system.precompile)
+    cooling_emission_system = SystemParameter('cooling_emission_system', emission_system.precompile)
+
     def __init__(self,
                  window_area=4.0,
                  external_envelope_area=15.0,
@@ -121,6 +237,8 @@ class Building(object):
                  cooling_supply_system=supply_system.HeatPumpAir,
                  heating_emission_system=emission_system.NewRadiators,
                  cooling_emission_system=emission_system.AirConditioning,
+                 solver='standard',
+                 timestep=1.0,
                  ):
 
         # Building Dimensions
@@ -189,13 +307,31 @@ class Building(object):
         self.heating_emission_system = heating_emission_system
         self.cooling_emission_system = cooling_emission_system
 
+        # Method used to determine the heating/cooling demand
+        if solver not in ('standard', 'linear'):
+            raise ValueError('unknown solver %s, choose standard or linear' % solver)
+        self.solver = solver
+
+        # Length of the timestep [h], e.g. 0.25 for 15 minutes
+        self.timestep = timestep
+
+    @property
+    def coefficients(self):
+        """
+        Coefficients derived from the building parameters, see DerivedCoefficients
+        Recalculated after any of the ConductanceParameters has been reassigned
+        """
+        if self._coefficients is None:
+            self._coefficients = self._coefficients_by_timestep[self.timestep] = DerivedCoefficients(self)
+        return self._coefficients
+
     @property
     def h_tr_1(self):
         """
         Definition to simplify calc_phi_m_tot
         # (C.6) in [C.3 ISO 13790]
         """
-        return 1.0 / (1.0 / self.h_ve_adj + 1.0 / self.h_tr_is)
+        return self.coefficients.h_tr_1
 
     @property
     def h_tr_2(self):
@@ -203,7 +339,7 @@ class Building(object):
         Definition to simplify calc_phi_m_tot
         # (C.7) in [C.3 ISO 13790]
         """
-        return self.h_tr_1 + self.h_tr_w
+        return self.coefficients.h_tr_2
 
     @property
     def h_tr_3(self):
@@ -211,7 +347,7 @@ class Building(object):
         Definition to simplify calc_phi_m_tot
         # (C.8) in [C.3 ISO 13790]
         """
-        return  1.0 / (1.0 / self.h_tr_2 + 1.0 / self.h_tr_ms)
+        return self.coefficients.h_tr_3
 
     @property
     def t_opperative(self):
@@ -275,8 +411,12 @@ class Building(object):
         """
         # Main File
 
-        # check demand, and change state of self.has_heating_demand, and self._has_cooling_demand
-        self.has_demand(internal_gains, solar_gains, t_out, t_m_prev)
+        if self.solver == 'linear':
+            # check demand, and if required determine energy_demand and the node temperatures in the same pass
+            self.calc_energy_demand_linear(internal_gains, solar_gains, t_out, t_m_prev)
+        else:
+            # check demand, and change state of self.has_heating_demand, and self._has_cooling_demand
+            self.has_demand(internal_gains, solar_gains, t_out, t_m_prev)
 
         if not self.has_heating_demand and not self.has_cooling_demand:
 
@@ -309,59 +449,83 @@ class Building(object):
 
             # has heating/cooling demand
 
-            # Calculates energy_demand used below
-            self.calc_energy_demand(
-                internal_gains, solar_gains, t_out, t_m_prev)
+            if self.solver == 'standard':
+                # Calculates energy_demand used below
+                self.calc_energy_demand(
+                    internal_gains, solar_gains, t_out, t_m_prev)
 
-            self.calc_temperatures_crank_nicolson(
-                self.energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
-            # calculates the actual t_m resulting from the actual heating
-            # demand (energy_demand)
+                self.calc_temperatures_crank_nicolson(
+                    self.energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
+                # calculates the actual t_m resulting from the actual heating
+                # demand (energy_demand)
 
             # Calculate the Heating/Cooling Input Energy Required
 
-            supply_director = supply_system.SupplyDirector()  # Initialise Heating System Manager
+            electricity_in, fossils_in, electricity_out, self.cop = self.calc_supply_system(t_out)
 
             if self.has_heating_demand:
-                supply_director.set_builder(self.heating_supply_system(load=self.energy_demand, 
-                                                                t_out=t_out, 
-                                                                heating_supply_temperature=self.heating_supply_temperature,
-                                                                cooling_supply_temperature=self.cooling_supply_temperature, 
-                                                                has_heating_demand=self.has_heating_demand, 
-                                                                has_cooling_demand=self.has_cooling_demand))
-                supplyOut = supply_director.calc_system()
                 # All Variables explained underneath line 467
                 self.heating_demand = self.energy_demand
-                self.heating_sys_electricity = supplyOut.electricity_in
-                self.heating_sys_fossils = supplyOut.fossils_in
+                self.heating_sys_electricity = electricity_in
+                self.heating_sys_fossils = fossils_in
                 self.cooling_demand = 0
                 self.cooling_sys_electricity = 0
                 self.cooling_sys_fossils = 0
-                self.electricity_out = supplyOut.electricity_out
+                self.electricity_out = electricity_out
 
             elif self.has_cooling_demand:
-                supply_director.set_builder(self.cooling_supply_system(load=self.energy_demand * (-1), 
-                                                                t_out=t_out, 
-                                                                heating_supply_temperature=self.heating_supply_temperature,
-                                                                cooling_supply_temperature=self.cooling_supply_temperature, 
-                                                                has_heating_demand=self.has_heating_demand, 
-                                                                has_cooling_demand=self.has_cooling_demand))
-                supplyOut = supply_director.calc_system()
                 self.heating_demand = 0
                 self.heating_sys_electricity = 0
                 self.heating_sys_fossils = 0
                 self.cooling_demand = self.energy_demand
-                self.cooling_sys_electricity = supplyOut.electricity_in
-                self.cooling_sys_fossils = supplyOut.fossils_in
-                self.electricity_out = supplyOut.electricity_out
-
-            self.cop = supplyOut.cop
+                self.cooling_sys_electricity = electricity_in
+                self.cooling_sys_fossils = fossils_in
+                self.electricity_out = electricity_out
 
         self.sys_total_energy = self.heating_sys_electricity + self.heating_sys_fossils + \
             self.cooling_sys_electricity + self.cooling_sys_fossils
         self.heating_energy = self.heating_sys_electricity + self.heating_sys_fossils
         self.cooling_energy = self.cooling_sys_electricity + self.cooling_sys_fossils
 
+    def calc_supply_system(self, t_out):
+        """
+        Calculates the Heating/Cooling Input Energy Required by the supply system
+        Used in: solve_building_energy()
+
+        Systems with static data are calculated directly from the data resolved at construction, systems that
+        override calc_loads() are called through the SupplyDirector
+
+        :return: electricity_in, fossils_in, electricity_out, cop
+        :rtype: tuple
+        """
+        if self.has_heating_demand:
+            system = self.heating_supply_system
+            precompiled = self.heating_supply_system_precompiled
+            load = self.energy_demand
+        else:
+            system = self.cooling_supply_system
+            precompiled = self.cooling_supply_system_precompiled
+            load = self.energy_demand * (-1)
+
+        if precompiled is not None:
+            electricity_in, fossils_in, electricity_out, cop = supply_system.calc_precompiled_loads(
+                precompiled, load, t_out, self.heating_supply_temperature, self.cooling_supply_temperature,
+                self.has_heating_demand, self.has_cooling_demand)
+            if cop is None:
+                cop = float('nan')
+            return electricity_in, fossils_in, electricity_out, cop
+
+        supply_director = supply_system.SupplyDirector()  # Initialise Heating System Manager
+        supply_director.set_builder(system(load=load,
+                                           t_out=t_out,
+                                           heating_supply_temperature=self.heating_supply_temperature,
+                                           cooling_supply_temperature=self.cooling_supply_temperature,
+                                           has_heating_demand=self.has_heating_demand,
+                                           has_cooling_demand=self.has_cooling_demand))
+        supplyOut = supply_director.calc_system()
+
+        return supplyOut.electricity_in, supplyOut.fossils_in, supplyOut.electricity_out, supplyOut.cop
+
     # TODO: rename. this is expected to return a boolean. instead, it changes state??? you don't want to change state...
     # why not just return has_heating_demand and has_cooling_demand?? then call the function "check_demand"
     # has_heating_demand, has_cooling_demand = self.check_demand(...)
@@ -456,6 +620,19 @@ class Building(object):
         self.calc_energy_demand_unrestricted(
             energy_floorAx10, t_air_set, t_air_0, t_air_10)
 
+        self.calc_energy_demand_restricted(t_air_set)
+
+        # calculate system temperatures for Step 3/Step 4
+        self.calc_temperatures_crank_nicolson(
+            self.energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
+
+    def calc_energy_demand_restricted(self, t_air_set):
+        """
+        Limits the unrestricted energy demand to the available heating or cooling power
+        Used in: calc_energy_demand(), calc_energy_demand_linear()
+        # Step 3 - Step 4 in Section C.4.2 in [C.3 ISO 13790]
+        """
+
         # Step 3: Check if available heating or cooling power is sufficient
         if self.max_cooling_energy <= self.energy_demand_unrestricted <= self.max_heating_energy:
 
@@ -478,9 +655,62 @@ class Building(object):
             self.energy_demand = 0
             raise ValueError('unknown radiative heating/cooling system status')
 
-        # calculate system temperatures for Step 3/Step 4
-        self.calc_temperatures_crank_nicolson(
-            self.energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
+    def calc_energy_demand_linear(self, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Single pass alternative to has_demand() and calc_energy_demand()
+        Used in: solve_building_energy() if solver is 'linear'
+
+        All node temperatures are affine functions of energy_demand, t = t_0 + energy_demand * dt/d(energy_demand).
+        The free floating temperatures t_0 are calculated once, the sensitivities follow from the same equations
+        with all other inputs set to zero. The demand that reaches the set point is then calculated directly
+        instead of interpolating between a 0 W and a 10 W/m2 solution (C.13), which gives the same result.
+        """
+
+        # Free floating temperatures. Also sets has_heating_demand and has_cooling_demand
+        self.has_demand(internal_gains, solar_gains, t_out, t_m_prev)
+
+        if self.has_heating_demand:
+            t_air_set = self.t_set_heating
+        elif self.has_cooling_demand:
+            t_air_set = self.t_set_cooling
+        else:
+            self.energy_demand = 0
+            return
+
+        # Split of one watt of heating/cooling over the air, surface and mass node
+        precompiled = self.heating_emission_system_precompiled
+        if precompiled is not None:
+            phi_ia_plus, phi_st_plus, phi_m_plus = precompiled[:3]
+        else:
+            emDirector = emission_system.EmissionDirector()
+            emDirector.set_builder(self.heating_emission_system(energy_demand=1.0))
+            flows = emDirector.calc_flows()
+            phi_ia_plus, phi_st_plus, phi_m_plus = flows.phi_ia_plus, flows.phi_st_plus, flows.phi_m_plus
+
+        # Sensitivity of each node temperature to one watt of heating/cooling
+        # (C.5), (C.4), (C.9), (C.10) and (C.11) with t_out = 0, t_m_prev = 0 and no internal or solar gains
+        c = self.coefficients
+        d_phi_m_tot = phi_m_plus + c.h_tr_3 * (phi_st_plus + c.h_tr_1 *
+                                                     (phi_ia_plus / c.h_ve_adj)) / c.h_tr_2
+        d_t_m_next = d_phi_m_tot / c.t_m_next_denominator
+        d_t_m = d_t_m_next / 2.0
+        d_t_s = (c.h_tr_ms * d_t_m + phi_st_plus + c.h_tr_1 * phi_ia_plus / c.h_ve_adj) / \
+            c.t_s_denominator
+        d_t_air = (c.h_tr_is * d_t_s + phi_ia_plus) / c.t_air_denominator
+
+        # (C.13) with the exact slope instead of the 10 W/m2 probe
+        self.energy_demand_unrestricted = (t_air_set - self.t_air) / d_t_air
+        self.calc_energy_demand_restricted(t_air_set)
+
+        # Move the free floating solution to the solution with the final energy demand
+        self.phi_ia += self.energy_demand * phi_ia_plus
+        self.phi_st += self.energy_demand * phi_st_plus
+        self.phi_m += self.energy_demand * phi_m_plus
+        self.phi_m_tot += self.energy_demand * d_phi_m_tot
+        self.t_m_next += self.energy_demand * d_t_m_next
+        self.t_m += self.energy_demand * d_t_m
+        self.t_s += self.energy_demand * d_t_s
+        self.t_air += self.energy_demand * d_t_air
 
     def calc_energy_demand_unrestricted(self, energy_floorAx10, t_air_set, t_air_0, t_air_10):
         """
@@ -516,12 +746,22 @@ class Building(object):
         # Heat flow to the air node
         self.phi_ia = 0.5 * internal_gains
         # Heat flow to the surface node
-        self.phi_st = (1 - (self.mass_area / self.A_t) - (self.h_tr_w /
-                            (9.1 * self.A_t))) * (0.5 * internal_gains + solar_gains)
+        self.phi_st = self.coefficients.phi_st_factor * (0.5 * internal_gains + solar_gains)
         # Heatflow to the thermal mass node
-        self.phi_m = (self.mass_area / self.A_t) * \
+        self.phi_m = self.coefficients.phi_m_factor * \
             (0.5 * internal_gains + solar_gains)
 
+        precompiled = self.heating_emission_system_precompiled
+        if precompiled is not None:
+            # Node split and supply temperatures of the emission system, resolved at construction
+            (phi_ia_share, phi_st_share, phi_m_share,
+             self.heating_supply_temperature, self.cooling_supply_temperature) = precompiled
+
+            self.phi_ia += phi_ia_share * energy_demand
+            self.phi_st += phi_st_share * energy_demand
+            self.phi_m += phi_m_share * energy_demand
+            return
+
         # We call the EmissionDirector to modify these flows depending on the
         # system and the energy demand
         emDirector = emission_system.EmissionDirector()
@@ -548,8 +788,8 @@ class Building(object):
         # (C.4) in [C.3 ISO 13790]
         """
 
-        self.t_m_next = ((t_m_prev * ((self.c_m / 3600.0) - 0.5 * (self.h_tr_3 + self.h_tr_em))) +
-                         self.phi_m_tot) / ((self.c_m / 3600.0) + 0.5 * (self.h_tr_3 + self.h_tr_em))
+        c = self.coefficients
+        self.t_m_next = ((t_m_prev * c.t_m_prev_factor) + self.phi_m_tot) / c.t_m_next_denominator
 
     def calc_phi_m_tot(self, t_out):
         """
@@ -561,9 +801,10 @@ class Building(object):
 
         t_supply = t_out  # ASSUMPTION: Supply air comes straight from the outside air
 
-        self.phi_m_tot = self.phi_m + self.h_tr_em * t_out + \
-            self.h_tr_3 * (self.phi_st + self.h_tr_w * t_out + self.h_tr_1 *
-                           ((self.phi_ia / self.h_ve_adj) + t_supply)) / self.h_tr_2
+        c = self.coefficients
+        self.phi_m_tot = self.phi_m + c.h_tr_em * t_out + \
+            c.h_tr_3 * (self.phi_st + c.h_tr_w * t_out + c.h_tr_1 *
+                        ((self.phi_ia / c.h_ve_adj) + t_supply)) / c.h_tr_2
 
     def calc_t_m(self, t_m_prev):
         """
@@ -581,9 +822,9 @@ class Building(object):
 
         t_supply = t_out  # ASSUMPTION: Supply air comes straight from the outside air
 
-        self.t_s = (self.h_tr_ms * self.t_m + self.phi_st + self.h_tr_w * t_out + self.h_tr_1 * \
-            (t_supply + self.phi_ia / self.h_ve_adj)) / \
-            (self.h_tr_ms + self.h_tr_w + self.h_tr_1)
+        c = self.coefficients
+        self.t_s = (c.h_tr_ms * self.t_m + self.phi_st + c.h_tr_w * t_out + c.h_tr_1 * \
+            (t_supply + self.phi_ia / c.h_ve_adj)) / c.t_s_denominator
 
     def calc_t_air(self, t_out):
         """
@@ -595,5 +836,6 @@ class Building(object):
         t_supply = t_out
 
         # Calculate the temperature of the inside air
-        self.t_air = (self.h_tr_is * self.t_s + self.h_ve_adj *
-                      t_supply + self.phi_ia) / (self.h_tr_is + self.h_ve_adj)
\ No newline at end of file
+        c = self.coefficients
+        self.t_air = (c.h_tr_is * self.t_s + c.h_ve_adj *
+                      t_supply + self.phi_ia) / c.t_air_denominator
\ No newline at end of file
@@ -53,18 +53,43 @@ class EmissionSystemBase:
 
     """ 
     The base class in which systems are built from
+
+    A system is described by static class data: the share of the heating/cooling energy emitted to the air (ia), 
+    surface (st) and thermal mass (m) node, and its supply and return temperatures. Building reads this data once 
+    (see precompile) and does not create any instances. Systems that need more than that can still override 
+    heat_flows(), they are then called through the EmissionDirector
     """
 
+    phi_ia_share = 0
+    phi_st_share = 0
+    phi_m_share = 0
+
+    heating_supply_temperature = float("nan")
+    heating_return_temperature = float("nan")
+    cooling_supply_temperature = float("nan")
+    cooling_return_temperature = float("nan")
+
     def __init__(self, energy_demand):
 
         self.energy_demand = energy_demand
 
 
-    def heat_flows(self): pass
-    """
-    determines the node where the heating/cooling system is active based on the system used
-    Also determines the return and supply temperatures for the heating/cooling system
-    """
+    def heat_flows(self):
+        """
+        determines the node where the heating/cooling system is active based on the system used
+        Also determines the return and supply temperatures for the heating/cooling system
+        """
+        flows = Flows()
+        flows.phi_ia_plus = self.phi_ia_share * self.energy_demand
+        flows.phi_st_plus = self.phi_st_share * self.energy_demand
+        flows.phi_m_plus = self.phi_m_share * self.energy_demand
+
+        flows.heating_supply_temperature = self.heating_supply_temperature
+        flows.heating_return_temperature = self.heating_return_temperature
+        flows.cooling_supply_temperature = self.cooling_supply_temperature
+        flows.cooling_return_temperature = self.cooling_return_temperature
+
+        return flows
 
 
 class OldRadiators(EmissionSystemBase):
@@ -73,18 +98,12 @@ class OldRadiators(EmissionSystemBase):
     Heat is emitted to the air node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = self.energy_demand
-        flows.phi_st_plus = 0
-        flows.phi_m_plus = 0
+    phi_ia_share = 1
 
-        flows.heating_supply_temperature = 65
-        flows.heating_return_temperature = 45
-        flows.cooling_supply_temperature = 12
-        flows.cooling_return_temperature = 21
-
-        return flows
+    heating_supply_temperature = 65
+    heating_return_temperature = 45
+    cooling_supply_temperature = 12
+    cooling_return_temperature = 21
 
 
 class NewRadiators(EmissionSystemBase):
@@ -93,18 +112,13 @@ class NewRadiators(EmissionSystemBase):
     Heat is emitted to the air node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = self.energy_demand
-        flows.phi_st_plus = 0
-        flows.phi_m_plus = 0
+    phi_ia_share = 1
 
-        flows.heating_supply_temperature = 50
-        flows.heating_return_temperature = 35
-        flows.cooling_supply_temperature = 12
-        flows.cooling_return_temperature = 21
+    heating_supply_temperature = 50
+    heating_return_temperature = 35
+    cooling_supply_temperature = 12
+    cooling_return_temperature = 21
 
-        return flows
 
 class ChilledBeams(EmissionSystemBase):
     """
@@ -112,18 +126,12 @@ class ChilledBeams(EmissionSystemBase):
     Heat is emitted to the air node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = self.energy_demand
-        flows.phi_st_plus = 0
-        flows.phi_m_plus = 0
+    phi_ia_share = 1
 
-        flows.heating_supply_temperature = 50
-        flows.heating_return_temperature = 35
-        flows.cooling_supply_temperature = 18
-        flows.cooling_return_temperature = 21
-
-        return flows
+    heating_supply_temperature = 50
+    heating_return_temperature = 35
+    cooling_supply_temperature = 18
+    cooling_return_temperature = 21
 
 
 class AirConditioning(EmissionSystemBase):
@@ -133,18 +141,13 @@ class AirConditioning(EmissionSystemBase):
     Heat is emitted to the air node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = self.energy_demand
-        flows.phi_st_plus = 0
-        flows.phi_m_plus = 0
+    phi_ia_share = 1
 
-        flows.heating_supply_temperature = 40
-        flows.heating_return_temperature = 20
-        flows.cooling_supply_temperature = 6
-        flows.cooling_return_temperature = 15
+    heating_supply_temperature = 40
+    heating_return_temperature = 20
+    cooling_supply_temperature = 6
+    cooling_return_temperature = 15
 
-        return flows
 
 class FloorHeating(EmissionSystemBase):
     """
@@ -152,18 +155,13 @@ class FloorHeating(EmissionSystemBase):
     Heat is emitted to the surface node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = 0
-        flows.phi_st_plus = self.energy_demand
-        flows.phi_m_plus = 0
+    phi_st_share = 1
 
-        flows.heating_supply_temperature = 40
-        flows.heating_return_temperature = 5
-        flows.cooling_supply_temperature = 12
-        flows.cooling_return_temperature = 21
+    heating_supply_temperature = 40
+    heating_return_temperature = 5
+    cooling_supply_temperature = 12
+    cooling_return_temperature = 21
 
-        return flows
 
 class TABS(EmissionSystemBase):
     """
@@ -171,18 +169,28 @@ class TABS(EmissionSystemBase):
     Heat is emitted to the thermal mass node
     """
 
-    def heat_flows(self):
-        flows = Flows()
-        flows.phi_ia_plus = 0
-        flows.phi_st_plus = 0
-        flows.phi_m_plus = self.energy_demand
+    phi_m_share = 1
 
-        flows.heating_supply_temperature = 50
-        flows.heating_return_temperature = 35
-        flows.cooling_supply_temperature = 12
-        flows.cooling_return_temperature = 21
+    heating_supply_temperature = 50
+    heating_return_temperature = 35
+    cooling_supply_temperature = 12
+    cooling_return_temperature = 21
 
-        return flows
+
+def precompile(system):
+    """
+    Resolves the static data of an emission system class, used by Building at construction
+
+    :param system: Emission system class
+    :return: (phi_ia_share, phi_st_share, phi_m_share, heating_supply_temperature, cooling_supply_temperature),
+        or None if the class overrides heat_flows() and has to be called through the EmissionDirector
+    :rtype: tuple
+    """
+    if getattr(system, 'heat_flows', None) is not EmissionSystemBase.heat_flows:
+        return None
+
+    return (system.phi_ia_share, system.phi_st_share, system.phi_m_share,
+            system.heating_supply_temperature, system.cooling_supply_temperature)
 
 
 class Flows:
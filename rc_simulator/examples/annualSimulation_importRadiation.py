@@ -24,23 +24,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 from building_physics import Building  # Importing Building Class
-from auxiliary import epwreader
-from auxiliary import sunPositionReader
+from simulation import simulate
+from radiation import Location
+import schedules
+from state_space import calc_periodic_t_m_prev
 
 matplotlib.style.use('ggplot')
 
 
-ElectricityOut = []
-HeatingDemand = []  # Energy required by the zone
-HeatingEnergy = []  # Energy required by the supply system to provide HeatingDemand
-CoolingDemand = []  # Energy surplus of the zone
-CoolingEnergy = []  # Energy required by the supply system to get rid of CoolingDemand
-IndoorAir = []
-OutsideTemp = []
-SolarGains = []
-COP = []
-
-
 gain_per_person = 100  # W per person
 appliance_gains = 14  # W per sqm
 max_occupancy = 3.0
@@ -50,79 +41,53 @@ max_occupancy = 3.0
 Office = Building()
 
 # Read Weather Data
-weatherData = epwreader.epwreader(os.path.join(
+Zurich = Location(epwfile_path=os.path.join(
     mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+weatherData = Zurich.weather_data
 
+# Sun position (Azimuth and Altitude Angles) for every hour of the weather file, shared with other buildings at
+# the same site
+altitude, azimuth = Zurich.calc_weather_sun_path(latitude_deg=47.480, longitude_deg=8.536)
 
-# Read Sunposition and Extract Azimuth and Alitutude Angles
-sunPosition = pd.read_csv(os.path.join(
-    mainPath, 'auxiliary', 'SunPosition.csv'), skiprows=1)
-
-altitude = sunPosition.loc[0]
-azimuth = 180 - sunPosition.loc[1]
-
-
-# Read Occupancy Profile
-occupancyProfile = pd.read_csv(os.path.join(
-    mainPath, 'auxiliary', 'schedules_el_OFFICE.csv'))
-
-t_m_prev = 20
-
-for hour in range(8760):
-    # Occupancy for the time step
-    occupancy = occupancyProfile.loc[hour, 'People'] * max_occupancy
-    # Gains from occupancy and appliances
-    internal_gains = occupancy * gain_per_person + \
-        appliance_gains * Office.floor_area
-
-    # Outdoor Temperature
-    t_out = weatherData['drybulb_C'][hour]
-
-    if str(float(hour)) in altitude.index:
-        # if solar gains land in front of the south window. Assume that window
-        # is fully shaded from the back by the building
-        if altitude[str(float(hour))] < 90.0 and azimuth[str(float(hour))] > -90 and azimuth[str(float(hour))] < 90:
-            dir_solar_gains = weatherData['dirnorrad_Whm2'][hour] * np.cos(altitude[str(
-                float(hour))] * np.pi / 180.0) * np.cos(azimuth[str(float(hour))] * np.pi / 180.0)
-        else:
-            dir_solar_gains = 0
 
-        diffuse_solar_gains = weatherData['difhorrad_Whm2'][hour] / 2.0
+# Read Occupancy Profile, compiled once into one value per hour of the weather file
+occupancy = schedules.expand_yearly(schedules.read_schedule_csv(os.path.join(
+    mainPath, 'auxiliary', 'schedules_el_OFFICE.csv'), 'People'), weatherData.time_index)
 
-        if hour == 3994:
+# Gains from occupancy and appliances
+internal_gains = schedules.calc_internal_gains(occupancy, Office.floor_area, gain_per_person=gain_per_person,
+                                               appliance_gains=appliance_gains, max_occupancy=max_occupancy)
 
-            solar_gains = (dir_solar_gains + diffuse_solar_gains) * \
-                Office.window_area * 0.7
+# if solar gains land in front of the south window. Assume that window
+# is fully shaded from the back by the building
+in_front = (altitude < 90.0) & (azimuth > -90) & (azimuth < 90)
+dir_solar_gains = np.where(in_front, weatherData['dirnorrad_Whm2'] * np.cos(
+    altitude * np.pi / 180.0) * np.cos(azimuth * np.pi / 180.0), 0)
+diffuse_solar_gains = weatherData['difhorrad_Whm2'] / 2.0
 
-    else:
-        # Sun is below the horizon (night time)
-        solar_gains = 0
+# No solar gains while the sun is below the horizon (night time)
+solar_gains = np.where(altitude > 0, (dir_solar_gains + diffuse_solar_gains) * Office.window_area * 0.7, 0)
 
-    Office.solve_building_energy(
-        internal_gains=internal_gains, solar_gains=solar_gains, t_out=t_out, t_m_prev=t_m_prev)
+# Outdoor Temperature
+t_out = weatherData['drybulb_C']
 
-    t_m_prev = Office.t_m_next
+# Start from the thermal mass temperature at which the year repeats itself, instead of a warm-up year
+t_m_prev = calc_periodic_t_m_prev(Office, t_out, solar_gains, internal_gains)
 
-    HeatingDemand.append(Office.heating_demand)
-    HeatingEnergy.append(Office.heating_energy)
-    CoolingDemand.append(Office.cooling_demand)
-    CoolingEnergy.append(Office.cooling_energy)
-    ElectricityOut.append(Office.electricity_out)
-    IndoorAir.append(Office.t_air)
-    OutsideTemp.append(t_out)
-    SolarGains.append(solar_gains)
-    COP.append(Office.cop)
+# Solve the building for the whole year
+results = simulate(Office, t_out=t_out, solar_gains=solar_gains,
+                   internal_gains=internal_gains, t_m_prev=t_m_prev)
 
 annualResults = pd.DataFrame({
-    'HeatingDemand': HeatingDemand,
-    'HeatingEnergy': HeatingEnergy,
-    'CoolingDemand': CoolingDemand,
-    'CoolingEnergy': CoolingEnergy,
-    'IndoorAir': IndoorAir,
-    'OutsideTemp':  OutsideTemp,
-    'SolarGains': SolarGains,
-    'COP': COP
-})
+    'HeatingDemand': results['heating_demand'],
+    'HeatingEnergy': results['heating_energy'],
+    'CoolingDemand': results['cooling_demand'],
+    'CoolingEnergy': results['cooling_energy'],
+    'IndoorAir': results['t_air'],
+    'OutsideTemp':  t_out,
+    'SolarGains': solar_gains,
+    'COP': results['cop']
+}, index=pd.DatetimeIndex(weatherData.time_index))
 
 # Commented for now due to virtual environment
 annualResults[['HeatingEnergy', 'CoolingEnergy']].plot()
@@ -27,6 +27,8 @@ import supply_system
 import emission_system
 from radiation import Location
 from radiation import Window
+from radiation import WindowSet
+import kpi
 
 matplotlib.style.use('ggplot')
 
@@ -100,35 +102,28 @@ print("default h_ve_sdj is:", h_ve_adj_default)
 # Starting temperature of the builidng
 t_m_prev = 20
 
-heating_hours = 0
+# Hours below 15 C, in which the greenhouse would need heating
+KPIs = kpi.KPIAggregator([kpi.ThresholdCount('t_air', lower=15, name='heating_hours')])
 
-# Loop through all 8760 hours of the year
-for hour in range(8760):
+# Sun position for every hour of the weather file, calculated in one go
+Altitudes, Azimuths = Wellington.calc_weather_sun_path(latitude_deg=-40.750, longitude_deg=175.13)
+
+# Solar gains of all windows for every hour
+Windows = WindowSet([EastWall, WestWall, EastRoof, WestRoof, SouthWall, NorthWall])
+Windows.calc_solar_gains(sun_altitude=Altitudes, sun_azimuth=Azimuths,
+		normal_direct_radiation=Wellington.weather_data['dirnorrad_Whm2'],
+		horizontal_diffuse_radiation=Wellington.weather_data['difhorrad_Whm2'])
+
+# Loop through all hours of the weather file
+for hour in range(len(Wellington.weather_data)):
 
 
 		# Extract the outdoor temperature in Wellington for that hour
 		t_out = Wellington.weather_data['drybulb_C'][hour]
 
-		Altitude, Azimuth = Wellington.calc_sun_position(
-				latitude_deg= -40.750, longitude_deg=175.13, year=2020, hoy=hour)
-
-		# Loop through all windows
-		total_solar_gains = 0
-		for selected_window in [EastWall, WestWall, EastRoof, WestRoof, SouthWall, NorthWall]:
-			selected_window.calc_solar_gains(sun_altitude=Altitude, sun_azimuth=Azimuth,
-												normal_direct_radiation=Wellington.weather_data[
-												'dirnorrad_Whm2'][hour],
-												horizontal_diffuse_radiation=Wellington.weather_data['difhorrad_Whm2'][hour])
-
-			#print(selected_window.solar_gains)
-			total_solar_gains += selected_window.solar_gains
-		#print("hour is",hour)
-		# print("south", SouthWindow.solar_gains)
-		# print("north", NorthWindow.solar_gains)
-		# print("roof",Roof.solar_gains)
-		# print("total", total_solar_gains)
-
-		
+		# Solar gains through all windows
+		total_solar_gains = Windows.zone_solar_gains[0, hour]
+
 		Greenhouse.solve_building_energy(internal_gains=0,solar_gains=total_solar_gains, t_out=t_out, t_m_prev=t_m_prev)
 
 
@@ -140,8 +135,7 @@ for hour in range(8760):
 		else:
 			Greenhouse.h_ve_adj = h_ve_adj_default # closed windows
 
-		if Greenhouse.t_air < 15:
-			heating_hours += 1
+		KPIs.record(Greenhouse)
 
 		# Set the previous temperature for the next time step
 		t_m_prev = Greenhouse.t_m_next
@@ -171,14 +165,14 @@ annualResults = pd.DataFrame({
 # print(annualResults.IndoorAir)
 # print(annualResults.IndoorAir[0:10])
 
-print("hours of heating are", heating_hours)
+print("hours of heating are", int(KPIs.results()['heating_hours']))
 
 start = 4200
 end = 4200 + 24*7
 
 fig = plt.figure()
 plt.plot(range(start,end), annualResults.IndoorAir[start:end], range(start,end), annualResults.OutsideTemp[start:end], alpha = 0.5 )
-plt.xlabel('Hour of the year (0 - 8760)')
+plt.xlabel('Hour of the weather file')
 plt.ylabel('Temperature (C)')
 plt.legend(['Indoor Air','Outdoor Air'])
 plt.savefig("temp.png", format="png")
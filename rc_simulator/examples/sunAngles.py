@@ -7,12 +7,12 @@ mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, mainPath)
 
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 from building_physics import Building  # Importing Building Class
 
 from radiation import Location
+from auxiliary import sunPositionReader
 
 matplotlib.style.use('ggplot')
 
@@ -25,26 +25,13 @@ def calculate_sun_angles():
     Zurich.calc_sun_position(latitude_deg=47.480, longitude_deg=8.536, year=2015, hoy=3708)
 
 
-    Azimuth = []
-    Altitude = []
-    Sunnyhoy = []
+    Altitude, Azimuth = Zurich.calc_sun_positions(
+        latitude_deg=47.480, longitude_deg=8.536, year=2015, hoy=np.arange(8760))
+    Sunnyhoy = np.arange(8760) + 1
 
-    for hoy in range(8760):
-        sun = Zurich.calc_sun_position(
-            latitude_deg=47.480, longitude_deg=8.536, year=2015, hoy=hoy)
-        Altitude.append(sun[0])
-        Azimuth.append(sun[1])
-        Sunnyhoy.append(hoy + 1)
-
-    sunPosition = pd.read_csv(os.path.join(
-        mainPath, 'auxiliary', 'SunPosition.csv'), skiprows=1)
-
-    transSunPos = sunPosition.transpose()
-    hoy_check = transSunPos.index.tolist()
-    hoy_check = [float(ii) for ii in hoy_check]
-    Azimuth_check = (180 - transSunPos[1]).tolist()
-
-    Altitude_check = transSunPos[0].tolist()
+    Altitude_check, Azimuth_check = sunPositionReader.read_sun_position(os.path.join(
+        mainPath, 'auxiliary', 'SunPosition.csv'))
+    hoy_check = np.arange(8760) + 1
 
     plt.style.use('ggplot')
 
@@ -0,0 +1,286 @@
+"""
+Key performance indicators accumulated while a building is simulated, so that annual and monthly energy, peak loads
+and hours outside the comfort band are known without storing any time series
+
+A KPIAggregator is a results sink (see results_writer) that updates its statistics with every block of timesteps
+and then discards the block, so its memory does not grow with the length of the run.
+
+HOW TO USE
+
+::
+
+    from simulation import simulate
+    import kpi
+    aggregator = kpi.KPIAggregator([kpi.Sum('heating_demand', monthly=True, scale=0.001),
+                                    kpi.Minimum('cooling_demand'),
+                                    kpi.ThresholdCount('t_air', lower=20.0, upper=26.0),
+                                    kpi.Histogram('t_air', bins=np.arange(10, 41))],
+                                   time_index=weather_data.time_index)
+    simulate(office, t_out, solar_gains, internal_gains, sink=aggregator)
+    aggregator.results()  # {'heating_demand_sum': ..., 'heating_demand_monthly': {'2013-01': ...}, ...}
+
+"""
+
+import numpy as np
+from results_writer import ResultsSink
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+class Statistic(object):
+    """
+    Base class of the statistics of one output variable. For a batch, every statistic is kept per building
+    """
+
+    def __init__(self, output, name=None):
+        """
+        :param output: Name of the output variable, e.g. heating_demand
+        :type output: str
+        :param name: Name of the statistic in the results. Defaults to output and the kind of statistic
+        :type name: str
+        """
+        self.output = output
+        self.name = name
+
+    def update(self, values, start, time_index, timestep):
+        """
+        Adds the values of a block of timesteps
+
+        :param values: Values of the block, shape (number of timesteps,) + shape
+        :type values: numpy.ndarray
+        :param start: Number of the first timestep of the block in the run
+        :type start: int
+        :param time_index: Start time of every timestep of the block, or None
+        :type time_index: numpy.ndarray
+        :param timestep: Length of a timestep in hours
+        :type timestep: float
+        """
+        raise NotImplementedError()
+
+    def results(self, building=None):
+        """
+        :param building: Position of a building in the batch, to get only its statistics
+        :type building: int
+        :return: Names and values of the statistic
+        :rtype: dict
+        """
+        raise NotImplementedError()
+
+
+def select(value, building):
+    """The value of one building of a batch, or the value itself if building is None"""
+    if building is None or value is None:
+        return value
+    return value[building]
+
+
+class Sum(Statistic):
+    """
+    Sum of an output over all timesteps, e.g. the annual energy from an hourly demand in W. Optionally also the sum
+    of every calendar month, which needs the time index of the aggregator
+    """
+
+    def __init__(self, output, monthly=False, scale=1.0, name=None):
+        """
+        :param monthly: Also sum every month
+        :type monthly: bool
+        :param scale: Factor applied to the sums, e.g. 0.001 for kWh from hourly values in W
+        :type scale: float
+        """
+        super(Sum, self).__init__(output, name or output + '_sum')
+        self.monthly = monthly
+        self.scale = scale
+        self.total = 0.0
+        self.months = {}
+
+    def update(self, values, start, time_index, timestep):
+        self.total = self.total + values.sum(axis=0) * timestep
+        if self.monthly:
+            if time_index is None:
+                raise ValueError('monthly sums need the time index of the aggregator')
+            months = time_index.astype('datetime64[M]')
+            for month in np.unique(months):
+                key = str(month)
+                self.months[key] = self.months.get(key, 0.0) + values[months == month].sum(axis=0) * timestep
+
+    def results(self, building=None):
+        results = {self.name: select(self.total, building) * self.scale}
+        if self.monthly:
+            results[self.output + '_monthly'] = {month: select(total, building) * self.scale for month, total in
+                                                 sorted(self.months.items())}
+        return results
+
+
+class Maximum(Statistic):
+    """
+    Largest value of an output, e.g. the peak load, with the timestep at which it first occurred
+    """
+
+    # Name suffix, position of the extreme value of a block and comparison with the previous extreme value
+    suffix = '_max'
+    arg = staticmethod(np.argmax)
+    exceeds = staticmethod(np.greater)
+
+    def __init__(self, output, name=None):
+        super(Maximum, self).__init__(output, name or output + self.suffix)
+        self.maximum = None
+        self.hour = None
+        self.time = None
+
+    def update(self, values, start, time_index, timestep):
+        if not len(values):
+            return
+        hour = self.arg(values, axis=0)
+        maximum = np.take_along_axis(values, np.expand_dims(hour, 0), axis=0)[0]
+        time = time_index[hour] if time_index is not None else None
+        if self.maximum is None:
+            self.maximum, self.hour, self.time = maximum, hour + start, time
+            return
+
+        larger = self.exceeds(maximum, self.maximum)
+        self.maximum = np.where(larger, maximum, self.maximum)
+        self.hour = np.where(larger, hour + start, self.hour)
+        if time is not None:
+            self.time = np.where(larger, time, self.time)
+
+    def results(self, building=None):
+        return {self.name: select(self.maximum, building), self.name + '_hour': select(self.hour, building),
+                self.name + '_time': select(self.time, building)}
+
+
+class Minimum(Maximum):
+    """
+    Smallest value of an output, with the timestep at which it first occurred. As cooling loads are negative, this
+    is the peak cooling load
+    """
+
+    suffix = '_min'
+    arg = staticmethod(np.argmin)
+    exceeds = staticmethod(np.less)
+
+
+class ThresholdCount(Statistic):
+    """
+    Hours in which an output is below a lower or above an upper threshold, e.g. hours outside the comfort band
+    """
+
+    def __init__(self, output, lower=None, upper=None, name=None):
+        """
+        :param lower: Values below lower are counted
+        :type lower: float
+        :param upper: Values above upper are counted
+        :type upper: float
+        """
+        super(ThresholdCount, self).__init__(output, name or output + '_hours_outside')
+        self.lower = lower
+        self.upper = upper
+        self.hours = 0.0
+
+    def update(self, values, start, time_index, timestep):
+        outside = np.zeros(values.shape, dtype=bool)
+        if self.lower is not None:
+            outside |= values < self.lower
+        if self.upper is not None:
+            outside |= values > self.upper
+        self.hours = self.hours + outside.sum(axis=0) * timestep
+
+    def results(self, building=None):
+        return {self.name: select(self.hours, building)}
+
+
+class Histogram(Statistic):
+    """
+    Hours in which an output falls into each bin, e.g. the distribution of the indoor air temperature. Values
+    outside the bins are not counted
+    """
+
+    def __init__(self, output, bins, name=None):
+        """
+        :param bins: Edges of the bins, as for numpy.histogram
+        :type bins: array
+        """
+        super(Histogram, self).__init__(output, name or output + '_histogram')
+        self.bins = np.asarray(bins, dtype=float)
+        self.hours = None
+        self.batch = False
+
+    def update(self, values, start, time_index, timestep):
+        self.batch = values.ndim > 1
+        values = values.reshape(len(values), -1)
+        if self.hours is None:
+            self.hours = np.zeros((values.shape[1], len(self.bins) - 1))
+        for building in range(values.shape[1]):
+            self.hours[building] += np.histogram(values[:, building], bins=self.bins)[0] * timestep
+
+    def results(self, building=None):
+        hours = self.hours
+        if hours is not None and (building is not None or not self.batch):
+            hours = hours[building or 0]
+        return {self.name: hours, self.name + '_bins': self.bins}
+
+
+class KPIAggregator(ResultsSink):
+    """
+    Results sink that updates statistics with the results of every block of timesteps, see simulation.simulate()
+    """
+
+    def __init__(self, statistics, time_index=None, timestep=1.0, block_size=None):
+        """
+        :param statistics: Statistics to accumulate
+        :type statistics: list of Statistic
+        :param time_index: Start time of every timestep of the run, needed for monthly sums and the time of maxima
+        :type time_index: numpy.ndarray
+        :param timestep: Length of a timestep in hours, by which sums, counts and histograms are weighted
+        :type timestep: float
+        :param block_size: Number of timesteps that simulate() passes at once, see results_writer.ResultsSink
+        :type block_size: int
+        """
+        super(KPIAggregator, self).__init__(block_size)
+        self.statistics = statistics
+        self.time_index = None if time_index is None else np.asarray(time_index, dtype='datetime64[m]')
+        self.timestep = timestep
+
+    def write(self, results):
+        """
+        Updates the statistics with the results of the next timesteps, which are not kept
+
+        :param results: Output name and array of values, as returned by simulate()
+        :type results: dict
+        """
+        n_hours = len(next(iter(results.values())))
+        time_index = None
+        if self.time_index is not None:
+            time_index = self.time_index[self.n_records:self.n_records + n_hours]
+        for statistic in self.statistics:
+            statistic.update(np.asarray(results[statistic.output]), self.n_records, time_index, self.timestep)
+        self.n_records += n_hours
+
+    def record(self, building):
+        """
+        Updates the statistics with the state of a building after one timestep, for scripts that run their own
+        hourly loop
+
+        :param building: The building after solve_building_energy()
+        :type building: building_physics.Building
+        """
+        self.write({statistic.output: [getattr(building, statistic.output)] for statistic in self.statistics})
+
+    def results(self, building=None):
+        """
+        :param building: Position of a building in the batch, to get only its statistics
+        :type building: int
+        :return: Names and values of all statistics
+        :rtype: dict
+        """
+        results = {}
+        for statistic in self.statistics:
+            results.update(statistic.results(building))
+        return results
@@ -5,11 +5,11 @@ Tool to Evaluate Radiation incident on a surface of a set angle
 """
 
 import numpy as np
-import pandas as pd
 import os
-import sys
 import math
 import datetime
+import collections
+from auxiliary import weather
 
 
 __authors__ = "Prageeth Jayathissa"
@@ -25,22 +25,98 @@ __status__ = "production"
 
 
 
+class SunPathCache(object):
+    """
+    Sun positions of whole years, keyed by (latitude, longitude, year, timestep), so that buildings at the same
+    site share one calculation. Recently used sun paths are kept in memory, up to max_size of them. If a directory
+    is given, every sun path is also stored there as a float32 .npy file, which other processes or later runs load
+    instead of recalculating it
+
+    HOW TO USE
+
+    ::
+
+        Location.sun_path_cache = SunPathCache(directory='sun_paths')  # Share the sun paths between runs
+        altitude, azimuth = Zurich.calc_sun_path(latitude_deg=47.480, longitude_deg=8.536, year=2015)
+
+    """
+
+    def __init__(self, directory=None, max_size=64):
+        self.directory = directory
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+
+    def file_path(self, key):
+        """Path of the .npy file of a sun path in the directory"""
+        return os.path.join(self.directory, 'sun_path_%.6f_%.6f_%d_%g.npy' % key)
+
+    def get(self, key):
+        """
+        Looks up a sun path in memory, then in the directory
+
+        :return: array of shape (2, number of timesteps) with the altitude and azimuth, or None if not cached
+        :rtype: numpy.ndarray
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.directory is not None and os.path.exists(self.file_path(key)):
+            return self.add(key, np.load(self.file_path(key)))
+
+        return None
+
+    def put(self, key, sun_path):
+        """
+        Stores a sun path in memory and, if a directory is set, on disk
+
+        :return: The stored sun path as float32 array
+        :rtype: numpy.ndarray
+        """
+        sun_path = np.asarray(sun_path, dtype=np.float32)
+        if self.directory is not None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Write to a temporary file first, so that other processes never load a partial file
+            temporary_path = '%s.%d.tmp' % (self.file_path(key), os.getpid())
+            with open(temporary_path, 'wb') as temporary_file:
+                np.save(temporary_file, sun_path)
+            os.replace(temporary_path, self.file_path(key))
+        return self.add(key, sun_path)
+
+    def add(self, key, sun_path):
+        """Adds a sun path to memory, removing the least recently used ones beyond max_size"""
+        self.entries[key] = sun_path
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return sun_path
+
+
 class Location(object):
     """Set the Location of the Simulation with an Energy Plus Weather File"""
 
-    def __init__(self, epwfile_path):
+    # Sun paths shared by all locations. Assign a SunPathCache with a directory to keep them on disk
+    sun_path_cache = SunPathCache()
 
-        # Set EPW Labels and import epw file
-        epw_labels = ['year', 'month', 'day', 'hour', 'minute', 'datasource', 'drybulb_C', 'dewpoint_C', 'relhum_percent',
-                      'atmos_Pa', 'exthorrad_Whm2', 'extdirrad_Whm2', 'horirsky_Whm2', 'glohorrad_Whm2',
-                      'dirnorrad_Whm2', 'difhorrad_Whm2', 'glohorillum_lux', 'dirnorillum_lux', 'difhorillum_lux',
-                      'zenlum_lux', 'winddir_deg', 'windspd_ms', 'totskycvr_tenths', 'opaqskycvr_tenths', 'visibility_km',
-                      'ceiling_hgt_m', 'presweathobs', 'presweathcodes', 'precip_wtr_mm', 'aerosol_opt_thousandths',
-                      'snowdepth_cm', 'days_last_snow', 'Albedo', 'liq_precip_depth_mm', 'liq_precip_rate_Hour']
+    def __init__(self, epwfile_path=None, weather_data=None):
 
-        # Import EPW file
-        self.weather_data = pd.read_csv(
-            epwfile_path, skiprows=8, header=None, names=epw_labels).drop('datasource', axis=1)
+        if weather_data is None:
+            # Import EPW file, through the binary cache of auxiliary.weather. Columns are decoded when first used
+            weather_data = weather.open_epw(epwfile_path)
+        self.weather_data = weather_data
+
+    @classmethod
+    def from_weather_store(cls, store, site_id):
+        """
+        Opens a site of a weather store (see auxiliary.weather_store) without copying its weather
+
+        :param store: The opened store
+        :type store: auxiliary.weather_store.WeatherStore
+        :param site_id: ID of the site
+        :type site_id: str
+        :rtype: Location
+        """
+        return cls(weather_data=store.open_site(site_id))
 
     def calc_sun_position(self, latitude_deg, longitude_deg, year, hoy):
         """
@@ -106,6 +182,133 @@ class Location(object):
         else:
             return math.degrees(altitude_rad), (180 - math.degrees(azimuth_rad))
 
+    def calc_sun_positions(self, latitude_deg, longitude_deg, year, hoy=None):
+        """
+        Calculates the Sun Position for many hours at once, with the same equations as calc_sun_position
+
+        :param latitude_deg: Geographical Latitude in Degrees
+        :type latitude_deg: float
+        :param longitude_deg: Geographical Longitude in Degrees
+        :type longitude_deg: float
+        :param year: year
+        :type year: int
+        :param hoy: Hours of the year from the start. Defaults to every hour of the year
+        :type hoy: array
+        :return: altitude, azimuth: Arrays of the sun position in altitude and azimuth degrees [degrees]
+        :rtype: tuple
+        """
+
+        start_of_year = np.datetime64('%04d-01-01' % year, 'm')
+        if hoy is None:
+            hours_of_year = np.datetime64('%04d-01-01' % (year + 1), 'h') - np.datetime64('%04d-01-01' % year, 'h')
+            hoy = np.arange(hours_of_year.astype(int))
+
+        # Convert to Radians
+        latitude_rad = np.radians(latitude_deg)
+
+        # Set the date in UTC based off the hour of year and the year itself, to the minute as in datetime
+        minutes = np.floor(np.round(np.asarray(hoy, dtype=float) * 60, 6)).astype('timedelta64[m]')
+        utc_datetime = start_of_year + minutes
+        utc_date = utc_datetime.astype('datetime64[D]')
+
+        # Determine the day of the year, wrapping into the following year like datetime does
+        day_of_year = (utc_date - utc_datetime.astype('datetime64[Y]')).astype(int) + 1
+        minute_of_day = (utc_datetime - utc_date).astype(int)
+
+        # Calculate the declination angle: The variation due to the earths tilt
+        # http://www.pveducation.org/pvcdrom/properties-of-sunlight/declination-angle
+        declination_rad = np.radians(
+            23.45 * np.sin((2 * np.pi / 365.0) * (day_of_year - 81)))
+
+        # Normalise the day to 2*pi
+        angle_of_day = (day_of_year - 81) * (2 * np.pi / 364)
+
+        # The deviation between local standard time and true solar time
+        equation_of_time = (9.87 * np.sin(2 * angle_of_day)) - \
+            (7.53 * np.cos(angle_of_day)) - (1.5 * np.sin(angle_of_day))
+
+        # True Solar Time
+        solar_time = (minute_of_day + (4 * longitude_deg) + equation_of_time) / 60.0
+
+        # Angle between the local longitude and longitude where the sun is at
+        # higher altitude
+        hour_angle_rad = np.radians(15 * (12 - solar_time))
+
+        # Altitude Position of the Sun in Radians
+        altitude_rad = np.arcsin(np.cos(latitude_rad) * np.cos(declination_rad) * np.cos(hour_angle_rad) +
+                                 np.sin(latitude_rad) * np.sin(declination_rad))
+
+        # Azimuth Position fo the sun in radians
+        azimuth_rad = np.arcsin(
+            np.cos(declination_rad) * np.sin(hour_angle_rad) / np.cos(altitude_rad))
+
+        # Quadrant correction, as in calc_sun_position
+        azimuth_deg = np.where(np.cos(hour_angle_rad) >= (np.tan(declination_rad) / np.tan(latitude_rad)),
+                               np.degrees(azimuth_rad), 180 - np.degrees(azimuth_rad))
+
+        return np.degrees(altitude_rad), azimuth_deg
+
+    def calc_sun_path(self, latitude_deg, longitude_deg, year, timestep=1.0):
+        """
+        Sun Position for every timestep of a year, taken from the sun_path_cache if the site has been calculated
+        before. Replaces the precalculated auxiliary/SunPosition.csv
+
+        :param latitude_deg: Geographical Latitude in Degrees
+        :type latitude_deg: float
+        :param longitude_deg: Geographical Longitude in Degrees
+        :type longitude_deg: float
+        :param year: year
+        :type year: int
+        :param timestep: Length of a timestep in hours
+        :type timestep: float
+        :return: altitude, azimuth: float32 arrays of the sun position in altitude and azimuth degrees [degrees]
+        :rtype: tuple
+        """
+        key = (float(latitude_deg), float(longitude_deg), int(year), float(timestep))
+
+        sun_path = self.sun_path_cache.get(key)
+        if sun_path is None:
+            hours_of_year = np.datetime64('%04d-01-01' % (year + 1), 'h') - np.datetime64('%04d-01-01' % year, 'h')
+            hoy = np.arange(0, hours_of_year.astype(int), timestep)
+            sun_path = self.sun_path_cache.put(key, self.calc_sun_positions(latitude_deg, longitude_deg, year, hoy))
+
+        return sun_path[0], sun_path[1]
+
+    def calc_weather_sun_path(self, latitude_deg=None, longitude_deg=None):
+        """
+        Sun Position for every record of the weather data, following its time index, so leap years, files of
+        several years and sub-hourly records are covered. The sun path of each calendar year comes from
+        calc_sun_path and its cache
+
+        :param latitude_deg: Geographical Latitude in Degrees. Defaults to the latitude of the weather file
+        :type latitude_deg: float
+        :param longitude_deg: Geographical Longitude in Degrees. Defaults to the longitude of the weather file
+        :type longitude_deg: float
+        :return: altitude, azimuth: float32 arrays of the sun position in altitude and azimuth degrees [degrees]
+        :rtype: tuple
+        """
+        if latitude_deg is None:
+            latitude_deg = self.weather_data.latitude_deg
+        if longitude_deg is None:
+            longitude_deg = self.weather_data.longitude_deg
+        timestep = self.weather_data.timestep
+        time_index = self.weather_data.time_index
+        years = time_index.astype('datetime64[Y]')
+
+        altitude = np.empty(len(time_index), dtype=np.float32)
+        azimuth = np.empty(len(time_index), dtype=np.float32)
+        for year in np.unique(years):
+            in_year = years == year
+            year_altitude, year_azimuth = self.calc_sun_path(latitude_deg, longitude_deg, year.astype(int) + 1970,
+                                                             timestep)
+            # Position of the records in the sun path of their year
+            minutes = (time_index[in_year] - year.astype('datetime64[m]')).astype(int)
+            position = np.round(minutes / (60.0 * timestep)).astype(int)
+            altitude[in_year] = year_altitude[position]
+            azimuth[in_year] = year_azimuth[position]
+
+        return altitude, azimuth
+
 
 class Window(object):
     """docstring for Window"""
@@ -203,5 +406,184 @@ class Window(object):
         return (1 + math.cos(self.alititude_tilt_rad)) / 2
 
 
+class WindowSet(object):
+    """
+    Many windows solved together for all hours at once. The results are arrays of shape (number of windows,
+    number of hours), and summed per zone (number of zones, number of hours)
+
+    Incidence only depends on the orientation of a window, so the radiation is calculated once per unique
+    (alititude_tilt, azimuth_tilt) pair and scaled by area and transmittance. With per_window=False only the
+    zone sums are calculated, and the cost grows with the number of orientations instead of windows
+
+    HOW TO USE
+
+    ::
+
+        windows = WindowSet([SouthWindow, EastWindow, RoofAtrium], zones=[0, 0, 1])
+        altitude, azimuth = Zurich.calc_sun_path(latitude_deg=47.480, longitude_deg=8.536, year=2015)
+        windows.calc_solar_gains(altitude, azimuth, Zurich.weather_data['dirnorrad_Whm2'],
+                                 Zurich.weather_data['difhorrad_Whm2'])
+        windows.zone_solar_gains[1]  # Solar gains of the second zone for every hour
+
+    """
+
+    def __init__(self, windows, zones=None):
+        """
+        :param windows: The windows, with the same properties as in Window
+        :type windows: list of Window
+        :param zones: Index of the zone of each window. Defaults to all windows in one zone
+        :type zones: list of int
+        """
+        alititude_tilt_rad = np.array([window.alititude_tilt_rad for window in windows], dtype=float)
+        azimuth_tilt_rad = np.array([window.azimuth_tilt_rad for window in windows], dtype=float)
+        self.glass_solar_transmittance = np.array(
+            [window.glass_solar_transmittance for window in windows], dtype=float)
+        self.glass_light_transmittance = np.array(
+            [window.glass_light_transmittance for window in windows], dtype=float)
+        self.area = np.array([window.area for window in windows], dtype=float)
+
+        # Unique orientations, and the orientation of each window as index into them
+        orientations, self.orientation_index = np.unique(
+            np.column_stack([alititude_tilt_rad, azimuth_tilt_rad]), axis=0, return_inverse=True)
+        self.orientation_index = self.orientation_index.ravel()
+        self.alititude_tilt_rad, self.azimuth_tilt_rad = orientations.T
+
+        self.zones = np.zeros(len(windows), dtype=int) if zones is None else np.asarray(zones, dtype=int)
+        n_zones = self.zones.max() + 1 if len(self.zones) else 0
+
+        # Area x transmittance of every orientation in every zone (number of zones, number of orientations)
+        self.zone_solar_weights = np.zeros((n_zones, len(orientations)))
+        np.add.at(self.zone_solar_weights, (self.zones, self.orientation_index),
+                  self.area * self.glass_solar_transmittance)
+        self.zone_light_weights = np.zeros((n_zones, len(orientations)))
+        np.add.at(self.zone_light_weights, (self.zones, self.orientation_index),
+                  self.area * self.glass_light_transmittance)
+
+    def calc_solar_gains(self, sun_altitude, sun_azimuth, normal_direct_radiation, horizontal_diffuse_radiation,
+                         per_window=True):
+        """
+        Calculates the Solar Gains through every window for every hour, see Window.calc_solar_gains
+
+        :param sun_altitude: Altitude Angles of the Sun in Degrees
+        :type sun_altitude: array
+        :param sun_azimuth: Azimuth angles of the sun in degrees
+        :type sun_azimuth: array
+        :param normal_direct_radiation: Normal Direct Radiation from weather file
+        :type normal_direct_radiation: array
+        :param horizontal_diffuse_radiation: Horizontal Diffuse Radiation from weather file
+        :type horizontal_diffuse_radiation: array
+        :param per_window: Also store the results of every window, not only the zone sums
+        :type per_window: bool
+        :return: self.incident_solar, Incident Solar Radiation on each window (windows x hours)
+        :return: self.solar_gains - Solar gains in building after transmitting through each window (windows x hours)
+        :return: self.zone_solar_gains - Solar gains summed per zone (zones x hours)
+        :rtype: numpy.ndarray
+        """
+        incident = self.calc_incident(sun_altitude, sun_azimuth, normal_direct_radiation,
+                                      horizontal_diffuse_radiation)
+        if per_window:
+            self.incident_solar = incident[self.orientation_index] * self.area[:, np.newaxis]
+            self.solar_gains = self.incident_solar * self.glass_solar_transmittance[:, np.newaxis]
+        self.zone_solar_gains = self.zone_solar_weights.dot(incident)
+
+    def calc_illuminance(self, sun_altitude, sun_azimuth, normal_direct_illuminance, horizontal_diffuse_illuminance,
+                         per_window=True):
+        """
+        Calculates the Illuminance through every window for every hour, see Window.calc_illuminance
+
+        :param sun_altitude: Altitude Angles of the Sun in Degrees
+        :type sun_altitude: array
+        :param sun_azimuth: Azimuth angles of the sun in degrees
+        :type sun_azimuth: array
+        :param normal_direct_illuminance: Normal Direct Illuminance from weather file [Lx]
+        :type normal_direct_illuminance: array
+        :param horizontal_diffuse_illuminance: Horizontal Diffuse Illuminance from weather file [Lx]
+        :type horizontal_diffuse_illuminance: array
+        :param per_window: Also store the results of every window, not only the zone sums
+        :type per_window: bool
+        :return: self.incident_illuminance, Incident Illuminance on each window [Lumens] (windows x hours)
+        :return: self.transmitted_illuminance - Illuminance after transmitting through each window [Lumens]
+        :return: self.zone_transmitted_illuminance - Transmitted illuminance summed per zone (zones x hours)
+        :rtype: numpy.ndarray
+        """
+        incident = self.calc_incident(sun_altitude, sun_azimuth, normal_direct_illuminance,
+                                      horizontal_diffuse_illuminance)
+        if per_window:
+            self.incident_illuminance = incident[self.orientation_index] * self.area[:, np.newaxis]
+            self.transmitted_illuminance = self.incident_illuminance * self.glass_light_transmittance[:, np.newaxis]
+        self.zone_transmitted_illuminance = self.zone_light_weights.dot(incident)
+
+    def calc_incident(self, sun_altitude, sun_azimuth, normal_direct, horizontal_diffuse):
+        """Incident direct and diffuse radiation or illuminance per m2 of each orientation (orientations x hours)"""
+        direct_factor = self.calc_direct_solar_factor(sun_altitude, sun_azimuth)
+        diffuse_factor = self.calc_diffuse_solar_factor()[:, np.newaxis]
+
+        direct = direct_factor * np.asarray(normal_direct, dtype=float)
+        diffuse = np.asarray(horizontal_diffuse, dtype=float) * diffuse_factor
+        return direct + diffuse
+
+    def calc_direct_solar_factor(self, sun_altitude, sun_azimuth):
+        """
+        Calculates the cosine of the angle of incidence on every orientation for every hour (orientations x hours)
+        """
+        sun_altitude_rad = np.radians(np.asarray(sun_altitude, dtype=float))
+        sun_azimuth_rad = np.radians(np.asarray(sun_azimuth, dtype=float))
+        alititude_tilt_rad = self.alititude_tilt_rad[:, np.newaxis]
+        azimuth_tilt_rad = self.azimuth_tilt_rad[:, np.newaxis]
+
+        #ref:Quaschning, Volker, and Rolf Hanitsch. "Shade calculations in photovoltaic systems." ISES Solar World Conference, Harare. 1995.
+        direct_factor = np.cos(sun_altitude_rad) * np.sin(alititude_tilt_rad) * np.cos(sun_azimuth_rad - azimuth_tilt_rad) + \
+            np.sin(sun_altitude_rad) * np.cos(alititude_tilt_rad)
+
+        # If the sun is behind the window surface. An angle of incidence above 90 degrees is a negative cosine
+        return np.where(direct_factor < 0, 0, direct_factor)
+
+    def calc_diffuse_solar_factor(self):
+        """Calculates the proportion of diffuse radiation of every orientation"""
+        return (1 + np.cos(self.alititude_tilt_rad)) / 2
+
+
+def calc_portfolio_solar_gains(windows, buildings, sites, site_inputs, n_buildings=None):
+    """
+    Solar gains of every building of a portfolio for every hour. Windows are grouped by site, and within a site by
+    orientation, so that the incident radiation is calculated once per site and orientation and then scaled by
+    area x transmittance of the windows
+
+    :param windows: All windows of the portfolio
+    :type windows: list of Window
+    :param buildings: Index of the building of each window
+    :type buildings: list of int
+    :param sites: Site of each window, a key of site_inputs
+    :type sites: list
+    :param site_inputs: sun_altitude, sun_azimuth, normal_direct_radiation and horizontal_diffuse_radiation arrays
+        of each site, see WindowSet.calc_solar_gains
+    :type site_inputs: dict
+    :param n_buildings: Number of buildings. Defaults to the highest building index + 1
+    :type n_buildings: int
+    :return: solar_gains, array of shape (number of buildings, number of hours)
+    :rtype: numpy.ndarray
+    """
+    buildings = np.asarray(buildings, dtype=int)
+    if n_buildings is None:
+        n_buildings = buildings.max() + 1
+
+    site_windows = collections.OrderedDict()
+    for index, site in enumerate(sites):
+        site_windows.setdefault(site, []).append(index)
+
+    solar_gains = None
+    for site, indices in site_windows.items():
+        # Buildings of the site, numbered as zones of one WindowSet
+        site_buildings, zones = np.unique(buildings[indices], return_inverse=True)
+        window_set = WindowSet([windows[index] for index in indices], zones=zones.ravel())
+        window_set.calc_solar_gains(*site_inputs[site], per_window=False)
+
+        if solar_gains is None:
+            solar_gains = np.zeros((n_buildings, window_set.zone_solar_gains.shape[1]))
+        solar_gains[site_buildings] += window_set.zone_solar_gains
+
+    return solar_gains
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,307 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, initializedcheck=False
+"""
+Optional compiled kernel of the hourly 5R1C loop
+
+Runs the same steps as Building.solve_building_energy() and Building.solve_building_lighting() (ISO 13790 C.4.2
+with the 0 W and 10 W/m2 probes) for every hour in C, for buildings whose supply and emission systems have static
+data (all built-in systems, see supply_system.precompile and emission_system.precompile).
+
+The kernel is used automatically by simulation.simulate() once it has been built with
+
+::
+
+    python build_kernel.py build_ext --inplace
+
+If it is not built, simulate() runs the pure Python Building instead.
+
+"""
+
+from libc.math cimport NAN
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Rows of the output table, in the order of simulation.OUTPUT_VARIABLES followed by the lighting demand
+OUTPUTS = ['t_air', 't_s', 't_m', 't_m_next', 'energy_demand', 'heating_demand', 'heating_energy',
+           'heating_sys_electricity', 'heating_sys_fossils', 'cooling_demand', 'cooling_energy',
+           'cooling_sys_electricity', 'cooling_sys_fossils', 'electricity_out', 'sys_total_energy', 'cop',
+           'lighting_demand']
+
+
+cdef struct Supply:
+    bint is_heat_pump
+    double cop_a
+    double cop_b
+    double cop_c
+    bint source_is_t_out
+    double source_temperature
+    bint uses_fossils
+    double fossils_efficiency
+    double electricity_efficiency
+    double electricity_out_ratio
+
+
+cdef struct Params:
+    # Derived coefficients, see building_physics.DerivedCoefficients
+    double h_tr_em
+    double h_tr_w
+    double h_ve_adj
+    double h_tr_ms
+    double h_tr_is
+    double h_tr_1
+    double h_tr_2
+    double h_tr_3
+    double phi_st_factor
+    double phi_m_factor
+    double t_m_prev_factor
+    double t_m_next_denominator
+    double t_s_denominator
+    double t_air_denominator
+
+    double floor_area
+    double t_set_heating
+    double t_set_cooling
+    double max_heating_energy
+    double max_cooling_energy
+
+    # Heating emission system, used for heating and cooling as in Building.calc_heat_flow()
+    double phi_ia_share
+    double phi_st_share
+    double phi_m_share
+    double heating_supply_temperature
+    double cooling_supply_temperature
+
+    double lighting_load
+    double lighting_control
+    double lighting_utilisation_factor
+    double lighting_maintenance_factor
+
+
+cdef struct Nodes:
+    double phi_ia
+    double phi_st
+    double phi_m
+    double phi_m_tot
+    double t_m_next
+    double t_m
+    double t_s
+    double t_air
+
+
+cdef Supply make_supply(precompiled, bint heating):
+    """Converts the static data of supply_system.precompile() to a C struct, for heating or for cooling"""
+    cdef Supply supply
+    (cop_coefficients, heating_source_temperature, cooling_sink_temperature,
+     fossils_efficiency, electricity_efficiency, electricity_out_ratio) = precompiled
+
+    supply.is_heat_pump = cop_coefficients is not None
+    supply.cop_a, supply.cop_b, supply.cop_c = cop_coefficients if supply.is_heat_pump else (0.0, 0.0, 0.0)
+    supply.uses_fossils = fossils_efficiency is not None
+    supply.fossils_efficiency = fossils_efficiency if supply.uses_fossils else 1.0
+    supply.electricity_efficiency = electricity_efficiency if electricity_efficiency is not None else 1.0
+    supply.electricity_out_ratio = electricity_out_ratio
+    # Reservoir temperature of the heat pump, the outdoor air if None
+    temperature = heating_source_temperature if heating else cooling_sink_temperature
+    supply.source_is_t_out = temperature is None
+    supply.source_temperature = temperature if temperature is not None else 0.0
+    return supply
+
+
+cdef inline void crank_nicolson(Params* p, double energy_demand, double internal_gains, double solar_gains,
+                                double t_out, double t_m_prev, Nodes* n) nogil:
+    """Building.calc_temperatures_crank_nicolson(), section C.3 in [C.3 ISO 13790]"""
+    # (C.1) - (C.3) and the emission system
+    n.phi_ia = 0.5 * internal_gains
+    n.phi_st = p.phi_st_factor * (0.5 * internal_gains + solar_gains)
+    n.phi_m = p.phi_m_factor * (0.5 * internal_gains + solar_gains)
+    n.phi_ia += p.phi_ia_share * energy_demand
+    n.phi_st += p.phi_st_share * energy_demand
+    n.phi_m += p.phi_m_share * energy_demand
+
+    # (C.5), supply air comes straight from the outside air
+    n.phi_m_tot = n.phi_m + p.h_tr_em * t_out + \
+        p.h_tr_3 * (n.phi_st + p.h_tr_w * t_out + p.h_tr_1 *
+                    ((n.phi_ia / p.h_ve_adj) + t_out)) / p.h_tr_2
+    # (C.4), (C.9), (C.10), (C.11)
+    n.t_m_next = ((t_m_prev * p.t_m_prev_factor) + n.phi_m_tot) / p.t_m_next_denominator
+    n.t_m = (n.t_m_next + t_m_prev) / 2.0
+    n.t_s = (p.h_tr_ms * n.t_m + n.phi_st + p.h_tr_w * t_out + p.h_tr_1 *
+             (t_out + n.phi_ia / p.h_ve_adj)) / p.t_s_denominator
+    n.t_air = (p.h_tr_is * n.t_s + p.h_ve_adj * t_out + n.phi_ia) / p.t_air_denominator
+
+
+cdef inline double calc_cop(Supply* s, double delta_t) nogil:
+    """Heat pump COP, Eq (4) in Staggell et al."""
+    if delta_t < 0:
+        delta_t = 0
+    return s.cop_a + s.cop_b * delta_t + s.cop_c * (delta_t * delta_t)
+
+
+def simulate_building(building, const double[::1] t_out, const double[::1] solar_gains,
+                      const double[::1] internal_gains, const double[::1] illuminance, const double[::1] occupancy,
+                      double t_m_prev, double[:, ::1] table):
+    """
+    Solves a Building for every hour of the inputs and writes the OUTPUTS into the rows of table
+
+    :param building: Building with precompiled supply and emission systems
+    :param illuminance: Illuminance [Lumens], or None to skip the lighting demand
+    :param occupancy: Probability of full occupancy, or None to skip the lighting demand
+    :param t_m_prev: Thermal mass temperature before the first hour [C]
+    :param table: Output array of shape (len(OUTPUTS), number of hours)
+    :return: t_m_next of the last hour
+    """
+    cdef Params p
+    cdef Supply heating, cooling
+    cdef Nodes n
+    cdef Py_ssize_t hour, n_hours = t_out.shape[0]
+    cdef bint has_lighting = illuminance is not None and occupancy is not None
+    cdef bint has_heating_demand, has_cooling_demand
+    cdef double t, sg, ig, t_air_0, t_air_10, t_air_set, energy_floorAx10, unrestricted, energy_demand
+    cdef double electricity_in, fossils_in, electricity_out, cop, load, delta_t, lux
+    cdef double h_el, h_fo, c_el, c_fo
+
+    c = building.coefficients
+    p.h_tr_em = c.h_tr_em
+    p.h_tr_w = c.h_tr_w
+    p.h_ve_adj = c.h_ve_adj
+    p.h_tr_ms = c.h_tr_ms
+    p.h_tr_is = c.h_tr_is
+    p.h_tr_1 = c.h_tr_1
+    p.h_tr_2 = c.h_tr_2
+    p.h_tr_3 = c.h_tr_3
+    p.phi_st_factor = c.phi_st_factor
+    p.phi_m_factor = c.phi_m_factor
+    p.t_m_prev_factor = c.t_m_prev_factor
+    p.t_m_next_denominator = c.t_m_next_denominator
+    p.t_s_denominator = c.t_s_denominator
+    p.t_air_denominator = c.t_air_denominator
+
+    p.floor_area = building.floor_area
+    p.t_set_heating = building.t_set_heating
+    p.t_set_cooling = building.t_set_cooling
+    p.max_heating_energy = building.max_heating_energy
+    p.max_cooling_energy = building.max_cooling_energy
+
+    (p.phi_ia_share, p.phi_st_share, p.phi_m_share,
+     p.heating_supply_temperature, p.cooling_supply_temperature) = building.heating_emission_system_precompiled
+
+    p.lighting_load = building.lighting_load
+    p.lighting_control = building.lighting_control
+    p.lighting_utilisation_factor = building.lighting_utilisation_factor
+    p.lighting_maintenance_factor = building.lighting_maintenance_factor
+
+    heating = make_supply(building.heating_supply_system_precompiled, True)
+    cooling = make_supply(building.cooling_supply_system_precompiled, False)
+
+    for hour in range(n_hours):
+        t = t_out[hour]
+        sg = solar_gains[hour]
+        ig = internal_gains[hour]
+
+        # Step 1: free floating temperatures, has_demand()
+        crank_nicolson(&p, 0.0, ig, sg, t, t_m_prev, &n)
+        t_air_0 = n.t_air
+        has_heating_demand = t_air_0 < p.t_set_heating
+        has_cooling_demand = not has_heating_demand and t_air_0 > p.t_set_cooling
+
+        energy_demand = 0.0
+        h_el = 0.0
+        h_fo = 0.0
+        c_el = 0.0
+        c_fo = 0.0
+        electricity_out = 0.0
+        cop = NAN
+
+        if has_heating_demand or has_cooling_demand:
+            # Step 2: unrestricted demand from the 10 W/m2 probe, calc_energy_demand()
+            t_air_set = p.t_set_heating if has_heating_demand else p.t_set_cooling
+            energy_floorAx10 = 10 * p.floor_area
+            crank_nicolson(&p, energy_floorAx10, ig, sg, t, t_m_prev, &n)
+            t_air_10 = n.t_air
+            unrestricted = energy_floorAx10 * (t_air_set - t_air_0) / (t_air_10 - t_air_0)
+
+            # Step 3 and 4: cap to the available power
+            if p.max_cooling_energy <= unrestricted <= p.max_heating_energy:
+                energy_demand = unrestricted
+            elif unrestricted > p.max_heating_energy:
+                energy_demand = p.max_heating_energy
+            elif unrestricted < p.max_cooling_energy:
+                energy_demand = p.max_cooling_energy
+            else:
+                raise ValueError('unknown radiative heating/cooling system status')
+
+            crank_nicolson(&p, energy_demand, ig, sg, t, t_m_prev, &n)
+
+            # Supply system, supply_system.calc_precompiled_loads()
+            if has_heating_demand:
+                load = energy_demand
+                if heating.is_heat_pump:
+                    delta_t = p.heating_supply_temperature - (t if heating.source_is_t_out
+                                                              else heating.source_temperature)
+                    cop = calc_cop(&heating, delta_t)
+                    electricity_in = load / cop
+                    fossils_in = 0.0
+                elif heating.uses_fossils:
+                    fossils_in = load / heating.fossils_efficiency
+                    electricity_in = 0.0
+                    electricity_out = fossils_in * heating.electricity_out_ratio
+                else:
+                    electricity_in = load / heating.electricity_efficiency
+                    fossils_in = 0.0
+                h_el = electricity_in
+                h_fo = fossils_in
+            else:
+                load = energy_demand * (-1)
+                if cooling.is_heat_pump:
+                    delta_t = (t if cooling.source_is_t_out else cooling.source_temperature) - \
+                        p.cooling_supply_temperature
+                    cop = calc_cop(&cooling, delta_t)
+                    electricity_in = load / cop
+                    fossils_in = 0.0
+                elif cooling.uses_fossils:
+                    fossils_in = load / cooling.fossils_efficiency
+                    electricity_in = 0.0
+                    electricity_out = fossils_in * cooling.electricity_out_ratio
+                else:
+                    electricity_in = load / cooling.electricity_efficiency
+                    fossils_in = 0.0
+                c_el = electricity_in
+                c_fo = fossils_in
+
+        table[0, hour] = n.t_air
+        table[1, hour] = n.t_s
+        table[2, hour] = n.t_m
+        table[3, hour] = n.t_m_next
+        table[4, hour] = energy_demand
+        table[5, hour] = energy_demand if has_heating_demand else 0.0
+        table[6, hour] = h_el + h_fo
+        table[7, hour] = h_el
+        table[8, hour] = h_fo
+        table[9, hour] = energy_demand if has_cooling_demand else 0.0
+        table[10, hour] = c_el + c_fo
+        table[11, hour] = c_el
+        table[12, hour] = c_fo
+        table[13, hour] = electricity_out
+        table[14, hour] = h_el + h_fo + c_el + c_fo
+        table[15, hour] = cop
+
+        if has_lighting:
+            # Building.solve_building_lighting(), Environmental Science Handbook, SV Szokolay, Section 2.2.1.3
+            lux = (illuminance[hour] * p.lighting_utilisation_factor *
+                   p.lighting_maintenance_factor) / p.floor_area
+            if lux < p.lighting_control and occupancy[hour] > 0:
+                table[16, hour] = p.lighting_load * p.floor_area
+            else:
+                table[16, hour] = 0.0
+
+        t_m_prev = n.t_m_next
+
+    return t_m_prev
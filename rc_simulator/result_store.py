@@ -0,0 +1,295 @@
+"""
+Results of parameter studies stored in an SQLite database, so that thousands of runs can be queried by their
+parameters without loading every run back into pandas
+
+The database has three tables, all keyed by run_id:
+
+- parameters: one column per building parameter, added as new names appear
+- summaries: one column per summary value, e.g. the results of a kpi.KPIAggregator
+- series: optional time series of a run, stored as binary blobs
+
+The database runs in WAL mode, so queries can read while results are written. Runs are inserted in batches, one
+transaction per batch. ResultWriter owns the only connection that writes and runs it in a background thread, to
+which parallel workers (or the futures of a process pool) hand their results.
+
+HOW TO USE
+
+::
+
+    from result_store import ResultStore, ResultWriter
+    with ResultWriter('study.sqlite') as writer:
+        for parameters, kpis in runs:
+            writer.put(parameters, summary=kpis)
+
+    store = ResultStore('study.sqlite')
+    store.query('u_windows < ? AND heating_demand_sum > ?', (1.0, 1000.0))  # DataFrame of the matching runs
+    store.load_series(run_id, 't_air')
+
+"""
+
+import json
+import numbers
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+import queue
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Largest array of a parameter or summary value that is stored as columns
+MAX_ARRAY_COLUMNS = 100
+
+
+def quote(name):
+    """Quotes a column name for SQL"""
+    if '"' in name or not name:
+        raise ValueError('invalid column name %r' % name)
+    return '"%s"' % name
+
+
+def as_columns(values, prefix=''):
+    """
+    Converts parameters or summary values to column values that SQLite stores: numbers, text or None. Dictionaries,
+    such as monthly sums, are flattened into one column per key and arrays of up to MAX_ARRAY_COLUMNS values into
+    one column per position, e.g. t_air_histogram_0, t_air_histogram_1, ...
+
+    :rtype: dict
+    """
+    columns = {}
+    for name, value in values.items():
+        name = prefix + str(name)
+        if isinstance(value, dict):
+            columns.update(as_columns(value, name + '_'))
+            continue
+
+        if isinstance(value, np.ndarray):
+            if value.size != 1:
+                # Small arrays, such as the hours and bins of a kpi.Histogram, get one column per value
+                if value.ndim != 1 or value.size > MAX_ARRAY_COLUMNS:
+                    raise ValueError('%s is not a single value or short list of values, store it as series' % name)
+                columns.update(as_columns(dict(enumerate(value)), name + '_'))
+                continue
+            value = value.reshape(-1)[0]
+        if value is None or isinstance(value, (bool, np.bool_)):
+            columns[name] = None if value is None else int(value)
+        elif isinstance(value, numbers.Number):
+            columns[name] = value.item() if isinstance(value, np.generic) else value
+        else:
+            # Class names of supply and emission systems, timestamps, ...
+            columns[name] = getattr(value, '__name__', None) or str(value)
+    return columns
+
+
+class ResultStore(object):
+    """
+    SQLite database of the runs of a parameter study
+    """
+
+    def __init__(self, db_path):
+        """
+        :param db_path: Path of the database file, created if needed
+        :type db_path: str
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS parameters (run_id INTEGER PRIMARY KEY)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS summaries (run_id INTEGER PRIMARY KEY)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS series (run_id INTEGER, output TEXT, dtype TEXT, '
+                                    'shape TEXT, data BLOB, PRIMARY KEY (run_id, output))')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def columns(self, table):
+        """:return: Names of the columns of a table"""
+        return [row[1] for row in self.connection.execute('PRAGMA table_info(%s)' % table)]
+
+    def add_columns(self, table, columns):
+        """Adds the columns that a table does not have yet"""
+        existing = set(self.columns(table))
+        for name, value in columns.items():
+            if name not in existing:
+                column_type = 'TEXT' if isinstance(value, str) else 'REAL'
+                self.connection.execute('ALTER TABLE %s ADD COLUMN %s %s' % (table, quote(name), column_type))
+                existing.add(name)
+
+    def insert(self, table, rows):
+        """Inserts rows of column values, grouped by their columns into one statement each"""
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(tuple(row.values()))
+        for names, values in groups.items():
+            self.connection.executemany('INSERT INTO %s (%s) VALUES (%s)' % (
+                table, ', '.join(quote(name) for name in names), ', '.join('?' * len(names))), values)
+
+    def add_runs(self, runs):
+        """
+        Inserts several runs in one transaction
+
+        :param runs: Every run as dictionary with the keys parameters, and optionally summary, series and run_id
+        :type runs: list of dict
+        :return: run_ids, in the order of the runs
+        :rtype: list of int
+        """
+        with self.connection:
+            next_id = self.connection.execute('SELECT COALESCE(MAX(run_id), -1) + 1 FROM parameters').fetchone()[0]
+            run_ids = []
+            parameter_rows = []
+            summary_rows = []
+            series_rows = []
+            for run in runs:
+                run_id = run.get('run_id')
+                if run_id is None:
+                    run_id = next_id
+                next_id = max(next_id, run_id + 1)
+                run_ids.append(run_id)
+
+                parameters = as_columns(run['parameters'])
+                self.add_columns('parameters', parameters)
+                parameter_rows.append(dict(run_id=run_id, **parameters))
+                if run.get('summary'):
+                    summary = as_columns(run['summary'])
+                    self.add_columns('summaries', summary)
+                    summary_rows.append(dict(run_id=run_id, **summary))
+                for output, values in (run.get('series') or {}).items():
+                    values = np.ascontiguousarray(values)
+                    series_rows.append((run_id, output, values.dtype.str, json.dumps(values.shape),
+                                        sqlite3.Binary(values.tobytes())))
+
+            self.insert('parameters', parameter_rows)
+            self.insert('summaries', summary_rows)
+            self.connection.executemany('INSERT INTO series VALUES (?, ?, ?, ?, ?)', series_rows)
+        return run_ids
+
+    def add_run(self, parameters, summary=None, series=None, run_id=None):
+        """
+        Inserts one run, see add_runs
+
+        :param parameters: Parameters of the building, e.g. {'u_walls': 0.2, 'heating_supply_system': HeatPumpAir}
+        :type parameters: dict
+        :param summary: Summary values, e.g. kpi.KPIAggregator.results()
+        :type summary: dict
+        :param series: Output name and time series
+        :type series: dict
+        :param run_id: ID of the run. Defaults to the next free ID
+        :type run_id: int
+        :rtype: int
+        """
+        return self.add_runs([{'parameters': parameters, 'summary': summary, 'series': series,
+                               'run_id': run_id}])[0]
+
+    def query(self, where=None, arguments=()):
+        """
+        Parameters and summaries of the runs that match an SQL condition
+
+        :param where: Condition on the columns of both tables, e.g. 'u_windows < ?'. All runs if None
+        :type where: str
+        :param arguments: Values of the ? placeholders in where
+        :type arguments: tuple
+        :return: One row per run, indexed by run_id
+        :rtype: pandas.DataFrame
+        """
+        sql = 'SELECT * FROM parameters LEFT JOIN summaries USING (run_id)'
+        if where:
+            sql += ' WHERE ' + where
+        return pd.read_sql_query(sql + ' ORDER BY run_id', self.connection, params=arguments,
+                                 index_col='run_id')
+
+    def load_series(self, run_id, output):
+        """
+        :return: The time series of an output of a run
+        :rtype: numpy.ndarray
+        """
+        row = self.connection.execute('SELECT dtype, shape, data FROM series WHERE run_id = ? AND output = ?',
+                                      (run_id, output)).fetchone()
+        if row is None:
+            raise KeyError((run_id, output))
+        dtype, shape, data = row
+        return np.frombuffer(data, dtype=dtype).reshape(json.loads(shape))
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM parameters').fetchone()[0]
+
+
+class ResultWriter(object):
+    """
+    Single writer of a ResultStore, running in a background thread. Runs put() from any thread are inserted in
+    batches of up to batch_size runs per transaction
+    """
+
+    def __init__(self, db_path, batch_size=1000):
+        """
+        :param db_path: Path of the database file, created if needed
+        :type db_path: str
+        :param batch_size: Largest number of runs per transaction
+        :type batch_size: int
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, parameters, summary=None, series=None, run_id=None):
+        """Queues a run, see ResultStore.add_run"""
+        if self.error is not None:
+            raise self.error
+        self.queue.put({'parameters': parameters, 'summary': summary, 'series': series, 'run_id': run_id})
+
+    def run(self):
+        # The connection is created in, and only used by, the writer thread
+        store = ResultStore(self.db_path)
+        try:
+            run = True
+            while run is not None:
+                # Everything that is queued, up to batch_size runs, goes into one transaction
+                runs = []
+                run = self.queue.get()
+                while run is not None:
+                    runs.append(run)
+                    if len(runs) == self.batch_size or self.queue.empty():
+                        break
+                    run = self.queue.get()
+                if runs and self.error is None:
+                    try:
+                        store.add_runs(runs)
+                    except Exception as error:
+                        # Raised in the threads of put() and close(), the remaining runs are discarded
+                        self.error = error
+        finally:
+            store.close()
+
+    def close(self):
+        """Writes the queued runs and stops the writer thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
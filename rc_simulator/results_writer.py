@@ -0,0 +1,316 @@
+"""
+Results sinks for simulate(), which write the outputs to disk in blocks of timesteps instead of keeping every
+output of every building in memory
+
+simulate() solves block_size timesteps at a time and passes every block to the sink, which appends it to its files,
+so the memory of a run is bounded by the block size, however many hours are simulated. The default block size
+shrinks with the number of buildings of a batch, so that a block of results stays below BLOCK_BYTES.
+
+ColumnarWriter writes one raw float32 file per output variable plus an index.json, which ColumnarResults opens as
+memory maps, so that single outputs and hours can be read back without loading the rest. CSVWriter writes one row
+per timestep, which can be read back in chunks with pd.read_csv(csv_path, chunksize=...).
+
+HOW TO USE
+
+::
+
+    from simulation import simulate
+    from results_writer import ColumnarWriter, ColumnarResults
+    with ColumnarWriter('results', time_index=weather_data.time_index) as sink:
+        simulate(batch, t_out, solar_gains, internal_gains, sink=sink)
+
+    results = ColumnarResults('results')
+    results['heating_demand'][:744]  # January of every building, read from disk
+
+"""
+
+import os
+import json
+import numpy as np
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Increase when the layout of the columnar files changes
+COLUMNAR_VERSION = 1
+
+# Default block size: the float64 results of a block of simulate() stay below BLOCK_BYTES, with at most
+# MAX_BLOCK_SIZE timesteps. One building gets a year of hours per block, a batch of 40000 buildings about 50 hours
+BLOCK_BYTES = 2 ** 28
+MAX_BLOCK_SIZE = 8760
+
+
+def calc_block_size(n_outputs, shape):
+    """
+    Number of timesteps per block whose float64 values of all outputs and buildings fit into BLOCK_BYTES
+
+    :param n_outputs: Number of output variables
+    :type n_outputs: int
+    :param shape: Shape of one timestep of an output, () for a building or (number of buildings,) for a batch
+    :type shape: tuple
+    :rtype: int
+    """
+    bytes_per_timestep = 8 * max(1, n_outputs) * int(np.prod(shape))
+    return int(max(1, min(MAX_BLOCK_SIZE, BLOCK_BYTES // bytes_per_timestep)))
+
+
+class ResultsSink(object):
+    """
+    Base class of the results sinks. Calls write_block() with every full block of timesteps passed to write(), and
+    with the remaining timesteps on close(). Full blocks, as simulate() passes them, are handed on without a copy;
+    only results that do not line up with the blocks are buffered
+    """
+
+    def __init__(self, block_size=None, dtype=np.float64):
+        """
+        :param block_size: Number of timesteps per block. Defaults to calc_block_size() for the outputs and
+            buildings of the first results
+        :type block_size: int
+        :param dtype: Data type of the buffer
+        :type dtype: numpy.dtype
+        """
+        self.block_size = block_size
+        self.dtype = dtype
+        self.outputs = None
+        self.shape = None
+        self.buffer = None
+        self.n_buffered = 0
+        self.n_records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fit_block_size(self, n_outputs, shape):
+        """
+        Sets the default block size for the outputs and buildings that simulate() will pass, if none is set yet
+
+        :return: block_size
+        :rtype: int
+        """
+        if self.block_size is None:
+            self.block_size = calc_block_size(n_outputs, shape)
+        return self.block_size
+
+    def open(self, outputs, shape):
+        """
+        Called with the first results
+
+        :param outputs: Names of the output variables
+        :type outputs: list of str
+        :param shape: Shape of one timestep of an output, () for a building or (number of buildings,) for a batch
+        :type shape: tuple
+        """
+        self.outputs = list(outputs)
+        self.shape = tuple(shape)
+        self.fit_block_size(len(self.outputs), self.shape)
+
+    def write(self, results):
+        """
+        Adds the results of the next timesteps
+
+        :param results: Output name and array of values, as returned by simulate()
+        :type results: dict
+        """
+        if self.outputs is None:
+            self.open(results, np.shape(next(iter(results.values())))[1:])
+        n_hours = len(results[self.outputs[0]])
+
+        start = 0
+        while start < n_hours:
+            if not self.n_buffered and n_hours - start >= self.block_size:
+                stop = start + self.block_size
+                self.write_block([results[output][start:stop] for output in self.outputs])
+                self.n_records += self.block_size
+                start = stop
+                continue
+
+            if self.buffer is None:
+                self.buffer = np.empty((len(self.outputs), self.block_size) + self.shape, dtype=self.dtype)
+            stop = min(n_hours, start + self.block_size - self.n_buffered)
+            block = slice(self.n_buffered, self.n_buffered + stop - start)
+            for row, output in enumerate(self.outputs):
+                self.buffer[row, block] = results[output][start:stop]
+            self.n_buffered += stop - start
+            start = stop
+            if self.n_buffered == self.block_size:
+                self.flush()
+
+    def flush(self):
+        """Writes the buffered timesteps"""
+        if self.n_buffered:
+            self.write_block(self.buffer[:, :self.n_buffered])
+            self.n_records += self.n_buffered
+            self.n_buffered = 0
+
+    def close(self):
+        """Writes the remaining timesteps"""
+        self.flush()
+
+    def write_block(self, block):
+        """
+        Writes a block of timesteps
+
+        :param block: Values of every output, in the order of outputs, each with shape (number of timesteps,) +
+            shape. Either a list of arrays or one array with the outputs as first axis
+        :type block: list or numpy.ndarray
+        """
+        raise NotImplementedError()
+
+
+class ColumnarWriter(ResultsSink):
+    """
+    Writes every output variable to its own raw float32 file in a folder, with the timesteps as leading axis,
+    described by index.json. See ColumnarResults
+    """
+
+    def __init__(self, directory, block_size=None, time_index=None):
+        """
+        :param directory: Folder of the files, created if needed. Existing results in it are replaced
+        :type directory: str
+        :param block_size: Number of timesteps per block, see ResultsSink
+        :type block_size: int
+        :param time_index: Start time of every timestep, of which the first and the timestep length are stored
+        :type time_index: numpy.ndarray
+        """
+        super(ColumnarWriter, self).__init__(block_size, np.float32)
+        self.directory = directory
+        self.start = None
+        self.timestep = None
+        if time_index is not None and len(time_index):
+            time_index = np.asarray(time_index, dtype='datetime64[m]')
+            self.start = str(time_index[0])
+            self.timestep = (time_index[1] - time_index[0]).astype(int) / 60.0 if len(time_index) > 1 else 1.0
+
+    def file_path(self, output):
+        """:return: Path of the file of an output variable"""
+        return os.path.join(self.directory, output + '.f32')
+
+    def open(self, outputs, shape):
+        super(ColumnarWriter, self).open(outputs, shape)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        for output in self.outputs:
+            open(self.file_path(output), 'wb').close()
+        self.write_index()
+
+    def write_block(self, block):
+        for output, values in zip(self.outputs, block):
+            with open(self.file_path(output), 'ab') as output_file:
+                output_file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+
+    def flush(self):
+        n_buffered = self.n_buffered
+        super(ColumnarWriter, self).flush()
+        if n_buffered:
+            # The files can be read back while the simulation is still running
+            self.write_index()
+
+    def write_index(self):
+        index_path = os.path.join(self.directory, 'index.json')
+        temporary_path = index_path + '.%d.tmp' % os.getpid()
+        with open(temporary_path, 'w') as index_file:
+            json.dump({'version': COLUMNAR_VERSION, 'outputs': self.outputs, 'shape': list(self.shape),
+                       'n_records': self.n_records, 'dtype': 'float32', 'start': self.start,
+                       'timestep': self.timestep}, index_file)
+        os.replace(temporary_path, index_path)
+
+
+class ColumnarResults(object):
+    """
+    Results written by a ColumnarWriter, opened read only as memory maps
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Folder of the files
+        :type directory: str
+        """
+        with open(os.path.join(directory, 'index.json')) as index_file:
+            index = json.load(index_file)
+        if index.get('version') != COLUMNAR_VERSION:
+            raise ValueError('results in %s have an unsupported version' % directory)
+
+        self.directory = directory
+        self.outputs = index['outputs']
+        self.shape = tuple(index['shape'])
+        self.n_records = index['n_records']
+        self.start = index['start']
+        self.timestep = index['timestep']
+
+    def __getitem__(self, output):
+        """:return: Memory map of the output with shape (number of timesteps,) + shape"""
+        if output not in self.outputs:
+            raise KeyError(output)
+        if not self.n_records:
+            return np.empty((0,) + self.shape, dtype=np.float32)
+        return np.memmap(os.path.join(self.directory, output + '.f32'), dtype=np.float32, mode='r',
+                         shape=(self.n_records,) + self.shape)
+
+    def __contains__(self, output):
+        return output in self.outputs
+
+    def __iter__(self):
+        return iter(self.outputs)
+
+    def __len__(self):
+        return self.n_records
+
+    def keys(self):
+        return list(self.outputs)
+
+    @property
+    def time_index(self):
+        """Start time of every timestep as datetime64[m], or None if the writer had no time index"""
+        if self.start is None:
+            return None
+        return np.datetime64(self.start, 'm') + (np.arange(self.n_records) * self.timestep * 60).astype(
+            'timedelta64[m]')
+
+
+class CSVWriter(ResultsSink):
+    """
+    Writes the results as CSV with one row per timestep, numbered in the first column. The outputs of a batch get
+    one column per building, named output_0, output_1, ...
+    """
+
+    def __init__(self, csv_path, block_size=None, float_format='%.10g'):
+        """
+        :param csv_path: Path of the CSV file. An existing file is replaced
+        :type csv_path: str
+        :param block_size: Number of timesteps per block, see ResultsSink
+        :type block_size: int
+        :param float_format: Format of the values
+        :type float_format: str
+        """
+        super(CSVWriter, self).__init__(block_size)
+        self.csv_path = csv_path
+        self.float_format = float_format
+
+    def open(self, outputs, shape):
+        super(CSVWriter, self).open(outputs, shape)
+        if self.shape:
+            columns = ['%s_%d' % (output, building) for output in self.outputs
+                       for building in range(int(np.prod(self.shape)))]
+        else:
+            columns = self.outputs
+        with open(self.csv_path, 'w') as csv_file:
+            csv_file.write(','.join(['hour'] + columns) + '\n')
+
+    def write_block(self, block):
+        n_hours = len(block[0])
+        rows = np.column_stack([np.reshape(values, (n_hours, -1)) for values in block])
+        hours = np.arange(self.n_records, self.n_records + n_hours)
+        with open(self.csv_path, 'a') as csv_file:
+            np.savetxt(csv_file, np.column_stack([hours, rows]), delimiter=',',
+                       fmt=['%d'] + [self.float_format] * rows.shape[1])
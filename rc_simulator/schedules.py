@@ -0,0 +1,151 @@
+"""
+Schedules compiled once into dense arrays with one value per timestep, so that a simulation indexes arrays instead
+of looking up a DataFrame every hour
+
+Schedules either come from a yearly hourly profile such as auxiliary/schedules_el_OFFICE.csv, or from daily
+profiles for weekdays, weekends and holidays that are expanded by the calendar of the simulated period.
+
+HOW TO USE
+
+::
+
+    import schedules
+    occupancy = schedules.read_schedule_csv('auxiliary/schedules_el_OFFICE.csv', 'People')
+    occupancy = schedules.expand_yearly(occupancy, weather_data.time_index)
+
+    office_hours = schedules.DailySchedule(weekday=[0] * 8 + [1] * 10 + [0] * 6, weekend=[0] * 24,
+                                           holidays=['2015-01-01', '2015-12-25'])
+    occupancy = office_hours.compile(weather_data.time_index)
+
+    internal_gains = schedules.calc_internal_gains(occupancy, Office.floor_area, max_occupancy=3.0)
+
+"""
+
+import numpy as np
+import pandas as pd
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+def hourly_index(year):
+    """
+    Start time of every hour of a year
+
+    :param year: year
+    :type year: int
+    :return: time_index, datetime64[m] array of 8760 or 8784 hours
+    :rtype: numpy.ndarray
+    """
+    return np.arange(np.datetime64('%04d-01-01' % year, 'h'), np.datetime64('%04d-01-01' % (year + 1), 'h'),
+                     dtype='datetime64[h]').astype('datetime64[m]')
+
+
+def read_schedule_csv(schedule_path, column='People'):
+    """
+    Reads one column of a schedule file with one row per hour of the year, e.g. schedules_el_OFFICE.csv
+
+    :param schedule_path: Path of the CSV file
+    :type schedule_path: str
+    :param column: Name of the column
+    :type column: str
+    :return: Array with one value per hour
+    :rtype: numpy.ndarray
+    """
+    return np.ascontiguousarray(pd.read_csv(schedule_path, usecols=[column])[column].values, dtype=float)
+
+
+def expand_yearly(profile, time_index):
+    """
+    Maps an hourly profile of one year onto a time index, by the hour of the year of every record. Every year of a
+    multi-year index repeats the profile, sub-hourly records take the value of their hour, and the hours that a
+    leap year has beyond the profile repeat its last day
+
+    :param profile: Values of the hours of one year
+    :type profile: array
+    :param time_index: Start time of every record, see auxiliary.weather.WeatherData.time_index
+    :type time_index: numpy.ndarray
+    :return: Array with one value per record
+    :rtype: numpy.ndarray
+    """
+    profile = np.asarray(profile, dtype=float)
+    time_index = np.asarray(time_index, dtype='datetime64[m]')
+    hour_of_year = (time_index.astype('datetime64[h]') - time_index.astype('datetime64[Y]')).astype(int)
+    hour_of_year = np.where(hour_of_year >= len(profile), hour_of_year - 24, hour_of_year)
+    return profile[hour_of_year]
+
+
+class DailySchedule(object):
+    """
+    Schedule built from 24 hourly values per day type, expanded by calendar rule: weekdays, Saturdays, Sundays and
+    holidays. Holidays take precedence over the day of the week
+    """
+
+    def __init__(self, weekday, weekend=None, sunday=None, holiday=None, holidays=()):
+        """
+        :param weekday: 24 values for Monday to Friday
+        :type weekday: list of float
+        :param weekend: 24 values for Saturday, and for Sunday unless sunday is given. Defaults to weekday
+        :type weekend: list of float
+        :param sunday: 24 values for Sunday. Defaults to weekend
+        :type sunday: list of float
+        :param holiday: 24 values for holidays. Defaults to sunday
+        :type holiday: list of float
+        :param holidays: Dates of the holidays, e.g. '2015-12-25'
+        :type holidays: list of str or numpy.datetime64
+        """
+        weekend = weekday if weekend is None else weekend
+        sunday = weekend if sunday is None else sunday
+        holiday = sunday if holiday is None else holiday
+
+        # Rows: Monday to Sunday, then holidays
+        self.profiles = np.array([weekday] * 5 + [weekend, sunday, holiday], dtype=float)
+        if self.profiles.shape != (8, 24):
+            raise ValueError('daily profiles need 24 hourly values')
+        self.holidays = np.array(holidays, dtype='datetime64[D]')
+
+    def compile(self, time_index):
+        """
+        Expands the schedule onto a time index
+
+        :param time_index: Start time of every record, see auxiliary.weather.WeatherData.time_index
+        :type time_index: numpy.ndarray
+        :return: Array with one value per record
+        :rtype: numpy.ndarray
+        """
+        time_index = np.asarray(time_index, dtype='datetime64[m]')
+        dates = time_index.astype('datetime64[D]')
+        hour = (time_index.astype('datetime64[h]') - dates).astype(int)
+
+        # 1 January 1970 was a Thursday
+        day_type = (dates.astype(int) + 3) % 7
+        day_type = np.where(np.isin(dates, self.holidays), 7, day_type)
+        return self.profiles[day_type, hour]
+
+
+def calc_internal_gains(occupancy, floor_area, gain_per_person=100.0, appliance_gains=14.0, max_occupancy=1.0):
+    """
+    Internal heat gains from people and appliances for every timestep
+
+    :param occupancy: Occupancy schedule, as fraction of max_occupancy
+    :type occupancy: array
+    :param floor_area: Floor area of the building [m2]
+    :type floor_area: float
+    :param gain_per_person: Heat gain per person [W]
+    :type gain_per_person: float
+    :param appliance_gains: Appliance gains per floor area [W/m2], a constant or a schedule
+    :type appliance_gains: float or array
+    :param max_occupancy: Number of people at full occupancy
+    :type max_occupancy: float
+    :return: internal_gains, Array of the internal heat gains [W]
+    :rtype: numpy.ndarray
+    """
+    people = np.asarray(occupancy, dtype=float) * max_occupancy
+    return people * gain_per_person + np.asarray(appliance_gains, dtype=float) * floor_area
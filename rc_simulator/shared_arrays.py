@@ -0,0 +1,127 @@
+"""
+Input arrays published once into shared memory, so that parallel workers read the weather, sun position, schedules
+and solar gains without receiving a pickled copy with every task
+
+SharedArrays copies each array into a multiprocessing.shared_memory block. Its handle is small and picklable, and
+attach() turns it into read-only NumPy views of the blocks in any process on the same machine. The blocks are
+removed when the SharedArrays is closed, garbage collected, or at the latest when the interpreter exits.
+
+HOW TO USE
+
+::
+
+    from shared_arrays import SharedArrays, attach
+    with SharedArrays({'t_out': weather_data['drybulb_C'], 'altitude': altitude, 'occupancy': occupancy}) as shared:
+        executor = ProcessPoolExecutor(initializer=init_worker, initargs=(shared.handle,))
+        ...
+
+    def init_worker(handle):
+        global inputs
+        inputs = attach(handle)  # {'t_out': array, ...} without copies
+
+"""
+
+import sys
+import weakref
+import numpy as np
+from multiprocessing import shared_memory
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Blocks attached by this process, kept open for as long as the process uses their views
+attached_blocks = {}
+
+
+def release(blocks):
+    """Closes and removes shared memory blocks"""
+    for block in blocks:
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedArraysHandle(object):
+    """
+    Picklable description of the blocks of a SharedArrays: name, block name, dtype and shape of every array
+    """
+
+    def __init__(self, specs):
+        self.specs = specs
+
+    def names(self):
+        return [spec[0] for spec in self.specs]
+
+
+class SharedArrays(object):
+    """
+    Arrays copied into shared memory blocks, owned by the process that created them
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: Name and array, e.g. weather columns, sun positions, schedules or solar gains
+        :type arrays: dict
+        """
+        self.blocks = []
+        specs = []
+        try:
+            for name, values in arrays.items():
+                values = np.ascontiguousarray(values)
+                if values.dtype.hasobject:
+                    raise ValueError('%s has dtype object, which cannot be shared' % name)
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self.blocks.append(block)
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+                specs.append((name, block.name, values.dtype.str, values.shape))
+        except Exception:
+            release(self.blocks)
+            raise
+
+        self.handle = SharedArraysHandle(specs)
+        self.finalizer = weakref.finalize(self, release, self.blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Removes the blocks. Workers must not use their views afterwards"""
+        self.finalizer()
+
+
+def attach(handle):
+    """
+    Opens the arrays of a SharedArrays in this process
+
+    :param handle: SharedArrays.handle
+    :type handle: SharedArraysHandle
+    :return: Name and read-only view of every array
+    :rtype: dict
+    """
+    arrays = {}
+    for name, block_name, dtype, shape in handle.specs:
+        block = attached_blocks.get(block_name)
+        if block is None:
+            if sys.version_info >= (3, 13):
+                # Only the owner removes the block
+                block = shared_memory.SharedMemory(block_name, track=False)
+            else:
+                block = shared_memory.SharedMemory(block_name)
+            attached_blocks[block_name] = block
+        values = np.ndarray(shape, dtype, buffer=block.buf)
+        values.flags.writeable = False
+        arrays[name] = values
+    return arrays
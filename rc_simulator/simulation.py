@@ -0,0 +1,271 @@
+"""
+Simulation of a building over a series of timesteps, typically a whole year
+
+Instead of every script running its own hourly loop and appending the results to Python lists, simulate() takes
+the inputs for all timesteps as arrays, solves the building hour by hour and writes every output into preallocated
+NumPy buffers.
+
+HOW TO USE
+
+::
+
+    from building_physics import Building
+    from simulation import simulate
+    office = Building()
+    results = simulate(office, t_out, solar_gains, internal_gains, illuminance, occupancy)
+    results['heating_demand']  # array with one value per hour
+    pd.DataFrame(results)  # All outputs as a DataFrame
+
+simulate() also accepts a building_batch.BuildingBatch, in which case every output has the shape
+(number of hours, number of buildings).
+
+For timesteps shorter than an hour, pass timestep to simulate() and interpolate the hourly inputs with
+interpolate_inputs().
+
+simulate_stream() runs simulate() over a series of input chunks, for inputs that are too long to hold at once. With
+a sink from results_writer, the results are written to disk in blocks instead of being returned.
+
+For buildings that float freely most of the time, state_space.simulate_state_space() returns the same results and
+only solves the hours with heating or cooling demand step by step.
+
+If the optional compiled kernel is built (see build_kernel.py), a Building with built-in supply and emission
+systems and the standard solver is solved by rc_kernel in C. Otherwise, or with use_kernel=False, the pure Python
+Building is used.
+
+"""
+
+import itertools
+import operator
+import numpy as np
+from building_physics import Building
+from building_batch import BuildingBatch
+
+try:
+    import rc_kernel
+except ImportError:
+    # The compiled kernel is optional, see build_kernel.py
+    rc_kernel = None
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Building attributes that are stored for every timestep
+OUTPUT_VARIABLES = ['t_air', 't_s', 't_m', 't_m_next', 'energy_demand', 'heating_demand', 'heating_energy',
+                    'heating_sys_electricity', 'heating_sys_fossils', 'cooling_demand', 'cooling_energy',
+                    'cooling_sys_electricity', 'cooling_sys_fossils', 'electricity_out', 'sys_total_energy', 'cop']
+
+
+def as_hourly(values, shape):
+    """
+    Converts an input to an array that broadcasts to (number of hours,) + shape. A series with one value per hour
+    is shared by all buildings of a batch
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1 and shape:
+        values = values[:, np.newaxis]
+    return values
+
+
+def interpolate_inputs(values, timestep, kind='linear'):
+    """
+    Interpolates hourly inputs, e.g. weather columns, solar gains or schedules, to a finer timestep
+
+    :param values: One value per hour, or an array of shape (number of hours, number of buildings)
+    :type values: array
+    :param timestep: Length of the new timesteps [h], e.g. 0.25 for 15 minutes
+    :type timestep: float
+    :param kind: 'linear' between the values of consecutive hours, or 'hold' to repeat the value of each hour, e.g.
+        for schedules. After the last hour, its value is held
+    :type kind: str
+    :return: values, one value per timestep, starting at the first hour
+    :rtype: numpy.ndarray
+    """
+    if kind not in ('linear', 'hold'):
+        raise ValueError('unknown kind of interpolation %s, choose linear or hold' % kind)
+    values = np.asarray(values, dtype=float)
+    n_hours = len(values)
+
+    # Position of every timestep in hours, rounded so that e.g. 12 steps of 1/12 h reach the next hour exactly
+    hours = np.arange(int(round(n_hours / timestep))) * timestep
+    index = np.minimum(np.floor(hours + 1e-9), n_hours - 1).astype(int)
+    if kind == 'hold':
+        return values[index]
+
+    following = np.minimum(index + 1, n_hours - 1)
+    weight = np.clip(hours - index, 0.0, 1.0).reshape((-1,) + (1,) * (values.ndim - 1))
+    return values[index] * (1.0 - weight) + values[following] * weight
+
+
+def kernel_supports(building, outputs):
+    """
+    Checks whether the compiled kernel is built and can solve the building: a plain Building with the standard
+    solver, which the kernel implements, whose supply and emission systems have static data, and only outputs that
+    the kernel stores
+
+    :rtype: bool
+    """
+    return (rc_kernel is not None and type(building) is Building and building.solver == 'standard' and
+            building.heating_emission_system_precompiled is not None and
+            building.heating_supply_system_precompiled is not None and
+            building.cooling_supply_system_precompiled is not None and
+            set(outputs) <= set(rc_kernel.OUTPUTS))
+
+
+def simulate_kernel(building, inputs, t_m_prev, outputs):
+    """
+    Runs the hourly loop of simulate() in the compiled kernel
+
+    :param inputs: t_out, solar_gains, internal_gains and optionally illuminance and occupancy, one value per hour
+    :type inputs: list of arrays
+    :return: results, a dictionary of output name and array of values
+    :rtype: dict
+    """
+    inputs = [np.ascontiguousarray(values) for values in inputs]
+    inputs += [None] * (5 - len(inputs))
+    table = np.empty((len(rc_kernel.OUTPUTS), len(inputs[0])))
+    rc_kernel.simulate_building(building, *inputs, t_m_prev=float(t_m_prev), table=table)
+
+    results = dict(zip(rc_kernel.OUTPUTS, table))
+    if table.shape[1]:
+        # Keep the state after the last timestep, as the Python loop does
+        for output in set(outputs) | {'t_m_next'}:
+            setattr(building, output, results[output][-1].item())
+    return {output: results[output] for output in outputs}
+
+
+def simulate(building, t_out, solar_gains, internal_gains, illuminance=None, occupancy=None, t_m_prev=20.0,
+             outputs=OUTPUT_VARIABLES, use_kernel=True, sink=None, timestep=None):
+    """
+    Solves the energy (and lighting) demand of a building for every timestep of the input arrays
+
+    :param building: The building to simulate. Its state after the last timestep is kept
+    :type building: building_physics.Building or building_batch.BuildingBatch
+    :param t_out: Outdoor air temperature for every timestep [C]. For a batch, all inputs can either be one
+        series shared by all buildings or have the shape (number of hours, number of buildings)
+    :type t_out: array
+    :param solar_gains: Solar heat gains after transmitting through the window [W]
+    :type solar_gains: array or float
+    :param internal_gains: Internal heat gains from people and appliances [W]
+    :type internal_gains: array or float
+    :param illuminance: Illuminance transmitted through the window [Lumens]. The lighting demand is only
+        calculated if illuminance and occupancy are given
+    :type illuminance: array or float
+    :param occupancy: Probability of full occupancy
+    :type occupancy: array or float
+    :param t_m_prev: Thermal mass temperature before the first timestep [C]
+    :type t_m_prev: float or array
+    :param outputs: Names of the building attributes to store for every timestep
+    :type outputs: list of str
+    :param use_kernel: Use the compiled kernel if it is built and supports the building
+    :type use_kernel: bool
+    :param sink: Results sink, see results_writer. The building is then simulated in blocks of sink.block_size
+        timesteps that are passed to the sink, so that the results of only one block are held in memory. The
+        default block size of a sink shrinks with the number of buildings of a batch
+    :type sink: results_writer.ResultsSink
+    :param timestep: Length of the timesteps [h], e.g. 0.25 for 15 minutes, see interpolate_inputs. Either one
+        value, which is assigned to building.timestep, or one value per timestep for variable timesteps. Defaults
+        to building.timestep
+    :type timestep: float or array
+
+    :return: results, a dictionary of output name and array of values, plus lighting_demand if calculated. None
+        if the results are passed to a sink
+    :rtype: dict
+    """
+
+    shape = (building.n,) if isinstance(building, BuildingBatch) else ()
+    t_out = np.asarray(t_out, dtype=float)
+    n_hours = len(t_out)
+
+    inputs = [t_out, solar_gains, internal_gains]
+    has_lighting = illuminance is not None and occupancy is not None
+    if has_lighting:
+        inputs += [illuminance, occupancy]
+    inputs = [np.broadcast_to(as_hourly(values, shape), (n_hours,) + shape) for values in inputs]
+
+    variable_timestep = np.ndim(timestep) > 0
+    if variable_timestep:
+        timestep = np.broadcast_to(np.asarray(timestep, dtype=float), (n_hours,))
+    elif timestep is not None:
+        building.timestep = float(timestep)
+
+    if sink is not None:
+        block_size = sink.fit_block_size(len(outputs) + has_lighting, shape)
+        for start in range(0, n_hours, block_size):
+            block = [values[start:start + block_size] for values in inputs]
+            block_timestep = timestep[start:start + block_size] if variable_timestep else timestep
+            sink.write(simulate(building, *block, t_m_prev=t_m_prev, outputs=outputs, use_kernel=use_kernel,
+                                timestep=block_timestep))
+            t_m_prev = building.t_m_next
+        return None
+
+    outputs = list(outputs)
+    if has_lighting:
+        outputs.append('lighting_demand')
+
+    if use_kernel and not variable_timestep and kernel_supports(building, outputs):
+        return simulate_kernel(building, inputs, t_m_prev, outputs)
+
+    if not shape:
+        # Iterating over Python floats is considerably faster than indexing NumPy arrays
+        inputs = [values.tolist() for values in inputs]
+    if not has_lighting:
+        inputs += [itertools.repeat(None), itertools.repeat(None)]
+    # The coefficients of each distinct timestep are calculated once, see building_physics.TimestepParameter
+    inputs.append(timestep.tolist() if variable_timestep else itertools.repeat(None))
+
+    # One contiguous buffer per output variable, filled column by column
+    table = np.empty((len(outputs), n_hours) + shape)
+    get_outputs = operator.attrgetter(*outputs)
+
+    for hour, (t, sg, ig, ill, occ, dt) in enumerate(zip(*inputs)):
+        if dt is not None:
+            building.timestep = dt
+        building.solve_building_energy(internal_gains=ig, solar_gains=sg, t_out=t, t_m_prev=t_m_prev)
+        if has_lighting:
+            building.solve_building_lighting(ill, occ)
+
+        table[:, hour] = get_outputs(building)
+        t_m_prev = building.t_m_next
+
+    return dict(zip(outputs, table))
+
+
+def simulate_stream(building, chunks, t_m_prev=20.0, **kwargs):
+    """
+    Simulates a building over a series of input chunks, e.g. one year of a long climate file at a time, carrying the
+    thermal mass temperature from one chunk to the next. Only one chunk of inputs and results is held at a time
+
+    HOW TO USE
+
+    ::
+
+        def inputs(weather_path):
+            for chunk in weather.iter_epw(weather_path, chunk_size=8760):
+                yield {'t_out': chunk['drybulb_C'], 'solar_gains': ..., 'internal_gains': ...}
+
+        for results in simulate_stream(office, inputs('climate_2020_2050.epw')):
+            annual_heating.append(results['heating_demand'].sum())
+
+    :param building: The building to simulate
+    :type building: building_physics.Building or building_batch.BuildingBatch
+    :param chunks: Keyword arguments of simulate() for each chunk, at least t_out, solar_gains and internal_gains
+    :type chunks: iterable of dict
+    :param t_m_prev: Thermal mass temperature before the first timestep [C]
+    :type t_m_prev: float or array
+    :param kwargs: Further arguments of simulate() that are the same for all chunks, e.g. outputs
+    :return: Generator of the results of each chunk, see simulate()
+    :rtype: generator
+    """
+    for chunk in chunks:
+        arguments = dict(kwargs, **chunk)
+        results = simulate(building, t_m_prev=t_m_prev, **arguments)
+        t_m_prev = building.t_m_next
+        yield results
@@ -0,0 +1,258 @@
+"""
+State-space form of the 5R1C model for free-floating periods, in which the building is neither heated nor cooled
+
+Without heating or cooling, the Crank-Nicolson equations (C.4) - (C.11) of the Building class are a linear time
+invariant system. Its only state is the thermal mass temperature t_m_prev and its inputs are t_out, internal_gains
+and solar_gains:
+
+    t_m_next = A * t_m_prev + B . [t_out, internal_gains, solar_gains]
+    [t_m_next, t_m, t_s, t_air] = C * t_m_prev + D . [t_out, internal_gains, solar_gains]
+
+StateSpace.propagate() advances many hours at once as a product with the lower triangular matrix of powers of A,
+one block of hours at a time. simulate_state_space() propagates the building in such blocks until the free-floating
+air temperature leaves the set point band, solves those hours step by step with Building.solve_building_energy()
+and returns to the blocks once the building floats freely again. The results are those of simulation.simulate() up
+to rounding, which only matters if the air temperature lies on a set point to the last digits.
+
+calc_periodic_t_m_prev() uses the model to find a start value of the thermal mass temperature for a repeating
+series of inputs, which replaces the usual t_m_prev = 20 and a warm-up year.
+
+HOW TO USE
+
+::
+
+    from state_space import StateSpace, simulate_state_space
+    model = StateSpace(Greenhouse)
+    model.A, model.B, model.C, model.D
+    t_m_next, nodes = model.propagate(20.0, t_out, internal_gains, solar_gains)
+
+    results = simulate_state_space(Greenhouse, t_out, solar_gains, internal_gains)  # As simulation.simulate()
+
+    t_m_prev = calc_periodic_t_m_prev(Office, t_out, solar_gains, internal_gains)
+    results = simulate(Office, t_out, solar_gains, internal_gains, t_m_prev=t_m_prev)
+
+"""
+
+import copy
+import operator
+import numpy as np
+from simulation import OUTPUT_VARIABLES
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Inputs and node temperatures of the state-space model, in the order of the columns of B, D and the rows of C, D
+INPUTS = ['t_out', 'internal_gains', 'solar_gains']
+NODES = ['t_m_next', 't_m', 't_s', 't_air']
+
+
+class StateSpace(object):
+    """
+    Free-floating 5R1C model of a Building as discrete state-space system, with the timestep of the building
+    """
+
+    def __init__(self, building, block_size=168):
+        """
+        :param building: The building, whose current parameters are used
+        :type building: building_physics.Building
+        :param block_size: Number of hours that propagate() advances with one matrix product
+        :type block_size: int
+        """
+        c = building.coefficients
+        t_out = np.array([1.0, 0.0, 0.0])
+
+        # Heat flows to the air, surface and mass node per unit of each input (C.1) - (C.3)
+        phi_ia = np.array([0.0, 0.5, 0.0])
+        phi_st = c.phi_st_factor * np.array([0.0, 0.5, 1.0])
+        phi_m = c.phi_m_factor * np.array([0.0, 0.5, 1.0])
+
+        # (C.5) and (C.4)
+        phi_m_tot = phi_m + c.h_tr_em * t_out + c.h_tr_3 * (phi_st + c.h_tr_w * t_out + c.h_tr_1 *
+                                                            (phi_ia / c.h_ve_adj + t_out)) / c.h_tr_2
+        a = c.t_m_prev_factor / c.t_m_next_denominator
+        b = phi_m_tot / c.t_m_next_denominator
+
+        # (C.9), (C.10) and (C.11), as factors of t_m_prev and of the inputs
+        c_m, d_m = (a + 1.0) / 2.0, b / 2.0
+        c_s = c.h_tr_ms * c_m / c.t_s_denominator
+        d_s = (c.h_tr_ms * d_m + phi_st + c.h_tr_w * t_out + c.h_tr_1 * (t_out + phi_ia / c.h_ve_adj)) / \
+            c.t_s_denominator
+        c_air = c.h_tr_is * c_s / c.t_air_denominator
+        d_air = (c.h_tr_is * d_s + c.h_ve_adj * t_out + phi_ia) / c.t_air_denominator
+
+        self.A = np.array([[a]])
+        self.B = b[np.newaxis, :]
+        self.C = np.array([[a], [c_m], [c_s], [c_air]])
+        self.D = np.vstack([b, d_m, d_s, d_air])
+
+        # propagator[k, j] = A ** (k - j) for j <= k, and A ** (k + 1) for the initial state
+        exponents = np.subtract.outer(np.arange(block_size), np.arange(block_size))
+        self.propagator = np.where(exponents >= 0, a ** np.maximum(exponents, 0), 0.0)
+        self.initial_powers = a ** np.arange(1, block_size + 1)
+        self.block_size = block_size
+
+    def propagate(self, t_m_prev, t_out, internal_gains, solar_gains):
+        """
+        Advances the free-floating building over consecutive hours
+
+        :param t_m_prev: Thermal mass temperature before the first hour [C]
+        :type t_m_prev: float
+        :param t_out: Outdoor air temperature for every hour [C]
+        :type t_out: array
+        :param internal_gains: Internal heat gains for every hour [W]
+        :type internal_gains: array or float
+        :param solar_gains: Solar heat gains for every hour [W]
+        :type solar_gains: array or float
+        :return: t_m_next, the thermal mass temperature after every hour, and nodes, the temperatures of NODES for
+            every hour with shape (number of hours, 4)
+        :rtype: tuple
+        """
+        t_out = np.asarray(t_out, dtype=float)
+        inputs = np.column_stack(np.broadcast_arrays(t_out, internal_gains, solar_gains)).astype(float)
+        forcing = inputs.dot(self.B[0])
+
+        t_m_next = np.empty(len(t_out))
+        state = t_m_prev
+        for start in range(0, len(t_out), self.block_size):
+            stop = min(start + self.block_size, len(t_out))
+            n = stop - start
+            t_m_next[start:stop] = self.initial_powers[:n] * state + \
+                self.propagator[:n, :n].dot(forcing[start:stop])
+            state = t_m_next[stop - 1]
+
+        states = np.concatenate([[t_m_prev], t_m_next[:-1]])
+        nodes = np.outer(states, self.C[:, 0]) + inputs.dot(self.D.T)
+        return t_m_next, nodes
+
+
+def simulate_state_space(building, t_out, solar_gains, internal_gains, illuminance=None, occupancy=None,
+                         t_m_prev=20.0, outputs=OUTPUT_VARIABLES, block_size=168):
+    """
+    Solves a building for every timestep like simulation.simulate(), with the free-floating hours propagated in
+    blocks by the state-space model and only the hours with heating or cooling demand solved step by step
+
+    :param building: The building to simulate. Its state after the last timestep is kept
+    :type building: building_physics.Building
+    :param block_size: Number of hours that are propagated at once
+    :type block_size: int
+    :return: results, a dictionary of output name and array of values, plus lighting_demand if calculated. See
+        simulation.simulate() for the other parameters
+    :rtype: dict
+    """
+    unknown = set(outputs) - set(OUTPUT_VARIABLES)
+    if unknown:
+        raise ValueError('outputs %s are not calculated for free-floating hours' % ', '.join(sorted(unknown)))
+
+    t_out = np.asarray(t_out, dtype=float)
+    n_hours = len(t_out)
+    solar_gains, internal_gains = [np.broadcast_to(np.asarray(values, dtype=float), (n_hours,))
+                                   for values in (solar_gains, internal_gains)]
+    model = StateSpace(building, block_size)
+
+    # Outputs that are zero, or nan for cop, while the building floats freely
+    outputs = list(outputs)
+    table = np.zeros((len(outputs), n_hours))
+    if 'cop' in outputs:
+        table[outputs.index('cop')] = np.nan
+    node_rows = [(outputs.index(node), column) for column, node in enumerate(NODES) if node in outputs]
+    get_outputs = operator.attrgetter(*outputs)
+
+    hour = 0
+    floating = False
+    while hour < n_hours:
+        stop = min(hour + block_size, n_hours)
+        t_m_next, nodes = model.propagate(t_m_prev, t_out[hour:stop], internal_gains[hour:stop],
+                                          solar_gains[hour:stop])
+
+        # Free floating until the first hour outside the set point band, as in Building.has_demand()
+        t_air = nodes[:, 3]
+        demand = np.flatnonzero((t_air < building.t_set_heating) | (t_air > building.t_set_cooling))
+        n_free = demand[0] if len(demand) else stop - hour
+        for row, column in node_rows:
+            table[row, hour:hour + n_free] = nodes[:n_free, column]
+        if n_free:
+            t_m_prev = t_m_next[n_free - 1]
+            floating = True
+        hour += n_free
+
+        # Step by step while the building is heated or cooled
+        while len(demand) and hour < n_hours:
+            building.solve_building_energy(internal_gains[hour], solar_gains[hour], t_out[hour], t_m_prev)
+            table[:, hour] = get_outputs(building)
+            t_m_prev = building.t_m_next
+            floating = False
+            hour += 1
+            if not building.has_heating_demand and not building.has_cooling_demand:
+                break
+
+    results = dict(zip(outputs, table))
+    if floating:
+        # Keep the state after the last timestep, as simulate() does
+        for output, values in results.items():
+            setattr(building, output, values[-1].item())
+        building.t_m_next = t_m_prev
+        building.has_heating_demand = building.has_cooling_demand = False
+
+    if illuminance is not None and occupancy is not None:
+        lux = np.asarray(illuminance, dtype=float) * building.lighting_utilisation_factor * \
+            building.lighting_maintenance_factor / building.floor_area
+        results['lighting_demand'] = np.broadcast_to(np.where(
+            (lux < building.lighting_control) & (np.asarray(occupancy) > 0),
+            building.lighting_load * building.floor_area, 0.0), (n_hours,)).astype(float)
+    return results
+
+
+def calc_periodic_t_m_prev(building, t_out, solar_gains, internal_gains, refinements=2, tolerance=1e-3):
+    """
+    Thermal mass temperature before the first timestep that is consistent with the inputs, in place of an arbitrary
+    start value and a warm-up year
+
+    The inputs are assumed to repeat, e.g. a typical year, so the mass temperature after the last timestep equals
+    the one before the first. For the free-floating model this periodic condition is solved exactly. Each refinement
+    pass then simulates, with heating and cooling, the last hours of the inputs that still affect the mass
+    temperature at their end, and takes that temperature as start value
+
+    :param building: The building, which is not changed
+    :type building: building_physics.Building
+    :param refinements: Largest number of refinement passes with heating and cooling
+    :type refinements: int
+    :param tolerance: Change of the start value below which the refinement stops [C]
+    :type tolerance: float
+    :return: t_m_prev, the thermal mass temperature before the first timestep [C]. See simulation.simulate() for
+        the other parameters
+    :rtype: float
+    """
+    t_out = np.asarray(t_out, dtype=float)
+    n_hours = len(t_out)
+    solar_gains, internal_gains = [np.broadcast_to(np.asarray(values, dtype=float), (n_hours,))
+                                   for values in (solar_gains, internal_gains)]
+    model = StateSpace(building)
+    a = model.A[0, 0]
+
+    # Free floating: t_m after n_hours is a ** n_hours * t_m_prev + (response to the inputs from 0 C)
+    response = model.propagate(0.0, t_out, internal_gains, solar_gains)[0][-1]
+    t_m_prev = response / (1.0 - a ** n_hours)
+
+    # The mass temperature forgets its start value within the hours in which |a| ** hours falls below 1e-4
+    with np.errstate(divide='ignore'):
+        memory = min(n_hours, max(1, int(np.ceil(np.log(1e-4) / np.log(abs(a))))))
+    start = n_hours - memory
+    building = copy.deepcopy(building)
+    for _ in range(refinements):
+        t_m_start = model.propagate(t_m_prev, t_out[:start], internal_gains[:start],
+                                    solar_gains[:start])[0][-1] if start else t_m_prev
+        simulate_state_space(building, t_out[start:], solar_gains[start:], internal_gains[start:],
+                             t_m_prev=t_m_start, outputs=['t_m_next'])
+        change = abs(building.t_m_next - t_m_prev)
+        t_m_prev = building.t_m_next
+        if change < tolerance:
+            break
+    return t_m_prev
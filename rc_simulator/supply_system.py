@@ -17,6 +17,7 @@ __maintainer__ = "Prageeth Jayathissa"
 __email__ = "jayathissa@arch.ethz.ch"
 __status__ = "production"
 
+import numpy as np
 
 
 # This is one layer of abstraction too many, however it is kept for future explansion of the supply system
@@ -46,9 +47,28 @@ class SupplyDirector:
 class SupplySystemBase:
 
     """
-     The base class in which Supply systems are built from 
+     The base class in which Supply systems are built from
+
+     A system is described by static class data, which Building reads once (see precompile) so that no director
+     or system instances have to be created for every timestep:
+     fossils_efficiency: Heat delivered per unit of fossil fuel, None if the system uses no fossil fuel
+     electricity_efficiency: Heat delivered per unit of electricity, None if the system uses no electricity
+     electricity_out_ratio: Electricity produced per unit of fossil fuel (e.g. CHP)
+     cop_coefficients: (a, b, c) of the heat pump COP = a + b * deltaT + c * deltaT**2, None for other systems
+     heating_source_temperature: Reservoir temperature of a heat pump when heating, None to use t_out
+     cooling_sink_temperature: Reservoir temperature of a heat pump when cooling, None to use t_out
+
+     Systems that need more than that can still override calc_loads(), they are then called through the
+     SupplyDirector
     """
 
+    fossils_efficiency = None
+    electricity_efficiency = None
+    electricity_out_ratio = 0
+    cop_coefficients = None
+    heating_source_temperature = None
+    cooling_sink_temperature = None
+
     def __init__(self, load, t_out, heating_supply_temperature, cooling_supply_temperature, has_heating_demand, has_cooling_demand):
         self.load = load  # Energy Demand of the building at that time step
         self.t_out = t_out  # Outdoor Air Temperature
@@ -58,11 +78,18 @@ class SupplySystemBase:
         self.has_heating_demand = has_heating_demand
         self.has_cooling_demand = has_cooling_demand
 
-    def calc_loads(self): pass
-    """
-    Caculates the electricty / fossil fuel consumption of the set supply system
-    If the system also generates electricity, then this is stored as electricity_out
-    """
+    def calc_loads(self):
+        """
+        Caculates the electricty / fossil fuel consumption of the set supply system
+        If the system also generates electricity, then this is stored as electricity_out
+        """
+        system = SupplyOut()
+        system.electricity_in, system.fossils_in, system.electricity_out, cop = calc_precompiled_loads(
+            precompile(self.__class__, force=True), self.load, self.t_out, self.heating_supply_temperature,
+            self.cooling_supply_temperature, self.has_heating_demand, self.has_cooling_demand)
+        if cop is not None:
+            system.cop = cop
+        return system
 
 
 class OilBoilerOld(SupplySystemBase):
@@ -71,12 +98,7 @@ class OilBoilerOld(SupplySystemBase):
     No condensation, pilot light
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.fossils_in = self.load / 0.63
-        system.electricity_in = 0
-        system.electricity_out = 0
-        return system
+    fossils_efficiency = 0.63
 
 
 class OilBoilerMed(SupplySystemBase):
@@ -85,12 +107,7 @@ class OilBoilerMed(SupplySystemBase):
     No condensation, but better nozzles etc.
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.fossils_in = self.load / 0.82
-        system.electricity_in = 0
-        system.electricity_out = 0
-        return system
+    fossils_efficiency = 0.82
 
 
 class OilBoilerNew(SupplySystemBase):
@@ -99,12 +116,7 @@ class OilBoilerNew(SupplySystemBase):
     Condensation boiler, latest generation
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.fossils_in = self.load / 0.98
-        system.electricity_in = 0
-        system.electricity_out = 0
-        return system
+    fossils_efficiency = 0.98
 
 
 class HeatPumpAir(SupplySystemBase):
@@ -118,30 +130,8 @@ class HeatPumpAir(SupplySystemBase):
     TODO: Validate this methodology
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-
-        if self.has_heating_demand:
-            # determine the temperature difference, if negative, set to 0
-            deltaT = max(0, self.heating_supply_temperature - self.t_out)
-            # Eq (4) in Staggell et al.
-            system.cop = 6.81 - 0.121 * deltaT + 0.000630 * deltaT**2
-            system.electricity_in = self.load / system.cop
-
-        elif self.has_cooling_demand:
-            # determine the temperature difference, if negative, set to 0
-            deltaT = max(0, self.t_out - self.cooling_supply_temperature)
-            # Eq (4) in Staggell et al.
-            system.cop = 6.81 - 0.121 * deltaT + 0.000630 * deltaT**2
-            system.electricity_in = self.load / system.cop
-
-        else:
-            raise ValueError(
-                'HeatPumpAir called although there is no heating/cooling demand')
-
-        system.fossils_in = 0
-        system.electricity_out = 0
-        return system
+    # Eq (4) in Staggell et al.
+    cop_coefficients = (6.81, -0.121, 0.000630)
 
 
 class HeatPumpWater(SupplySystemBase):
@@ -156,24 +146,10 @@ class HeatPumpWater(SupplySystemBase):
         # TODO: Validate this methodology
     """
 
-
-    def calc_loads(self):
-        system = SupplyOut()
-        if self.has_heating_demand:
-            deltaT = max(0, self.heating_supply_temperature - 7.0)
-            # Eq (4) in Staggell et al.
-            system.cop = 8.77 - 0.150 * deltaT + 0.000734 * deltaT**2
-            system.electricity_in = self.load / system.cop
-
-        elif self.has_cooling_demand:
-            deltaT = max(0, 12.0 - self.cooling_supply_temperature)
-            # Eq (4) in Staggell et al.
-            system.cop = 8.77 - 0.150 * deltaT + 0.000734 * deltaT**2
-            system.electricity_in = self.load / system.cop
-
-        system.fossils_in = 0
-        system.electricity_out = 0
-        return system
+    # Eq (4) in Staggell et al.
+    cop_coefficients = (8.77, -0.150, 0.000734)
+    heating_source_temperature = 7.0
+    cooling_sink_temperature = 12.0
 
 
 class ElectricHeating(SupplySystemBase):
@@ -181,12 +157,7 @@ class ElectricHeating(SupplySystemBase):
     Straight forward electric heating. 100 percent conversion to heat.
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.electricity_in = self.load
-        system.fossils_in = 0
-        system.electricity_out = 0
-        return system
+    electricity_efficiency = 1.0
 
 
 class CHP(SupplySystemBase):
@@ -195,12 +166,8 @@ class CHP(SupplySystemBase):
     electrical fuel conversion. 93 percent overall
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.fossils_in = self.load / 0.6
-        system.electricity_in = 0
-        system.electricity_out = system.fossils_in * 0.33
-        return system
+    fossils_efficiency = 0.6
+    electricity_out_ratio = 0.33
 
 
 class DirectHeater(SupplySystemBase):
@@ -208,12 +175,7 @@ class DirectHeater(SupplySystemBase):
     Created by PJ to check accuracy against previous simulation
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.electricity_in = self.load
-        system.fossils_in = 0
-        system.electricity_out = 0
-        return system
+    electricity_efficiency = 1.0
 
 
 class DirectCooler(SupplySystemBase):
@@ -221,12 +183,64 @@ class DirectCooler(SupplySystemBase):
     Created by PJ to check accuracy against previous simulation
     """
 
-    def calc_loads(self):
-        system = SupplyOut()
-        system.electricity_in = self.load
-        system.fossils_in = 0
-        system.electricity_out = 0
-        return system
+    electricity_efficiency = 1.0
+
+
+def precompile(system, force=False):
+    """
+    Resolves the static data of a supply system class, used by Building at construction
+
+    :param system: Supply system class
+    :param force: Return the static data even if the class overrides calc_loads()
+    :return: (cop_coefficients, heating_source_temperature, cooling_sink_temperature, fossils_efficiency,
+        electricity_efficiency, electricity_out_ratio), or None if the class overrides calc_loads() and has to be
+        called through the SupplyDirector
+    :rtype: tuple
+    """
+    if not force and getattr(system, 'calc_loads', None) is not SupplySystemBase.calc_loads:
+        return None
+
+    return (system.cop_coefficients, system.heating_source_temperature, system.cooling_sink_temperature,
+            system.fossils_efficiency, system.electricity_efficiency, system.electricity_out_ratio)
+
+
+def calc_precompiled_loads(precompiled, load, t_out, heating_supply_temperature, cooling_supply_temperature,
+                           has_heating_demand, has_cooling_demand):
+    """
+    Calculates the electricity / fossil fuel consumption of a supply system from its static data.
+    Works for single values and for arrays of buildings (see building_batch)
+
+    :return: electricity_in, fossils_in, electricity_out, cop (None if the system is not a heat pump)
+    :rtype: tuple
+    """
+    (cop_coefficients, heating_source_temperature, cooling_sink_temperature,
+     fossils_efficiency, electricity_efficiency, electricity_out_ratio) = precompiled
+
+    if cop_coefficients is not None:
+        if has_heating_demand:
+            if heating_source_temperature is None:
+                heating_source_temperature = t_out
+            # determine the temperature difference, if negative, set to 0
+            # np.maximum so that the load can also be an array of buildings
+            deltaT = np.maximum(0, heating_supply_temperature - heating_source_temperature)
+
+        elif has_cooling_demand:
+            if cooling_sink_temperature is None:
+                cooling_sink_temperature = t_out
+            deltaT = np.maximum(0, cooling_sink_temperature - cooling_supply_temperature)
+
+        else:
+            raise ValueError(
+                'Heat pump called although there is no heating/cooling demand')
+
+        cop = cop_coefficients[0] + cop_coefficients[1] * deltaT + cop_coefficients[2] * deltaT**2
+        return load / cop, 0, 0, cop
+
+    if fossils_efficiency is not None:
+        fossils_in = load / fossils_efficiency
+        return 0, fossils_in, fossils_in * electricity_out_ratio, None
+
+    return load / electricity_efficiency, 0, 0, None
 
 
 class SupplyOut:
@@ -0,0 +1,166 @@
+"""
+Parameter sweeps over many variants of a Building, run in chunks on a pool of worker processes
+
+Every sample is a dictionary of Building arguments (u_walls, u_windows, window_area, ach_vent,
+thermal_capacitance_per_floor_area, heating_supply_system, ...). The samples are split into chunks, and each chunk
+is simulated as one building_batch.BuildingBatch in a worker process, where a kpi.KPIAggregator reduces the hourly
+results to a summary per sample.
+
+The weather and gains are the same for all samples. Their arrays are published once into shared memory (see
+shared_arrays), which every worker attaches to when it starts, so the tasks themselves only carry the samples of
+their chunk.
+
+HOW TO USE
+
+::
+
+    import sweep
+    samples = sweep.parameter_grid(u_walls=[0.2, 0.4, 0.8], u_windows=[0.8, 1.6],
+                                   heating_supply_system=[supply_system.OilBoilerMed, supply_system.HeatPumpAir])
+    summaries = sweep.run_sweep(samples, t_out, solar_gains, internal_gains)
+    summaries[0]['heating_demand_sum']  # Summary of samples[0]
+
+    # Or straight into a result store
+    with ResultWriter('study.sqlite') as writer:
+        sweep.run_sweep(samples, t_out, solar_gains, internal_gains, writer=writer)
+
+"""
+
+import copy
+import itertools
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from building_physics import Building
+from building_batch import BuildingBatch
+from simulation import simulate
+import kpi
+from shared_arrays import SharedArrays, attach
+
+
+__authors__ = "Prageeth Jayathissa"
+__copyright__ = "Copyright 2016, Architecture and Building Systems - ETH Zurich"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Prageeth Jayathissa"
+__email__ = "p.jayathissa@gmail.com"
+__status__ = "production"
+
+
+# Summary of every sample if no statistics are given: annual energy in kWh and peak loads in W. Cooling loads are
+# negative, so their peak is the minimum
+DEFAULT_STATISTICS = [kpi.Sum('heating_demand', scale=0.001), kpi.Sum('cooling_demand', scale=0.001),
+                      kpi.Sum('heating_energy', scale=0.001), kpi.Sum('cooling_energy', scale=0.001),
+                      kpi.Maximum('heating_demand'), kpi.Minimum('cooling_demand')]
+
+# Inputs of simulate() that are published into shared memory if they are arrays
+ARRAY_INPUTS = ['t_out', 'solar_gains', 'internal_gains', 'illuminance', 'occupancy', 'time_index']
+
+# Inputs shared by all chunks of a sweep, set in every worker process by init_worker
+worker_inputs = None
+
+
+def parameter_grid(**values):
+    """
+    All combinations of the values of some Building arguments
+
+    :param values: Argument name and list of values, e.g. u_walls=[0.2, 0.4]
+    :return: samples, one dictionary of arguments per combination
+    :rtype: list of dict
+    """
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+def init_worker(inputs, handle=None):
+    """
+    Stores the shared inputs of a sweep in a worker process
+
+    :param inputs: Keyword arguments of simulate() and the statistics, see run_sweep
+    :type inputs: dict
+    :param handle: Handle of further inputs in shared memory
+    :type handle: shared_arrays.SharedArraysHandle
+    """
+    global worker_inputs
+    worker_inputs = dict(inputs)
+    if handle is not None:
+        worker_inputs.update(attach(handle))
+
+
+def run_chunk(samples):
+    """
+    Simulates the samples of one chunk as a BuildingBatch with the shared inputs of the worker
+
+    :param samples: Building arguments of every sample
+    :type samples: list of dict
+    :return: summaries, one dictionary of statistics per sample
+    :rtype: list of dict
+    """
+    inputs = dict(worker_inputs)
+    statistics = copy.deepcopy(inputs.pop('statistics'))
+    time_index = inputs.pop('time_index')
+    outputs = sorted(set(statistic.output for statistic in statistics) - {'lighting_demand'})
+
+    batch = BuildingBatch([Building(**sample) for sample in samples])
+    aggregator = kpi.KPIAggregator(statistics, time_index=time_index)
+    simulate(batch, outputs=outputs, sink=aggregator, **inputs)
+    return [aggregator.results(building) for building in range(len(samples))]
+
+
+def run_sweep(samples, t_out, solar_gains, internal_gains, illuminance=None, occupancy=None, t_m_prev=20.0,
+              statistics=None, time_index=None, chunk_size=256, max_workers=None, writer=None):
+    """
+    Simulates every sample and summarises its results
+
+    :param samples: Building arguments of every sample, e.g. from parameter_grid
+    :type samples: list of dict
+    :param t_out: Outdoor air temperature for every timestep [C], shared by all samples. The other inputs are as in
+        simulation.simulate()
+    :type t_out: array
+    :param statistics: Statistics of the summary, see kpi. Defaults to DEFAULT_STATISTICS
+    :type statistics: list of kpi.Statistic
+    :param time_index: Start time of every timestep, needed for monthly sums and the time of maxima
+    :type time_index: numpy.ndarray
+    :param chunk_size: Number of samples that a worker simulates as one batch
+    :type chunk_size: int
+    :param max_workers: Number of worker processes. Defaults to the number of CPUs. With 1, the samples are
+        simulated in this process
+    :type max_workers: int
+    :param writer: If given, the parameters and summary of every sample are put into this writer, in the order of
+        the samples and with the next free run_id, so several sweeps can be written into one study
+    :type writer: result_store.ResultWriter
+    :return: summaries, one dictionary of statistics per sample, in the order of the samples
+    :rtype: list of dict
+    """
+    inputs = {'t_out': np.asarray(t_out, dtype=float), 'solar_gains': solar_gains, 'internal_gains': internal_gains,
+              'illuminance': illuminance, 'occupancy': occupancy, 't_m_prev': t_m_prev,
+              'statistics': DEFAULT_STATISTICS if statistics is None else statistics, 'time_index': time_index}
+    samples = list(samples)
+    chunks = [samples[start:start + chunk_size] for start in range(0, len(samples), chunk_size)]
+
+    if max_workers is None:
+        max_workers = multiprocessing.cpu_count()
+    max_workers = max(1, min(max_workers, len(chunks)))
+
+    if max_workers == 1:
+        init_worker(inputs)
+        chunk_summaries = map(run_chunk, chunks)
+    else:
+        arrays = {name: np.asarray(inputs.pop(name)) for name in ARRAY_INPUTS if np.ndim(inputs[name]) > 0}
+        shared = SharedArrays(arrays)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers, initializer=init_worker,
+                                                          initargs=(inputs, shared.handle))
+        chunk_summaries = executor.map(run_chunk, chunks)
+
+    try:
+        summaries = []
+        for summary in itertools.chain.from_iterable(chunk_summaries):
+            if writer is not None:
+                writer.put(samples[len(summaries)], summary=summary)
+            summaries.append(summary)
+    finally:
+        if max_workers > 1:
+            executor.shutdown()
+            shared.close()
+    return summaries
@@ -0,0 +1,108 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+import numpy as np
+from building_physics import Building  # Importing Building Class
+from building_batch import BuildingBatch
+import supply_system
+import emission_system
+
+
+def make_buildings():
+    """A set of buildings that covers all supply and emission systems, and capped and uncapped demands"""
+    return [
+        Building(),
+        Building(window_area=13.5, external_envelope_area=15.19, room_depth=7, room_width=4.9, room_height=3.1,
+                 ventilation_efficiency=0, max_cooling_energy_per_floor_area=-12,
+                 max_heating_energy_per_floor_area=12,
+                 heating_supply_system=supply_system.DirectHeater,
+                 cooling_supply_system=supply_system.DirectCooler,
+                 heating_emission_system=emission_system.AirConditioning),
+        Building(u_walls=0.5, u_windows=2.5, heating_supply_system=supply_system.HeatPumpWater,
+                 cooling_supply_system=supply_system.HeatPumpWater,
+                 heating_emission_system=emission_system.FloorHeating),
+        Building(thermal_capacitance_per_floor_area=300000, heating_supply_system=supply_system.HeatPumpAir,
+                 heating_emission_system=emission_system.TABS),
+        Building(ach_vent=3.0, heating_supply_system=supply_system.CHP,
+                 heating_emission_system=emission_system.OldRadiators,
+                 max_heating_energy_per_floor_area=5),
+        Building(t_set_heating=18.0, t_set_cooling=24.0, heating_supply_system=supply_system.OilBoilerOld,
+                 cooling_supply_system=supply_system.DirectCooler,
+                 heating_emission_system=emission_system.ChilledBeams),
+        Building(heating_supply_system=supply_system.OilBoilerNew),
+        Building(heating_supply_system=supply_system.ElectricHeating,
+                 heating_emission_system=emission_system.NewRadiators,
+                 max_cooling_energy_per_floor_area=-3),
+    ]
+
+
+class TestBuildingBatch(unittest.TestCase):
+
+    outputs = ['t_air', 't_s', 't_m', 't_m_next', 'energy_demand', 'heating_demand', 'cooling_demand',
+               'heating_sys_electricity', 'heating_sys_fossils', 'cooling_sys_electricity', 'cooling_sys_fossils',
+               'electricity_out', 'sys_total_energy', 'heating_energy', 'cooling_energy', 'cop',
+               'has_heating_demand', 'has_cooling_demand']
+
+    def test_MatchesScalarModel(self):
+        buildings = make_buildings()
+        batch = BuildingBatch(make_buildings())
+
+        rng = np.random.RandomState(42)
+        n = len(buildings)
+        t_m_prev = np.full(n, 20.0)
+        t_m_prev_batch = t_m_prev.copy()
+        heating_hours = 0
+        cooling_hours = 0
+
+        for hour in range(200):
+            # A swing from summer to winter conditions
+            t_out = 10 + 20 * np.cos(2 * np.pi * hour / 200.0) + rng.uniform(-3, 3)
+            solar_gains = rng.uniform(0, 2000, n)
+            internal_gains = rng.uniform(0, 500, n)
+
+            batch.solve_building_energy(internal_gains, solar_gains, t_out, t_m_prev_batch)
+            for ii, building in enumerate(buildings):
+                building.solve_building_energy(internal_gains[ii], solar_gains[ii], t_out, t_m_prev[ii])
+
+                for output in self.outputs:
+                    np.testing.assert_allclose(getattr(batch, output)[ii], getattr(building, output),
+                                               rtol=1e-10, atol=1e-9, err_msg=output)
+
+                t_m_prev[ii] = building.t_m_next
+            t_m_prev_batch = batch.t_m_next
+
+            heating_hours += np.sum(batch.has_heating_demand)
+            cooling_hours += np.sum(batch.has_cooling_demand)
+
+        # The random inputs must have triggered both heating and cooling
+        self.assertGreater(heating_hours, 100)
+        self.assertGreater(cooling_hours, 100)
+
+    def test_DemandStates(self):
+        batch = BuildingBatch([Building(max_cooling_energy_per_floor_area=-12,
+                                        max_heating_energy_per_floor_area=12)] * 3)
+
+        batch.solve_building_energy(internal_gains=10, solar_gains=[2000, 0, 5000], t_out=[10, -10, 30],
+                                    t_m_prev=[22, 15, 25])
+
+        self.assertEqual(batch.has_heating_demand.tolist(), [False, True, False])
+        self.assertEqual(batch.has_cooling_demand.tolist(), [False, False, True])
+        self.assertEqual(batch.energy_demand[0], 0)
+        self.assertEqual(batch.energy_demand[1], 12 * batch.floor_area[1])
+        self.assertTrue(np.isnan(batch.cop[0]))
+
+    def test_Lighting(self):
+        batch = BuildingBatch([Building(), Building(lighting_control=0.0)])
+        batch.solve_building_lighting(illuminance=[1000, 1000], occupancy=0.1)
+
+        self.assertEqual(batch.lighting_demand[0], 11.7 * batch.floor_area[0])
+        self.assertEqual(batch.lighting_demand[1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
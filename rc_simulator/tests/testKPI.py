@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import numpy as np
+from building_physics import Building  # Importing Building Class
+from building_batch import BuildingBatch
+from radiation import Location
+from simulation import simulate
+import kpi
+
+
+class TestKPI(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        cls.time_index = Zurich.weather_data.time_index[:2000]
+        cls.t_out = np.asarray(Zurich.weather_data['drybulb_C'][:2000], dtype=float)
+        cls.solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][:2000], dtype=float) * 4.0
+        cls.internal_gains = np.tile(np.r_[np.zeros(8), np.full(10, 500.0), np.zeros(6)], 84)[:2000]
+
+    def statistics(self):
+        return [kpi.Sum('heating_demand', monthly=True, scale=0.001),
+                kpi.Maximum('heating_demand'),
+                kpi.Minimum('cooling_demand'),
+                kpi.ThresholdCount('t_air', lower=20.0, upper=26.0),
+                kpi.Histogram('t_air', bins=np.arange(10.0, 41.0))]
+
+    def test_Aggregator(self):
+        results = simulate(Building(), self.t_out, self.solar_gains, self.internal_gains)
+        aggregator = kpi.KPIAggregator(self.statistics(), time_index=self.time_index, block_size=500)
+        simulate(Building(), self.t_out, self.solar_gains, self.internal_gains, sink=aggregator)
+        kpis = aggregator.results()
+
+        heating = results['heating_demand']
+        self.assertAlmostEqual(kpis['heating_demand_sum'], heating.sum() / 1000.0)
+        months = self.time_index.astype('datetime64[M]')
+        self.assertEqual(list(kpis['heating_demand_monthly']), ['2013-01', '2013-02', '2013-03'])
+        self.assertAlmostEqual(kpis['heating_demand_monthly']['2013-02'],
+                               heating[months == np.datetime64('2013-02')].sum() / 1000.0)
+
+        self.assertEqual(kpis['heating_demand_max'], heating.max())
+        self.assertEqual(kpis['heating_demand_max_hour'], np.argmax(heating))
+        self.assertEqual(kpis['heating_demand_max_time'], self.time_index[np.argmax(heating)])
+
+        # Cooling loads are negative, their peak is the minimum
+        cooling = results['cooling_demand']
+        self.assertLess(cooling.min(), 0.0)
+        self.assertEqual(kpis['cooling_demand_min'], cooling.min())
+        self.assertEqual(kpis['cooling_demand_min_hour'], np.argmin(cooling))
+        self.assertEqual(kpis['cooling_demand_min_time'], self.time_index[np.argmin(cooling)])
+
+        t_air = results['t_air']
+        self.assertEqual(kpis['t_air_hours_outside'], np.count_nonzero((t_air < 20.0) | (t_air > 26.0)))
+        np.testing.assert_array_equal(kpis['t_air_histogram'], np.histogram(t_air, bins=np.arange(10.0, 41.0))[0])
+
+    def test_Batch(self):
+        def batch():
+            return BuildingBatch([Building(), Building(u_walls=0.8)])
+
+        results = simulate(batch(), self.t_out, self.solar_gains, self.internal_gains)
+        aggregator = kpi.KPIAggregator(self.statistics(), time_index=self.time_index, block_size=300)
+        simulate(batch(), self.t_out, self.solar_gains, self.internal_gains, sink=aggregator)
+        kpis = aggregator.results()
+
+        np.testing.assert_allclose(kpis['heating_demand_sum'], results['heating_demand'].sum(axis=0) / 1000.0)
+        np.testing.assert_array_equal(kpis['heating_demand_max_hour'], np.argmax(results['heating_demand'], axis=0))
+        np.testing.assert_array_equal(kpis['cooling_demand_min'], results['cooling_demand'].min(axis=0))
+        self.assertEqual(kpis['t_air_histogram'].shape, (2, 30))
+        np.testing.assert_array_equal(kpis['t_air_histogram'][1],
+                                      np.histogram(results['t_air'][:, 1], bins=np.arange(10.0, 41.0))[0])
+
+    def test_Record(self):
+        office = Building()
+        aggregator = kpi.KPIAggregator([kpi.ThresholdCount('t_air', lower=20.0), kpi.Sum('heating_demand')])
+        t_m_prev = 20.0
+        for hour in range(200):
+            office.solve_building_energy(self.internal_gains[hour], self.solar_gains[hour], self.t_out[hour],
+                                         t_m_prev)
+            t_m_prev = office.t_m_next
+            aggregator.record(office)
+
+        results = simulate(Building(), self.t_out[:200], self.solar_gains[:200], self.internal_gains[:200])
+        kpis = aggregator.results()
+        self.assertEqual(kpis['t_air_hours_outside'], np.count_nonzero(results['t_air'] < 20.0))
+        self.assertAlmostEqual(kpis['heating_demand_sum'], results['heating_demand'].sum())
+
+        with self.assertRaises(ValueError):
+            kpi.KPIAggregator([kpi.Sum('heating_demand', monthly=True)]).record(office)
+
+
+if __name__ == '__main__':
+    unittest.main()
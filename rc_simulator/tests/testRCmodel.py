@@ -921,5 +921,109 @@ class TestBuildingSim(unittest.TestCase):
         self.assertEqual(round(Office.cop, 2), 4.62)
         self.assertEqual(Office.lighting_demand, 0)
 
+    def test_LinearSolverMatchesStandard(self):
+
+        rng = np.random.RandomState(0)
+
+        for emission in [emission_system.AirConditioning, emission_system.FloorHeating, emission_system.TABS]:
+            for max_energy in [12, float('inf')]:
+                Standard = Building(max_cooling_energy_per_floor_area=-max_energy,
+                                    max_heating_energy_per_floor_area=max_energy,
+                                    heating_supply_system=supply_system.HeatPumpAir,
+                                    heating_emission_system=emission)
+                Linear = Building(max_cooling_energy_per_floor_area=-max_energy,
+                                  max_heating_energy_per_floor_area=max_energy,
+                                  heating_supply_system=supply_system.HeatPumpAir,
+                                  heating_emission_system=emission,
+                                  solver='linear')
+
+                for hour in range(100):
+                    inputs = dict(internal_gains=rng.uniform(0, 500), solar_gains=rng.uniform(0, 4000),
+                                  t_out=rng.uniform(-10, 35), t_m_prev=rng.uniform(15, 30))
+                    Standard.solve_building_energy(**inputs)
+                    Linear.solve_building_energy(**inputs)
+
+                    self.assertEqual(Linear.has_heating_demand, Standard.has_heating_demand)
+                    self.assertEqual(Linear.has_cooling_demand, Standard.has_cooling_demand)
+                    for attribute in ['energy_demand', 't_air', 't_s', 't_m', 't_m_next', 'phi_m_tot',
+                                      'heating_sys_fossils', 'cooling_sys_electricity', 'cop']:
+                        np.testing.assert_allclose(getattr(Linear, attribute), getattr(Standard, attribute),
+                                                   rtol=1e-9, atol=1e-9, err_msg=attribute)
+
+    def test_CoefficientsInvalidatedOnParameterChange(self):
+        Office = Building()
+        h_tr_1 = Office.h_tr_1
+        coefficients = Office.coefficients
+
+        # Reading the conductances reuses the cached coefficients
+        self.assertIs(Office.coefficients, coefficients)
+
+        # Open windows as in the greenhouse example
+        h_ve_adj_default = Office.h_ve_adj
+        Office.h_ve_adj = h_ve_adj_default * 10
+        self.assertIsNot(Office.coefficients, coefficients)
+        self.assertEqual(Office.h_tr_1, 1.0 / (1.0 / (h_ve_adj_default * 10) + 1.0 / Office.h_tr_is))
+        self.assertEqual(Office.coefficients.t_air_denominator, Office.h_tr_is + h_ve_adj_default * 10)
+
+        Office.h_ve_adj = h_ve_adj_default
+        self.assertEqual(Office.h_tr_1, h_tr_1)
+
+        Office.c_m = Office.c_m * 2
+        self.assertEqual(Office.coefficients.t_m_next_denominator,
+                         (Office.c_m / 3600.0) + 0.5 * (Office.h_tr_3 + Office.h_tr_em))
+
+    def test_CustomSystems(self):
+
+        class HalfAirHalfMass(emission_system.EmissionSystemBase):
+            def heat_flows(self):
+                flows = emission_system.Flows()
+                flows.phi_ia_plus = 0.5 * self.energy_demand
+                flows.phi_st_plus = 0
+                flows.phi_m_plus = 0.5 * self.energy_demand
+                flows.heating_supply_temperature = 45
+                flows.cooling_supply_temperature = 15
+                return flows
+
+        class GasBoiler(supply_system.SupplySystemBase):
+            def calc_loads(self):
+                system = supply_system.SupplyOut()
+                system.fossils_in = self.load / 0.9
+                system.electricity_in = 0.01 * self.load
+                system.electricity_out = 0
+                return system
+
+        Office = Building(heating_supply_system=GasBoiler, heating_emission_system=HalfAirHalfMass)
+
+        # Custom classes are not precompiled, the built-in ones are
+        self.assertIsNone(Office.heating_supply_system_precompiled)
+        self.assertIsNone(Office.heating_emission_system_precompiled)
+        self.assertIsNotNone(Office.cooling_supply_system_precompiled)
+
+        Office.solve_building_energy(internal_gains=10, solar_gains=0, t_out=0, t_m_prev=18)
+
+        self.assertTrue(Office.has_heating_demand)
+        self.assertEqual(Office.heating_supply_temperature, 45)
+        self.assertAlmostEqual(Office.heating_sys_fossils, Office.energy_demand / 0.9)
+        self.assertAlmostEqual(Office.heating_sys_electricity, 0.01 * Office.energy_demand)
+
+        # The linear solver reads the split of custom emission systems too
+        Linear = Building(heating_supply_system=GasBoiler, heating_emission_system=HalfAirHalfMass,
+                          solver='linear')
+        Linear.solve_building_energy(internal_gains=10, solar_gains=0, t_out=0, t_m_prev=18)
+        self.assertTrue(Linear.has_heating_demand)
+        self.assertAlmostEqual(Linear.energy_demand, Office.energy_demand)
+        self.assertAlmostEqual(Linear.t_air, Office.t_air)
+        self.assertAlmostEqual(Linear.heating_sys_fossils, Office.heating_sys_fossils)
+
+        # Changing the system after construction resolves the new system
+        Office.heating_supply_system = supply_system.ElectricHeating
+        Office.solve_building_energy(internal_gains=10, solar_gains=0, t_out=0, t_m_prev=18)
+        self.assertEqual(Office.heating_sys_electricity, Office.energy_demand)
+        self.assertEqual(Office.heating_sys_fossils, 0)
+
+    def test_UnknownSolver(self):
+        with self.assertRaises(ValueError):
+            Building(solver='euler')
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,10 +7,15 @@ mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, mainPath)
 
 import unittest
+import tempfile
+import shutil
 import numpy as np
-import pandas as pd
 from radiation import Location
+from radiation import SunPathCache
 from radiation import Window
+from radiation import WindowSet
+from radiation import calc_portfolio_solar_gains
+from auxiliary import sunPositionReader
 import math
 
 
@@ -33,32 +38,101 @@ class TestRadiation(unittest.TestCase):
             Azimuth.append(angles[1])
             Sunnyhoy.append(hoy + 1)
 
-        sunPosition = pd.read_csv(os.path.join(
-            mainPath, 'auxiliary', 'SunPosition.csv'), skiprows=1)
+        Altitude_check, Azimuth_check = sunPositionReader.read_sun_position(os.path.join(
+            mainPath, 'auxiliary', 'SunPosition.csv'))
+        self.assertTrue(np.isnan(Altitude_check[0]))
 
-        transSunPos = sunPosition.transpose()
-        hoy_check = transSunPos.index.tolist()
-        hoy_check = [float(ii) for ii in hoy_check]
-        Azimuth_check = (180 - transSunPos[1]).tolist()
-
-        Altitude_check = transSunPos[0].tolist()
-
-        self.assertEqual(round(Altitude[9], 1), round(Altitude_check[1], 1))
-        self.assertEqual(round(Azimuth[9], 1), round(Azimuth_check[1], 1))
+        # The CSV numbers the hours from 1 at the end of the hour
+        self.assertEqual(round(Altitude[9], 1), round(Altitude_check[9], 1))
+        self.assertEqual(round(Azimuth[9], 1), round(Azimuth_check[9], 1))
 
         self.assertEqual(round(Altitude[3993], 1),
-                         round(Altitude_check[2023], 1))
+                         round(Altitude_check[3993], 1))
         self.assertEqual(round(Azimuth[3993], 1),
-                         round(Azimuth_check[2023], 1))
+                         round(Azimuth_check[3993], 1))
 
         # Azimuth Angles go out of sync with data, however the sin and cosine
         # must still match
         self.assertEqual(round(Altitude[4000], 1),
-                         round(Altitude_check[2030], 1))
+                         round(Altitude_check[4000], 1))
         self.assertEqual(round(math.cos(math.radians(Azimuth[4000])), 1), round(
-            math.cos(math.radians(Azimuth_check[2030])), 1))
+            math.cos(math.radians(Azimuth_check[4000])), 1))
         self.assertEqual(round(math.sin(math.radians(Azimuth[4000])), 1), round(
-            math.sin(math.radians(Azimuth_check[2030])), 1))
+            math.sin(math.radians(Azimuth_check[4000])), 1))
+
+    def test_sunPositionBinary(self):
+        Altitude, Azimuth = sunPositionReader.read_sun_position(os.path.join(
+            mainPath, 'auxiliary', 'SunPosition.csv'))
+        self.assertEqual(Altitude.shape, (8760,))
+        self.assertEqual(np.count_nonzero(~np.isnan(Azimuth)), 4405)
+
+        directory = tempfile.mkdtemp()
+        try:
+            binary_path = os.path.join(directory, 'SunPosition.npy')
+            sunPositionReader.save_sun_position(binary_path, Altitude, Azimuth)
+            Altitude_binary, Azimuth_binary = sunPositionReader.load_sun_position(binary_path)
+        finally:
+            shutil.rmtree(directory)
+        np.testing.assert_array_equal(Altitude_binary, Altitude)
+        np.testing.assert_array_equal(Azimuth_binary, Azimuth)
+
+    def test_sunPositionVectorised(self):
+
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+
+        Altitude, Azimuth = Zurich.calc_sun_positions(
+            latitude_deg=47.480, longitude_deg=8.536, year=2015)
+        self.assertEqual(Altitude.shape, (8760,))
+
+        for hoy in range(8760):
+            angles = Zurich.calc_sun_position(
+                latitude_deg=47.480, longitude_deg=8.536, year=2015, hoy=hoy)
+            self.assertAlmostEqual(Altitude[hoy], angles[0], places=9)
+            self.assertAlmostEqual(Azimuth[hoy], angles[1], places=9)
+
+        # Leap years, southern hemisphere, hours past the end of the year and fractions of an hour
+        hoy = np.array([0, 1416.5, 8783, 8790, 10.25])
+        Altitude, Azimuth = Zurich.calc_sun_positions(
+            latitude_deg=-40.750, longitude_deg=175.13, year=2020, hoy=hoy)
+        for index, selected_hoy in enumerate(hoy):
+            angles = Zurich.calc_sun_position(
+                latitude_deg=-40.750, longitude_deg=175.13, year=2020, hoy=selected_hoy)
+            self.assertAlmostEqual(Altitude[index], angles[0], places=9)
+            self.assertAlmostEqual(Azimuth[index], angles[1], places=9)
+
+        self.assertEqual(len(Zurich.calc_sun_positions(47.480, 8.536, 2020)[0]), 8784)
+
+    def test_sunPathCache(self):
+
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        Altitude, Azimuth = Zurich.calc_sun_positions(
+            latitude_deg=47.480, longitude_deg=8.536, year=2015)
+
+        directory = tempfile.mkdtemp()
+        try:
+            Zurich.sun_path_cache = SunPathCache(directory=directory, max_size=1)
+            Altitude_cached, Azimuth_cached = Zurich.calc_sun_path(
+                latitude_deg=47.480, longitude_deg=8.536, year=2015)
+            self.assertEqual(Altitude_cached.dtype, np.float32)
+            np.testing.assert_allclose(Altitude_cached, Altitude, atol=1e-4)
+            np.testing.assert_allclose(Azimuth_cached, Azimuth, atol=1e-4)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            # Half hourly sun path, evicts the hourly one from memory
+            self.assertEqual(len(Zurich.calc_sun_path(47.480, 8.536, 2015, timestep=0.5)[0]), 17520)
+            self.assertEqual(len(Zurich.sun_path_cache.entries), 1)
+
+            # A new cache on the same directory loads the sun path instead of calculating it
+            Zurich.sun_path_cache = SunPathCache(directory=directory)
+            Zurich.calc_sun_positions = None
+            Altitude_loaded, Azimuth_loaded = Zurich.calc_sun_path(
+                latitude_deg=47.480, longitude_deg=8.536, year=2015)
+            np.testing.assert_array_equal(Altitude_loaded, Altitude_cached)
+            np.testing.assert_array_equal(Azimuth_loaded, Azimuth_cached)
+        finally:
+            shutil.rmtree(directory)
 
     def test_windowSolarGains(self):
 
@@ -114,6 +188,74 @@ class TestRadiation(unittest.TestCase):
         self.assertEqual(
             round(RoofAtrium.transmitted_illuminance, 2), 72878.36)
 
+    def test_windowSet(self):
+
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        Altitude, Azimuth = Zurich.calc_sun_positions(
+            latitude_deg=47.480, longitude_deg=8.536, year=2015)
+        weather = Zurich.weather_data
+
+        windows = [Window(azimuth_tilt=0, alititude_tilt=90, area=2),
+                   Window(azimuth_tilt=90, alititude_tilt=90, glass_solar_transmittance=0.5),
+                   Window(azimuth_tilt=270, alititude_tilt=30, glass_light_transmittance=0.6, area=3),
+                   Window(azimuth_tilt=0, alititude_tilt=0)]
+        window_set = WindowSet(windows, zones=[0, 1, 0, 1])
+        window_set.calc_solar_gains(Altitude, Azimuth, weather['dirnorrad_Whm2'],
+                                    weather['difhorrad_Whm2'])
+        window_set.calc_illuminance(Altitude, Azimuth, weather['dirnorillum_lux'],
+                                    weather['difhorillum_lux'])
+        self.assertEqual(window_set.solar_gains.shape, (4, 8760))
+        self.assertEqual(window_set.zone_solar_gains.shape, (2, 8760))
+
+        for hoy in range(3000, 3200):
+            for index, selected_window in enumerate(windows):
+                selected_window.calc_solar_gains(Altitude[hoy], Azimuth[hoy], weather['dirnorrad_Whm2'][hoy],
+                                                 weather['difhorrad_Whm2'][hoy])
+                selected_window.calc_illuminance(Altitude[hoy], Azimuth[hoy], weather['dirnorillum_lux'][hoy],
+                                                 weather['difhorillum_lux'][hoy])
+                self.assertAlmostEqual(window_set.incident_solar[index, hoy], selected_window.incident_solar)
+                self.assertAlmostEqual(window_set.solar_gains[index, hoy], selected_window.solar_gains)
+                self.assertAlmostEqual(window_set.transmitted_illuminance[index, hoy],
+                                       selected_window.transmitted_illuminance, places=5)
+
+            self.assertAlmostEqual(window_set.zone_solar_gains[0, hoy],
+                                   windows[0].solar_gains + windows[2].solar_gains)
+            self.assertAlmostEqual(window_set.zone_transmitted_illuminance[1, hoy],
+                                   windows[1].transmitted_illuminance + windows[3].transmitted_illuminance, places=5)
+
+    def test_portfolioSolarGains(self):
+
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        Wellington = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'wellington_2006.epw'))
+        site_inputs = {}
+        for site, location, latitude, longitude in [('Zurich', Zurich, 47.480, 8.536),
+                                                     ('Wellington', Wellington, -40.750, 175.13)]:
+            Altitude, Azimuth = location.calc_sun_positions(latitude, longitude, year=2015)
+            site_inputs[site] = (Altitude, Azimuth, location.weather_data['dirnorrad_Whm2'][:8760],
+                                 location.weather_data['difhorrad_Whm2'][:8760])
+
+        # 300 windows with 5 orientations in 40 buildings, the even buildings in Zurich
+        orientations = [(0, 90), (90, 90), (180, 90), (270, 90), (0, 0)]
+        buildings = np.arange(300) % 40
+        windows = [Window(*orientations[index % 5], glass_solar_transmittance=0.5 + (index % 3) * 0.1,
+                          area=1 + index % 7) for index in range(300)]
+        sites = ['Zurich' if building % 2 == 0 else 'Wellington' for building in buildings]
+
+        solar_gains = calc_portfolio_solar_gains(windows, buildings, sites, site_inputs)
+        self.assertEqual(solar_gains.shape, (40, 8760))
+
+        for site in ['Zurich', 'Wellington']:
+            indices = [index for index in range(300) if sites[index] == site]
+            window_set = WindowSet([windows[index] for index in indices])
+            self.assertEqual(len(window_set.alititude_tilt_rad), 5)
+            window_set.calc_solar_gains(*site_inputs[site])
+            for building in set(buildings[indices]):
+                expected = window_set.solar_gains[buildings[indices] == building].sum(axis=0)
+                np.testing.assert_allclose(solar_gains[building], expected, rtol=1e-10, atol=1e-9)
+
 
 if __name__ == '__main__':
     unittest.main()
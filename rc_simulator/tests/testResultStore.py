@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import tempfile
+import shutil
+import threading
+import sqlite3
+import numpy as np
+import supply_system
+from result_store import ResultStore, ResultWriter
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'study.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_Store(self):
+        with ResultStore(self.db_path) as store:
+            self.assertEqual(store.connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            run_ids = store.add_runs([
+                {'parameters': {'u_windows': 0.8, 'heating_supply_system': supply_system.HeatPumpAir},
+                 'summary': {'heating_demand_sum': np.float64(1200.0),
+                             'heating_demand_monthly': {'2013-01': 700.0, '2013-02': 500.0}},
+                 'series': {'t_air': np.arange(5, dtype=np.float32)}},
+                {'parameters': {'u_windows': 1.6, 'u_walls': 0.2}, 'summary': {'heating_demand_sum': 2500.0}},
+            ])
+            self.assertEqual(run_ids, [0, 1])
+            self.assertEqual(store.add_run({'u_windows': 1.2}, run_id=10), 10)
+            self.assertEqual(store.add_run({'u_windows': 1.0}), 11)
+            self.assertEqual(len(store), 4)
+
+            runs = store.query('u_windows < ?', (1.3,))
+            self.assertEqual(list(runs.index), [0, 10, 11])
+            self.assertEqual(runs.loc[0, 'heating_supply_system'], 'HeatPumpAir')
+            self.assertEqual(runs.loc[0, 'heating_demand_monthly_2013-02'], 500.0)
+            self.assertTrue(np.isnan(runs.loc[10, 'heating_demand_sum']))
+
+            runs = store.query('heating_demand_sum > 2000')
+            self.assertEqual(list(runs.index), [1])
+            self.assertEqual(runs.loc[1, 'u_walls'], 0.2)
+
+            t_air = store.load_series(0, 't_air')
+            self.assertEqual(t_air.dtype, np.float32)
+            np.testing.assert_array_equal(t_air, np.arange(5))
+            with self.assertRaises(KeyError):
+                store.load_series(1, 't_air')
+            with self.assertRaises(ValueError):
+                store.add_run({'u_windows': 1.0}, summary={'t_air_histogram': np.zeros((2, 3))})
+            with self.assertRaises(ValueError):
+                store.add_run({'u_windows': 1.0}, summary={'t_air': np.zeros(8760)})
+            self.assertEqual(len(store), 4)
+
+            # Histograms of a kpi.KPIAggregator get one column per bin
+            run_id = store.add_run({'u_windows': 1.0}, summary={'t_air_histogram': np.array([10.0, 20.0]),
+                                                                't_air_histogram_bins': np.array([0.0, 20.0, 40.0])})
+            runs = store.query('t_air_histogram_1 > ?', (15.0,))
+            self.assertEqual(list(runs.index), [run_id])
+            self.assertEqual(runs.loc[run_id, 't_air_histogram_0'], 10.0)
+            self.assertEqual(runs.loc[run_id, 't_air_histogram_bins_2'], 40.0)
+
+    def test_Writer(self):
+        # Several threads hand their runs to one writer
+        with ResultWriter(self.db_path, batch_size=7) as writer:
+            def work(worker):
+                for run in range(50):
+                    writer.put({'worker': worker, 'u_walls': run / 100.0}, summary={'run': run},
+                               run_id=worker * 50 + run)
+
+            threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        with ResultStore(self.db_path) as store:
+            runs = store.query()
+            self.assertEqual(list(runs.index), list(range(200)))
+            np.testing.assert_array_equal(runs['run'], np.tile(np.arange(50), 4))
+            self.assertEqual(len(store.query('worker = 2 AND u_walls < 0.1')), 10)
+
+        writer = ResultWriter(self.db_path)
+        writer.put({'u_walls': 0.1}, run_id=0)
+        # The run ID exists already
+        with self.assertRaises(sqlite3.IntegrityError):
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import tempfile
+import shutil
+import numpy as np
+import pandas as pd
+from building_physics import Building  # Importing Building Class
+from building_batch import BuildingBatch
+from radiation import Location
+from simulation import simulate
+import results_writer
+from results_writer import ColumnarWriter, ColumnarResults, CSVWriter
+
+
+class TestResultsWriter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        cls.time_index = Zurich.weather_data.time_index[:500]
+        cls.t_out = np.asarray(Zurich.weather_data['drybulb_C'][:500], dtype=float)
+        cls.solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][:500], dtype=float) * 4.0
+        cls.internal_gains = np.tile(np.r_[np.zeros(8), np.full(10, 500.0), np.zeros(6)], 21)[:500]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_Columnar(self):
+        expected = simulate(Building(), self.t_out, self.solar_gains, self.internal_gains)
+
+        results_path = os.path.join(self.directory, 'results')
+        with ColumnarWriter(results_path, block_size=96, time_index=self.time_index) as sink:
+            self.assertIsNone(simulate(Building(), self.t_out, self.solar_gains, self.internal_gains, sink=sink))
+
+        results = ColumnarResults(results_path)
+        self.assertEqual(len(results), 500)
+        self.assertEqual(sorted(results.keys()), sorted(expected))
+        for output in expected:
+            self.assertEqual(results[output].dtype, np.float32)
+            np.testing.assert_array_equal(results[output], expected[output].astype(np.float32), err_msg=output)
+        np.testing.assert_array_equal(results.time_index, self.time_index)
+
+    def test_ColumnarBatch(self):
+        def batch():
+            return BuildingBatch([Building(), Building(u_walls=0.8), Building(window_area=8.0)])
+
+        expected = simulate(batch(), self.t_out, self.solar_gains, self.internal_gains, outputs=['t_air'])
+
+        # Two runs written by the same sink, in blocks that do not line up with the runs
+        results_path = os.path.join(self.directory, 'batch')
+        with ColumnarWriter(results_path, block_size=150) as sink:
+            building = batch()
+            simulate(building, self.t_out[:200], self.solar_gains[:200], self.internal_gains[:200],
+                     outputs=['t_air'], sink=sink)
+            simulate(building, self.t_out[200:], self.solar_gains[200:], self.internal_gains[200:],
+                     t_m_prev=building.t_m_next, outputs=['t_air'], sink=sink)
+
+        results = ColumnarResults(results_path)
+        self.assertEqual(results['t_air'].shape, (500, 3))
+        np.testing.assert_allclose(results['t_air'], expected['t_air'], rtol=1e-6)
+        self.assertIsNone(results.time_index)
+
+    def test_BlockSize(self):
+        # The default block keeps the float64 results of a block below BLOCK_BYTES
+        self.assertEqual(results_writer.calc_block_size(16, ()), 8760)
+        block_size = results_writer.calc_block_size(16, (40000,))
+        self.assertLessEqual(block_size * 16 * 40000 * 8, results_writer.BLOCK_BYTES)
+        self.assertGreater(block_size, 0)
+        self.assertEqual(results_writer.calc_block_size(16, (10 ** 8,)), 1)
+
+        # Blocks from simulate() go to write_block() without being copied into the buffer
+        blocks = []
+
+        class ListSink(results_writer.ResultsSink):
+            def write_block(self, block):
+                blocks.append(block)
+
+        sink = ListSink()
+        results_writer.BLOCK_BYTES, block_bytes = 3 * 8 * 100, results_writer.BLOCK_BYTES
+        try:
+            simulate(BuildingBatch([Building(), Building(u_walls=0.8)]), self.t_out, self.solar_gains,
+                     self.internal_gains, outputs=['t_air', 'heating_demand', 'cooling_demand'], sink=sink)
+        finally:
+            results_writer.BLOCK_BYTES = block_bytes
+        sink.close()
+        self.assertEqual(sink.block_size, 50)
+        self.assertIsNone(sink.buffer)
+        self.assertEqual(len(blocks), 10)
+        self.assertEqual(sink.n_records, 500)
+        self.assertEqual(blocks[0][0].shape, (50, 2))
+
+    def test_CSV(self):
+        expected = simulate(Building(), self.t_out, self.solar_gains, self.internal_gains,
+                            outputs=['t_air', 'heating_demand'])
+
+        csv_path = os.path.join(self.directory, 'results.csv')
+        with CSVWriter(csv_path, block_size=128) as sink:
+            simulate(Building(), self.t_out, self.solar_gains, self.internal_gains,
+                     outputs=['t_air', 'heating_demand'], sink=sink)
+
+        chunks = list(pd.read_csv(csv_path, chunksize=200))
+        self.assertEqual([len(chunk) for chunk in chunks], [200, 200, 100])
+        results = pd.concat(chunks)
+        np.testing.assert_array_equal(results['hour'], np.arange(500))
+        for output in expected:
+            np.testing.assert_allclose(results[output], expected[output], rtol=1e-9, atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import numpy as np
+import pandas as pd
+import schedules
+
+
+class TestSchedules(unittest.TestCase):
+
+    def test_ExpandYearly(self):
+        schedule_path = os.path.join(mainPath, 'auxiliary', 'schedules_el_OFFICE.csv')
+        occupancy = schedules.read_schedule_csv(schedule_path, 'People')
+        np.testing.assert_array_equal(occupancy, pd.read_csv(schedule_path)['People'].values)
+
+        np.testing.assert_array_equal(schedules.expand_yearly(occupancy, schedules.hourly_index(2013)), occupancy)
+
+        # Leap years repeat the last day, sub-hourly records take the value of their hour
+        leap = schedules.expand_yearly(occupancy, schedules.hourly_index(2016))
+        self.assertEqual(len(leap), 8784)
+        np.testing.assert_array_equal(leap[-24:], occupancy[-24:])
+        quarter = np.arange(np.datetime64('2013-01-01T00:00'), np.datetime64('2013-01-02T00:00'),
+                            np.timedelta64(15, 'm'))
+        np.testing.assert_array_equal(schedules.expand_yearly(occupancy, quarter), np.repeat(occupancy[:24], 4))
+
+    def test_DailySchedule(self):
+        weekday = [0.0] * 8 + [1.0] * 10 + [0.0] * 6
+        office_hours = schedules.DailySchedule(weekday, weekend=[0.5] * 24, sunday=[0.0] * 24,
+                                               holidays=['2015-01-01'])
+        occupancy = office_hours.compile(schedules.hourly_index(2015))
+        self.assertEqual(len(occupancy), 8760)
+
+        # 1 January 2015 is a Thursday holiday, then Friday, Saturday and Sunday
+        np.testing.assert_array_equal(occupancy[:24], 0.0)
+        np.testing.assert_array_equal(occupancy[24:48], weekday)
+        np.testing.assert_array_equal(occupancy[48:72], 0.5)
+        np.testing.assert_array_equal(occupancy[72:96], 0.0)
+        self.assertEqual(occupancy.sum(), (261 - 1) * 10 + 52 * 12)
+
+        with self.assertRaises(ValueError):
+            schedules.DailySchedule([1.0] * 23)
+
+    def test_InternalGains(self):
+        occupancy = np.array([0.0, 0.5, 1.0])
+        internal_gains = schedules.calc_internal_gains(occupancy, 34.3, gain_per_person=100,
+                                                       appliance_gains=14, max_occupancy=3.0)
+        np.testing.assert_allclose(internal_gains, occupancy * 3.0 * 100 + 14 * 34.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import gc
+import pickle
+import unittest
+import concurrent.futures
+import numpy as np
+from radiation import Location
+from shared_arrays import SharedArrays, attach
+import shared_arrays
+
+
+def sum_shared(handle, name):
+    return float(attach(handle)[name].sum())
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def test_Attach(self):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        altitude, azimuth = Zurich.calc_weather_sun_path()
+        arrays = {'t_out': Zurich.weather_data['drybulb_C'], 'altitude': altitude,
+                  'time_index': Zurich.weather_data.time_index, 'gains': np.ones((24, 3))}
+
+        with SharedArrays(arrays) as shared:
+            # The handle is all that a task has to carry
+            handle = pickle.loads(pickle.dumps(shared.handle))
+            self.assertLess(len(pickle.dumps(handle)), 1000)
+            self.assertEqual(handle.names(), list(arrays))
+
+            views = attach(handle)
+            for name, values in arrays.items():
+                np.testing.assert_array_equal(views[name], values)
+                self.assertEqual(views[name].dtype, np.asarray(values).dtype)
+            self.assertFalse(views['t_out'].flags.writeable)
+
+            with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                self.assertEqual(executor.submit(sum_shared, handle, 'altitude').result(),
+                                 float(altitude.sum()))
+            block_names = [spec[1] for spec in handle.specs]
+
+        for block_name in block_names:
+            shared_arrays.attached_blocks.pop(block_name).close()
+        with self.assertRaises(FileNotFoundError):
+            attach(handle)
+
+    def test_Cleanup(self):
+        # The blocks are removed when the owner is garbage collected
+        handle = SharedArrays({'t_out': np.arange(10.0)}).handle
+        gc.collect()
+        with self.assertRaises(FileNotFoundError):
+            attach(handle)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import numpy as np
+from building_physics import Building  # Importing Building Class
+from building_batch import BuildingBatch
+from radiation import Location
+import simulation
+import supply_system
+import emission_system
+from simulation import simulate, simulate_stream, interpolate_inputs, OUTPUT_VARIABLES
+
+
+class TestSimulation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        cls.t_out = np.asarray(Zurich.weather_data['drybulb_C'][:500], dtype=float)
+        cls.solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][:500], dtype=float) * 4.0
+        cls.internal_gains = np.tile(np.r_[np.zeros(8), np.full(10, 500.0), np.zeros(6)], 21)[:500]
+        cls.illuminance = np.asarray(Zurich.weather_data['glohorillum_lux'][:500], dtype=float) * 4.0
+
+    def test_MatchesHourlyLoop(self):
+        Office = Building()
+        results = simulate(Office, self.t_out, self.solar_gains, self.internal_gains,
+                           illuminance=self.illuminance, occupancy=0.1, t_m_prev=20)
+
+        Reference = Building()
+        t_m_prev = 20
+        for hour in range(len(self.t_out)):
+            Reference.solve_building_energy(self.internal_gains[hour], self.solar_gains[hour],
+                                            self.t_out[hour], t_m_prev)
+            Reference.solve_building_lighting(self.illuminance[hour], 0.1)
+            t_m_prev = Reference.t_m_next
+
+            for output in OUTPUT_VARIABLES + ['lighting_demand']:
+                np.testing.assert_allclose(results[output][hour], getattr(Reference, output), err_msg=output)
+
+        self.assertEqual(results['t_air'].shape, (500,))
+        self.assertTrue(np.any(results['heating_demand'] > 0))
+
+    def test_NoLighting(self):
+        results = simulate(Building(), self.t_out[:24], 0, 0)
+
+        self.assertNotIn('lighting_demand', results)
+        self.assertEqual(len(results['heating_energy']), 24)
+
+    def test_Batch(self):
+        buildings = [Building(), Building(u_walls=0.8)]
+        results = simulate(BuildingBatch(buildings), self.t_out, self.solar_gains, self.internal_gains)
+        self.assertEqual(results['t_air'].shape, (500, 2))
+
+        single = simulate(Building(u_walls=0.8), self.t_out, self.solar_gains, self.internal_gains)
+        np.testing.assert_allclose(results['t_air'][:, 1], single['t_air'])
+        np.testing.assert_allclose(results['heating_energy'][:, 1], single['heating_energy'])
+
+    @unittest.skipIf(simulation.rc_kernel is None, 'compiled kernel not built, see build_kernel.py')
+    def test_KernelMatchesPython(self):
+        systems = [(supply_system.OilBoilerMed, supply_system.HeatPumpAir, emission_system.NewRadiators),
+                   (supply_system.HeatPumpWater, supply_system.HeatPumpWater, emission_system.FloorHeating),
+                   (supply_system.CHP, supply_system.DirectCooler, emission_system.TABS),
+                   (supply_system.ElectricHeating, supply_system.CHP, emission_system.AirConditioning)]
+        # Summer heat, so that every combination also cools
+        t_out = np.r_[self.t_out, self.t_out[:200] + 25]
+        solar_gains = np.r_[self.solar_gains, self.solar_gains[:200]]
+        internal_gains = np.r_[self.internal_gains, self.internal_gains[:200]]
+
+        for heating, cooling, emission in systems:
+            Office = Building(heating_supply_system=heating, cooling_supply_system=cooling,
+                              heating_emission_system=emission, cooling_emission_system=emission,
+                              max_heating_energy_per_floor_area=20)
+            self.assertTrue(simulation.kernel_supports(Office, OUTPUT_VARIABLES))
+            compiled = simulate(Office, t_out, solar_gains, internal_gains, illuminance=1000.0, occupancy=1)
+            python = simulate(Building(heating_supply_system=heating, cooling_supply_system=cooling,
+                                       heating_emission_system=emission, cooling_emission_system=emission,
+                                       max_heating_energy_per_floor_area=20),
+                              t_out, solar_gains, internal_gains, illuminance=1000.0, occupancy=1,
+                              use_kernel=False)
+
+            self.assertTrue(np.any(python['heating_demand'] > 0) and np.any(python['cooling_demand'] < 0))
+            for output in OUTPUT_VARIABLES + ['lighting_demand']:
+                np.testing.assert_allclose(compiled[output], python[output], rtol=1e-12, err_msg=output)
+            self.assertEqual(Office.t_m_next, python['t_m_next'][-1])
+
+    def test_KernelFallback(self):
+        class Subclass(Building):
+            pass
+
+        self.assertFalse(simulation.kernel_supports(Subclass(), OUTPUT_VARIABLES))
+        self.assertFalse(simulation.kernel_supports(BuildingBatch([Building()]), OUTPUT_VARIABLES))
+        self.assertFalse(simulation.kernel_supports(Building(), ['phi_m_tot']))
+        self.assertFalse(simulation.kernel_supports(Building(solver='linear'), OUTPUT_VARIABLES))
+        linear = simulate(Building(solver='linear'), self.t_out[:100], self.solar_gains[:100],
+                          self.internal_gains[:100])
+        python = simulate(Building(solver='linear'), self.t_out[:100], self.solar_gains[:100],
+                          self.internal_gains[:100], use_kernel=False)
+        np.testing.assert_array_equal(linear['energy_demand'], python['energy_demand'])
+        results = simulate(Subclass(), self.t_out[:24], 0, 0, outputs=['phi_m_tot'])
+        self.assertEqual(results['phi_m_tot'].shape, (24,))
+
+    def test_Stream(self):
+        def chunks(chunk_size):
+            for start in range(0, len(self.t_out), chunk_size):
+                yield {'t_out': self.t_out[start:start + chunk_size],
+                       'solar_gains': self.solar_gains[start:start + chunk_size],
+                       'internal_gains': self.internal_gains[start:start + chunk_size]}
+
+        for use_kernel in [True, False]:
+            whole = simulate(Building(), self.t_out, self.solar_gains, self.internal_gains, t_m_prev=15,
+                             use_kernel=use_kernel)
+            streamed = list(simulate_stream(Building(), chunks(96), t_m_prev=15, outputs=['t_air', 'heating_demand'],
+                                            use_kernel=use_kernel))
+            self.assertEqual(len(streamed), 6)
+            for output in ['t_air', 'heating_demand']:
+                np.testing.assert_array_equal(np.concatenate([results[output] for results in streamed]),
+                                              whole[output])
+
+        batch = BuildingBatch([Building(), Building(u_walls=0.8)])
+        streamed = list(simulate_stream(batch, chunks(100)))
+        whole = simulate(BuildingBatch([Building(), Building(u_walls=0.8)]), self.t_out, self.solar_gains,
+                         self.internal_gains)
+        np.testing.assert_array_equal(np.concatenate([results['t_air'] for results in streamed]), whole['t_air'])
+
+    def test_InterpolateInputs(self):
+        np.testing.assert_allclose(interpolate_inputs([0.0, 4.0, 2.0], 0.25),
+                                   [0.0, 1.0, 2.0, 3.0, 4.0, 3.5, 3.0, 2.5, 2.0, 2.0, 2.0, 2.0])
+        np.testing.assert_array_equal(interpolate_inputs([0.0, 4.0], 1 / 12.0, kind='hold'), [0.0] * 12 + [4.0] * 12)
+        values = interpolate_inputs(np.column_stack([self.t_out, self.solar_gains]), 0.25)
+        self.assertEqual(values.shape, (2000, 2))
+        np.testing.assert_allclose(values[:, 1], np.interp(np.arange(2000) * 0.25, np.arange(500), self.solar_gains))
+        with self.assertRaises(ValueError):
+            interpolate_inputs(self.t_out, 0.25, kind='cubic')
+
+    def test_Timestep(self):
+        t_out, solar_gains = [interpolate_inputs(values, 0.25) for values in (self.t_out, self.solar_gains)]
+        internal_gains = interpolate_inputs(self.internal_gains, 0.25, kind='hold')
+
+        Reference = Building(timestep=0.25)
+        t_m_prev = 20
+        reference = []
+        for step in range(len(t_out)):
+            Reference.solve_building_energy(internal_gains[step], solar_gains[step], t_out[step], t_m_prev)
+            t_m_prev = Reference.t_m_next
+            reference.append(Reference.t_air)
+
+        for use_kernel in [True, False]:
+            Office = Building()
+            results = simulate(Office, t_out, solar_gains, internal_gains, timestep=0.25, use_kernel=use_kernel)
+            self.assertEqual(Office.timestep, 0.25)
+            np.testing.assert_allclose(results['t_air'], reference, rtol=1e-12)
+
+        # Same steady state for any timestep
+        for timestep in [1.0, 0.25, 1 / 12.0]:
+            results = simulate(Building(), np.full(int(3000 / timestep), 5.0), 200.0, 300.0, timestep=timestep,
+                               t_m_prev=10.0)
+            np.testing.assert_allclose(results['heating_demand'][-1], simulate(
+                Building(), np.full(3000, 5.0), 200.0, 300.0, t_m_prev=10.0)['heating_demand'][-1], rtol=1e-6)
+
+        # Variable timesteps, with the coefficients calculated once per timestep
+        timesteps = np.r_[np.ones(100), np.full(250, 0.25), np.ones(150)]
+        Office = Building()
+        results = simulate(Office, self.t_out, self.solar_gains, self.internal_gains, timestep=timesteps)
+        self.assertEqual(sorted(Office._coefficients_by_timestep), [0.25, 1.0])
+        Reference = Building()
+        t_m_prev = 20.0
+        expected = []
+        for start, stop, timestep in [(0, 100, 1.0), (100, 350, 0.25), (350, 500, 1.0)]:
+            expected.append(simulate(Reference, self.t_out[start:stop], self.solar_gains[start:stop],
+                                     self.internal_gains[start:stop], t_m_prev=t_m_prev, timestep=timestep)['t_air'])
+            t_m_prev = Reference.t_m_next
+        np.testing.assert_allclose(results['t_air'], np.concatenate(expected), rtol=1e-12)
+
+        with self.assertRaises(ValueError):
+            BuildingBatch([Building(), Building(timestep=0.25)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import numpy as np
+from building_physics import Building  # Importing Building Class
+from radiation import Location
+from simulation import simulate
+from state_space import StateSpace, simulate_state_space, calc_periodic_t_m_prev
+
+
+class TestStateSpace(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        cls.t_out = np.asarray(Zurich.weather_data['drybulb_C'][:2000], dtype=float)
+        cls.solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][:2000], dtype=float) * 4.0
+        cls.internal_gains = np.tile(np.r_[np.zeros(8), np.full(10, 500.0), np.zeros(6)], 84)[:2000]
+        cls.illuminance = np.asarray(Zurich.weather_data['glohorillum_lux'][:2000], dtype=float) * 4.0
+
+    def test_Matrices(self):
+        office = Building(thermal_capacitance_per_floor_area=300000, u_walls=0.8)
+        model = StateSpace(office)
+        self.assertEqual((model.A.shape, model.B.shape, model.C.shape, model.D.shape),
+                         ((1, 1), (1, 3), (4, 1), (4, 3)))
+
+        office.calc_temperatures_crank_nicolson(0, internal_gains=350.0, solar_gains=800.0, t_out=5.0,
+                                                t_m_prev=18.0)
+        nodes = model.C[:, 0] * 18.0 + model.D.dot([5.0, 350.0, 800.0])
+        np.testing.assert_allclose(nodes, [office.t_m_next, office.t_m, office.t_s, office.t_air], rtol=1e-12)
+
+        t_m_next, nodes = model.propagate(18.0, self.t_out, self.internal_gains, self.solar_gains)
+        t_m_prev = 18.0
+        for hour in [0, 1, 500, 1999]:
+            office.calc_temperatures_crank_nicolson(0, self.internal_gains[hour], self.solar_gains[hour],
+                                                    self.t_out[hour], t_m_next[hour - 1] if hour else t_m_prev)
+            np.testing.assert_allclose(nodes[hour], [office.t_m_next, office.t_m, office.t_s, office.t_air],
+                                       rtol=1e-10)
+
+    def test_MatchesSimulate(self):
+        for parameters in [{}, {'t_set_heating': -20.0, 't_set_cooling': 60.0},
+                           {'t_set_heating': 10.0, 't_set_cooling': 30.0, 'max_heating_energy_per_floor_area': 5.0}]:
+            expected_building = Building(**parameters)
+            expected = simulate(expected_building, self.t_out, self.solar_gains, self.internal_gains,
+                                self.illuminance, self.internal_gains > 0, use_kernel=False)
+            building = Building(**parameters)
+            results = simulate_state_space(building, self.t_out, self.solar_gains, self.internal_gains,
+                                           self.illuminance, self.internal_gains > 0, block_size=100)
+
+            self.assertEqual(sorted(results), sorted(expected))
+            for output in expected:
+                np.testing.assert_allclose(results[output], expected[output], rtol=1e-9, atol=1e-9,
+                                           err_msg=output)
+            self.assertAlmostEqual(building.t_m_next, expected_building.t_m_next, places=9)
+            self.assertAlmostEqual(building.t_air, expected_building.t_air, places=9)
+
+        with self.assertRaises(ValueError):
+            simulate_state_space(Building(), self.t_out, self.solar_gains, self.internal_gains, outputs=['phi_m'])
+
+    def test_PeriodicStart(self):
+        for parameters in [{}, {'thermal_capacitance_per_floor_area': 300000},
+                           {'t_set_heating': -100.0, 't_set_cooling': 100.0}]:
+            building = Building(**parameters)
+            t_m_prev = calc_periodic_t_m_prev(building, self.t_out, self.solar_gains, self.internal_gains)
+            self.assertFalse(hasattr(building, 't_m_next'))
+
+            # Same as the start value after a warm-up run, and the run ends where it started
+            simulate(building, self.t_out, self.solar_gains, self.internal_gains, t_m_prev=20.0)
+            self.assertAlmostEqual(t_m_prev, building.t_m_next, places=3)
+            simulate(building, self.t_out, self.solar_gains, self.internal_gains, t_m_prev=t_m_prev)
+            self.assertAlmostEqual(t_m_prev, building.t_m_next, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import tempfile
+import shutil
+import numpy as np
+from building_physics import Building  # Importing Building Class
+from radiation import Location
+from simulation import simulate
+from result_store import ResultStore, ResultWriter
+import supply_system
+import sweep
+import kpi
+
+
+class TestSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Zurich = Location(epwfile_path=os.path.join(
+            mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        cls.time_index = Zurich.weather_data.time_index[:1000]
+        cls.t_out = np.asarray(Zurich.weather_data['drybulb_C'][:1000], dtype=float)
+        cls.solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][:1000], dtype=float) * 4.0
+        cls.internal_gains = np.tile(np.r_[np.zeros(8), np.full(10, 500.0), np.zeros(6)], 42)[:1000]
+        cls.samples = sweep.parameter_grid(u_walls=[0.2, 0.8], u_windows=[0.8, 1.6, 3.0], window_area=[4.0, 13.5],
+                                           heating_supply_system=[supply_system.OilBoilerMed,
+                                                                  supply_system.HeatPumpAir])
+
+    def test_ParameterGrid(self):
+        self.assertEqual(len(self.samples), 24)
+        self.assertEqual(self.samples[0], {'u_walls': 0.2, 'u_windows': 0.8, 'window_area': 4.0,
+                                           'heating_supply_system': supply_system.OilBoilerMed})
+        self.assertEqual(self.samples[-1]['u_walls'], 0.8)
+
+    def check_summaries(self, summaries):
+        self.assertEqual(len(summaries), len(self.samples))
+        for sample, summary in zip(self.samples, summaries):
+            results = simulate(Building(**sample), self.t_out, self.solar_gains, self.internal_gains)
+            self.assertAlmostEqual(summary['heating_energy_sum'], results['heating_energy'].sum() / 1000.0)
+            self.assertAlmostEqual(summary['cooling_demand_sum'], results['cooling_demand'].sum() / 1000.0)
+            self.assertAlmostEqual(summary['heating_demand_max'], results['heating_demand'].max())
+            self.assertEqual(summary['heating_demand_max_time'], self.time_index[np.argmax(results['heating_demand'])])
+
+    def test_Serial(self):
+        summaries = sweep.run_sweep(self.samples, self.t_out, self.solar_gains, self.internal_gains,
+                                    time_index=self.time_index, chunk_size=5, max_workers=1)
+        self.check_summaries(summaries)
+
+    def test_ProcessPool(self):
+        summaries = sweep.run_sweep(self.samples, self.t_out, self.solar_gains, self.internal_gains,
+                                    time_index=self.time_index, chunk_size=5, max_workers=2)
+        self.check_summaries(summaries)
+
+    def test_CoolingPeak(self):
+        Zurich = Location(epwfile_path=os.path.join(mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'))
+        summer = slice(4000, 5000)
+        time_index = Zurich.weather_data.time_index[summer]
+        t_out = np.asarray(Zurich.weather_data['drybulb_C'][summer], dtype=float)
+        solar_gains = np.asarray(Zurich.weather_data['glohorrad_Whm2'][summer], dtype=float) * 4.0
+
+        summaries = sweep.run_sweep(self.samples[:4], t_out, solar_gains, self.internal_gains,
+                                    time_index=time_index, max_workers=1)
+        for sample, summary in zip(self.samples[:4], summaries):
+            cooling = simulate(Building(**sample), t_out, solar_gains, self.internal_gains)['cooling_demand']
+            self.assertLess(cooling.min(), 0.0)
+            self.assertAlmostEqual(summary['cooling_demand_min'], cooling.min())
+            self.assertEqual(summary['cooling_demand_min_time'], time_index[np.argmin(cooling)])
+
+    def test_Writer(self):
+        directory = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(directory, 'study.sqlite')
+            statistics = [kpi.ThresholdCount('t_air', lower=20.0), kpi.Histogram('t_air', bins=[0.0, 20.0, 40.0])]
+            with ResultWriter(db_path) as writer:
+                summaries = sweep.run_sweep(self.samples, self.t_out, self.solar_gains, self.internal_gains,
+                                            statistics=statistics, chunk_size=7, max_workers=2, writer=writer)
+            with ResultStore(db_path) as store:
+                runs = store.query('u_windows > ? AND heating_supply_system = ?', (1.0, 'HeatPumpAir'))
+                self.assertEqual(len(runs), 8)
+                for run_id, run in runs.iterrows():
+                    self.assertEqual(run['u_walls'], self.samples[run_id]['u_walls'])
+                    self.assertEqual(run['t_air_hours_outside'], summaries[run_id]['t_air_hours_outside'])
+                    self.assertEqual(run['t_air_histogram_1'], summaries[run_id]['t_air_histogram'][1])
+
+            # A second sweep into the same study continues with the next run_ids
+            with ResultWriter(db_path) as writer:
+                more_summaries = sweep.run_sweep(self.samples[:2], self.t_out, self.solar_gains,
+                                                 self.internal_gains, statistics=[statistics[0]], max_workers=1,
+                                                 writer=writer)
+            with ResultStore(db_path) as store:
+                self.assertEqual(len(store), len(self.samples) + 2)
+                runs = store.query('run_id >= ?', (len(self.samples),))
+                self.assertEqual(list(runs.index), [len(self.samples), len(self.samples) + 1])
+                self.assertEqual(list(runs['u_windows']), [sample['u_windows'] for sample in self.samples[:2]])
+                self.assertEqual(list(runs['t_air_hours_outside']),
+                                 [summary['t_air_hours_outside'] for summary in more_summaries])
+        finally:
+            shutil.rmtree(directory)
+
+        summaries = sweep.run_sweep(self.samples[:3], self.t_out, self.solar_gains, self.internal_gains,
+                                    statistics=statistics, max_workers=1)
+        for sample, summary in zip(self.samples[:3], summaries):
+            t_air = simulate(Building(**sample), self.t_out, self.solar_gains, self.internal_gains)['t_air']
+            np.testing.assert_array_equal(summary['t_air_histogram'], np.histogram(t_air, [0.0, 20.0, 40.0])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import sys
+import os
+
+# Set root folder one level up, just for this example
+mainPath = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, mainPath)
+
+import unittest
+import tempfile
+import shutil
+import numpy as np
+import pandas as pd
+from auxiliary import weather
+from auxiliary import weather_store
+from auxiliary import epwreader
+from radiation import Location
+import schedules
+
+
+class TestWeather(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.weather_path = os.path.join(self.directory, 'Zurich-Kloten_2013.epw')
+        shutil.copy(os.path.join(mainPath, 'auxiliary', 'Zurich-Kloten_2013.epw'), self.weather_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_MatchesPandas(self):
+        for name in ['Zurich-Kloten_2013.epw', 'wellington_2006.epw', 'Manawatu1994.epw']:
+            weather_path = os.path.join(self.directory, name)
+            shutil.copy(os.path.join(mainPath, 'auxiliary', name), weather_path)
+            reference = pd.read_csv(weather_path, skiprows=8, header=None,
+                                    names=weather.EPW_LABELS).drop('datasource', axis=1)
+
+            # Parsed, then from the cache
+            for _ in range(2):
+                weather_data = weather.read_epw(weather_path)
+                self.assertEqual(list(weather_data.columns), list(reference.columns))
+                for label in reference.columns:
+                    np.testing.assert_array_equal(weather_data[label].values,
+                                                  reference[label].values.astype(float), err_msg=label)
+                    if reference[label].dtype.kind == 'i':
+                        self.assertEqual(weather_data[label].dtype, np.int64)
+
+    def test_Cache(self):
+        meta, array = weather.load_epw(self.weather_path)
+        self.assertFalse(isinstance(array, np.memmap))
+        self.assertTrue(os.path.exists(self.weather_path + '.npy'))
+        self.assertTrue(meta['header'][0].startswith('LOCATION,Zuerich-Kloten'))
+
+        meta, array = weather.load_epw(self.weather_path)
+        self.assertTrue(isinstance(array, np.memmap))
+        self.assertEqual(array.shape, (34, 8760))
+
+        # Changing the EPW file invalidates the cache
+        with open(self.weather_path) as weather_file:
+            lines = weather_file.readlines()
+        lines[8] = lines[8].replace(',-2.1,', ',-12.1,', 1)
+        with open(self.weather_path, 'w') as weather_file:
+            weather_file.writelines(lines)
+        os.utime(self.weather_path, (0, 1))
+        self.assertEqual(weather.read_epw(self.weather_path)['drybulb_C'][0], -12.1)
+
+    def test_CacheDirectory(self):
+        cache_directory = os.path.join(self.directory, 'cache')
+        weather_data = weather.read_epw(self.weather_path, cache_directory=cache_directory)
+        self.assertFalse(os.path.exists(self.weather_path + '.npy'))
+        self.assertEqual(len(os.listdir(cache_directory)), 2)
+        self.assertTrue(weather_data.equals(weather.read_epw(self.weather_path, cache_directory=cache_directory)))
+
+    def test_WeatherData(self):
+        weather.read_epw(self.weather_path)
+        weather_data = weather.open_epw(self.weather_path)
+        self.assertEqual(len(weather_data), 8760)
+        self.assertEqual(len(weather_data.columns), 0)
+        self.assertIn('drybulb_C', weather_data)
+        self.assertNotIn('datasource', weather_data)
+
+        t_out = weather_data['drybulb_C']
+        self.assertTrue(isinstance(t_out, np.ndarray))
+        self.assertTrue(t_out.flags['C_CONTIGUOUS'])
+        self.assertEqual(t_out[0], -2.1)
+        self.assertTrue(weather_data['drybulb_C'] is t_out)
+        self.assertEqual(list(weather_data.columns), ['drybulb_C'])
+        self.assertEqual(weather_data['month'].dtype, np.int64)
+        with self.assertRaises(KeyError):
+            weather_data['datasource']
+
+        self.assertTrue(weather_data.to_dataframe().equals(weather.read_epw(self.weather_path)))
+
+    def test_IterEpw(self):
+        for _ in range(2):
+            # Parsed in chunks, then copied from the cache written by open_epw
+            chunks = list(weather.iter_epw(self.weather_path, labels=['month', 'drybulb_C'], chunk_size=1000))
+            self.assertEqual([len(chunk['drybulb_C']) for chunk in chunks], [1000] * 8 + [760])
+            self.assertEqual(chunks[0]['month'].dtype, np.int64)
+
+            weather_data = weather.open_epw(self.weather_path)
+            for label in ['month', 'drybulb_C']:
+                np.testing.assert_array_equal(np.concatenate([chunk[label] for chunk in chunks]),
+                                              weather_data[label])
+
+    def write_epw(self, name, header, records):
+        weather_path = os.path.join(self.directory, name)
+        with open(weather_path, 'w') as weather_file:
+            weather_file.writelines(header + records)
+        return weather_path
+
+    def test_TimeIndex(self):
+        with open(self.weather_path) as weather_file:
+            lines = weather_file.readlines()
+        header, records = lines[:8], lines[8:]
+
+        def with_year(records, year):
+            return [str(year) + record[4:] for record in records]
+
+        # Leap year, 29 February is a copy of the 28th
+        february_28 = [record for record in records if record.startswith('2013,02,28')]
+        leap_records = with_year(records[:59 * 24] + [record.replace(',02,28,', ',02,29,') for record in
+                                                      february_28] + records[59 * 24:], 2016)
+        weather_data = weather.open_epw(self.write_epw('leap.epw', header, leap_records))
+        self.assertEqual(len(weather_data.time_index), 8784)
+        self.assertEqual(str(weather_data.time_index[59 * 24]), '2016-02-29T00:00')
+        self.assertEqual(str(weather_data.time_index[-1]), '2016-12-31T23:00')
+
+        # Two years in one file
+        weather_data = weather.open_epw(self.write_epw('two_years.epw', header, records + with_year(records, 2014)))
+        self.assertEqual(str(weather_data.time_index[8760]), '2014-01-01T00:00')
+        self.assertEqual(str(weather_data.time_index[-1]), '2014-12-31T23:00')
+
+        # Typical years, built from months of different years, are rebased to consecutive years
+        typical_records = records[:744] + with_year(records[744:8016], 1996) + records[8016:]
+        weather_data = weather.open_epw(self.write_epw('typical.epw', header, typical_records * 2))
+        self.assertEqual(str(weather_data.time_index[1000]), '2013-02-11T16:00')
+        self.assertEqual(str(weather_data.time_index[-1]), '2014-12-31T23:00')
+        # The first year follows 29 February of the records: 1999 moves to the leap year 2000, and the leap year
+        # 2016 to 2017 if February has 28 days
+        weather_data = weather.open_epw(self.write_epw('typical_leap.epw', header, with_year(
+            leap_records[:744], 1999) + leap_records[744:]))
+        self.assertEqual(str(weather_data.time_index[59 * 24]), '2000-02-29T00:00')
+        self.assertEqual(len(weather_data.time_index), 8784)
+        weather_data = weather.open_epw(self.write_epw('typical_no_leap.epw', header, with_year(
+            records[:744], 2016) + records[744:]))
+        self.assertEqual(str(weather_data.time_index[0]), '2017-01-01T00:00')
+        self.assertEqual(str(weather_data.time_index[-1]), '2017-12-31T23:00')
+        # Only the first year moves, the second year of 29 February is then 2001
+        weather_data = weather.open_epw(self.write_epw('typical_broken.epw', header, (with_year(
+            leap_records[:744], 1999) + leap_records[744:]) * 2))
+        with self.assertRaises(ValueError):
+            weather_data.time_index
+
+        # Records of 15 minutes
+        quarter_records = []
+        for record in records:
+            fields = record.split(',')
+            for minute in [15, 30, 45, 60]:
+                quarter_records.append(','.join(fields[:4] + [str(minute)] + fields[5:]))
+        quarter_header = header[:7] + ['DATA PERIODS,1,4,Data,Sunday,1/1,12/31\n']
+        weather_data = weather.open_epw(self.write_epw('quarter.epw', quarter_header, quarter_records))
+        self.assertEqual(weather_data.timestep, 0.25)
+        self.assertEqual(str(weather_data.time_index[0]), '2013-01-01T00:00')
+        self.assertEqual(str(weather_data.time_index[5]), '2013-01-01T01:15')
+        self.assertEqual(len(weather_data.time_index), 35040)
+
+        Zurich = Location(weather_data=weather_data)
+        Altitude, Azimuth = Zurich.calc_weather_sun_path()
+        Altitude_check, Azimuth_check = Zurich.calc_sun_positions(47.480, 8.536, 2013, np.arange(0, 8760, 0.25))
+        np.testing.assert_allclose(Altitude, Altitude_check, atol=1e-4)
+        np.testing.assert_allclose(Azimuth, Azimuth_check, atol=1e-4)
+
+        Zurich = Location(self.write_epw('leap.epw', header, leap_records))
+        Altitude, Azimuth = Zurich.calc_weather_sun_path()
+        np.testing.assert_allclose(Altitude, Zurich.calc_sun_positions(47.480, 8.536, 2016)[0], atol=1e-4)
+
+    def test_TypicalYear(self):
+        # IWEC file with January of the leap year 1984 and a February of 28 days
+        weather_path = os.path.join(self.directory, 'CHE_Geneva.067000_IWEC.epw')
+        shutil.copy(os.path.join(mainPath, '..', 'Depreciated', '3R1C_Old_Simulator', 'data',
+                                 'CHE_Geneva.067000_IWEC.epw'), weather_path)
+        weather_data = weather.open_epw(weather_path)
+        self.assertEqual(weather_data['year'][0], 1984)
+        self.assertEqual(len(weather_data.time_index), 8760)
+        self.assertEqual(str(weather_data.time_index[0]), '1985-01-01T00:00')
+        self.assertEqual(str(weather_data.time_index[-1]), '1985-12-31T23:00')
+
+        self.assertEqual(epwreader.epwreader(weather_path)['dayofyear'].iloc[-1], 365)
+        self.assertEqual(len(schedules.expand_yearly(np.arange(8760.0), weather_data.time_index)), 8760)
+        Geneva = Location(weather_path)
+        Altitude, Azimuth = Geneva.calc_weather_sun_path()
+        self.assertEqual(len(Altitude), 8760)
+
+    def test_WeatherStore(self):
+        names = ['Zurich-Kloten_2013', 'wellington_2006', 'Manawatu1994']
+        for name in names[1:]:
+            shutil.copy(os.path.join(mainPath, 'auxiliary', name + '.epw'), self.directory)
+        weather_paths = [os.path.join(self.directory, name + '.epw') for name in names]
+
+        store_path = os.path.join(self.directory, 'store')
+        weather_store.build_weather_store(weather_paths, store_path)
+        store = weather_store.WeatherStore(store_path)
+        self.assertEqual(store.site_ids(), names)
+        self.assertEqual(store.array.shape, (3, 34, 8760))
+
+        for name, weather_path in zip(names, weather_paths):
+            weather_data = store.open_site(name)
+            reference = weather.open_epw(weather_path)
+            self.assertTrue(weather_data.to_dataframe().equals(reference.to_dataframe()))
+            self.assertEqual(weather_data.header, reference.header)
+            self.assertEqual(store.sites[name]['latitude_deg'], reference.latitude_deg)
+            self.assertTrue(np.shares_memory(weather_data['drybulb_C'], store.array))
+
+        self.assertEqual(store.sites['wellington_2006']['latitude_deg'], -41.41)
+        self.assertEqual(store.sites['wellington_2006']['longitude_deg'], 174.87)
+
+        Zurich = Location.from_weather_store(store, 'Zurich-Kloten_2013')
+        self.assertEqual(Zurich.weather_data['drybulb_C'][0], -2.1)
+        self.assertEqual(Zurich.weather_data.latitude_deg, 47.48)
+
+        with self.assertRaises(ValueError):
+            weather_store.build_weather_store(weather_paths[:2], store_path, site_ids=['a', 'a'])
+
+        # Every file is parsed once, also if its cache cannot be written
+        parsed = []
+        parse_epw = weather.parse_epw
+
+        def counting_parse_epw(weather_path):
+            parsed.append(weather_path)
+            return parse_epw(weather_path)
+
+        weather.parse_epw = counting_parse_epw
+        try:
+            unwritable = os.path.join(self.directory, 'not_a_folder')
+            open(unwritable, 'w').close()
+            store = weather_store.build_weather_store(weather_paths, store_path, cache_directory=unwritable)
+        finally:
+            weather.parse_epw = parse_epw
+        self.assertEqual(parsed, weather_paths)
+        self.assertEqual(store.open_site('Manawatu1994')['drybulb_C'][0],
+                         weather.open_epw(weather_paths[2])['drybulb_C'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()